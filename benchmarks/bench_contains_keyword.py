@@ -0,0 +1,53 @@
+"""
+Compare the compiled KeywordMatcher with the per-keyword substring loop it replaced.
+Messages are normalized once up front, so both paths are timed on the same folded text.
+
+    python -m benchmarks.bench_contains_keyword
+"""
+import random
+import string
+import timeit
+from typing import Sequence
+
+from core.resources.matcher import KeywordMatcher
+from core.utils.normalized_text import NormalizedText, fold
+
+KEYWORD_COUNTS = (10, 100, 200, 250, 300, 1000, 5000, 20000)
+MESSAGES = 200
+
+
+def linear_contains_keyword(message: NormalizedText, words: Sequence[str], folded_words: Sequence[str]) -> str | None:
+    folded = message.folded
+    for word, folded_word in zip(words, folded_words):
+        if folded_word in folded:
+            return word
+    return None
+
+
+def random_word(rnd: random.Random, alphabet: str) -> str:
+    return "".join(rnd.choices(alphabet, k=rnd.randint(4, 10)))
+
+
+def main():
+    rnd = random.Random(0)
+    alphabet = string.ascii_lowercase + "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+    messages = [
+        NormalizedText(" ".join(random_word(rnd, alphabet) for _ in range(rnd.randint(10, 80))))
+        for _ in range(MESSAGES)
+    ]
+    print(f"{'keywords':>8} {'linear, ms':>12} {'automaton, ms':>14} {'build, ms':>10}")
+    for count in KEYWORD_COUNTS:
+        words = [random_word(rnd, alphabet) for _ in range(count)]
+        folded_words = [fold(word) for word in words]
+        build = timeit.timeit(lambda: KeywordMatcher(words, linear_scan_limit=0), number=1)
+        matcher = KeywordMatcher(words, linear_scan_limit=0)
+        linear = timeit.timeit(lambda: [linear_contains_keyword(m, words, folded_words) for m in messages], number=1)
+        compiled = timeit.timeit(lambda: [matcher.find(m) for m in messages], number=1)
+        print(
+            f"{count:>8} {linear / MESSAGES * 1000:>12.3f} "
+            f"{compiled / MESSAGES * 1000:>14.3f} {build * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
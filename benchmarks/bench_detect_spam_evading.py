@@ -0,0 +1,46 @@
+"""
+Compare the script-table detect_spam_evading with the unicodedata.name loop it replaced.
+
+    python -m benchmarks.bench_detect_spam_evading
+"""
+import random
+import timeit
+import unicodedata
+
+from core.resources.controllers import detect_spam_evading
+from core.utils.unicode_scripts import script_table
+
+MESSAGES = 100
+WORDS = ["вакансия", "удалённо", "разработчик", "python", "senior", "backend", "зарплата", "офис"]
+
+
+def unicode_names_detect_spam_evading(text: str) -> bool:
+    in_word = False
+    alphabet = None
+    for c in text:
+        if not c.isalpha():
+            in_word = False
+            continue
+        if in_word is False:
+            in_word = True
+            alphabet = unicodedata.name(c).split()[0]
+            continue
+        if alphabet != unicodedata.name(c).split()[0]:
+            return True
+    return False
+
+
+def main():
+    rnd = random.Random(0)
+    build = timeit.timeit(script_table, number=1)
+    print(f"script table build: {build * 1000:.1f} ms (once per process)")
+    print(f"{'words':>6} {'unicodedata, ms':>16} {'script table, ms':>17}")
+    for length in (50, 500, 5000):
+        messages = [" ".join(rnd.choices(WORDS, k=length)) for _ in range(MESSAGES)]
+        legacy = timeit.timeit(lambda: [unicode_names_detect_spam_evading(m) for m in messages], number=1)
+        table = timeit.timeit(lambda: [detect_spam_evading(m) for m in messages], number=1)
+        print(f"{length:>6} {legacy / MESSAGES * 1000:>16.3f} {table / MESSAGES * 1000:>17.3f}")
+
+
+if __name__ == "__main__":
+    main()
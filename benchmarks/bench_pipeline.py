@@ -0,0 +1,123 @@
+"""
+Throughput and latency of the matching pipeline on the synthetic corpus.
+
+    python -m benchmarks.bench_pipeline --sizes 10 1000 100000 --output bench.json
+    python -m benchmarks.bench_pipeline --compare old.json new.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from statistics import quantiles
+from typing import Callable
+
+from benchmarks.corpus import generate_keywords, generate_messages, generate_minus_words
+from core.resources.controllers import detect_spam_evading, text_matches
+from core.resources.matcher import KeywordMatcher
+from core.utils.unicode_scripts import script_table
+
+DEFAULT_SIZES = (10, 100, 1000, 10_000, 100_000)
+
+
+def measure(function: Callable[[str], object], messages: list[str]) -> dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for message in messages:
+        call_started = time.perf_counter_ns()
+        function(message)
+        latencies.append(time.perf_counter_ns() - call_started)
+    elapsed = time.perf_counter() - started
+    percentiles = quantiles(latencies, n=100, method="inclusive")
+    return {
+        "messages_per_sec": round(len(messages) / elapsed, 1),
+        "p50_us": round(percentiles[49] / 1000, 2),
+        "p99_us": round(percentiles[98] / 1000, 2),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: list[int], message_count: int, seed: int) -> dict:
+    messages = generate_messages(message_count, seed=seed)
+    script_table()
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "seed": seed,
+        "messages": message_count,
+        "detect_spam_evading": measure(detect_spam_evading, messages),
+        "sizes": {},
+    }
+    for size in sizes:
+        keywords = generate_keywords(size, seed=seed)
+        minus_words = generate_minus_words(max(1, size // 10), seed=seed)
+        build_started = time.perf_counter()
+        keyword_matcher = KeywordMatcher(keywords)
+        minus_word_matcher = KeywordMatcher(minus_words)
+        build_ms = (time.perf_counter() - build_started) * 1000
+        results["sizes"][str(size)] = {
+            "build_ms": round(build_ms, 1),
+            "contains_keyword": measure(keyword_matcher.find, messages),
+            "text_matches": measure(lambda m: text_matches(m, keyword_matcher, minus_word_matcher), messages),
+        }
+        print(f"{size:>7} keywords done", file=sys.stderr)
+    return results
+
+
+def print_table(results: dict) -> None:
+    spam = results["detect_spam_evading"]
+    print(f"commit {results['commit']}, {results['messages']} messages, seed {results['seed']}")
+    print(f"detect_spam_evading: {spam['messages_per_sec']} msg/s, p50 {spam['p50_us']}us, p99 {spam['p99_us']}us")
+    print(f"{'keywords':>8} {'function':>17} {'msg/s':>10} {'p50, us':>9} {'p99, us':>9} {'build, ms':>10}")
+    for size, entry in results["sizes"].items():
+        for function in ("contains_keyword", "text_matches"):
+            row = entry[function]
+            print(
+                f"{size:>8} {function:>17} {row['messages_per_sec']:>10} "
+                f"{row['p50_us']:>9} {row['p99_us']:>9} {entry['build_ms']:>10}"
+            )
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']} (msg/s)")
+    for size in new["sizes"]:
+        if size not in old["sizes"]:
+            continue
+        for function in ("contains_keyword", "text_matches"):
+            before = old["sizes"][size][function]["messages_per_sec"]
+            after = new["sizes"][size][function]["messages_per_sec"]
+            print(f"{size:>8} {function:>17} {before:>10} -> {after:>10} ({after / before:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two saved JSON results")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    results = run(args.sizes, args.messages, args.seed)
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
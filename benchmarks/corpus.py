@@ -0,0 +1,74 @@
+"""
+Seeded synthetic chat corpus: mixed Russian/English job-chat messages and keyword lists.
+"""
+import random
+
+RUSSIAN_WORDS = (
+    "привет всем ищу разработчика в команду удалённо офис москва зарплата опыт работы от лет "
+    "вакансия требуется проект стартап знание обязательно будет плюсом пишите в личку "
+    "условия график полный день частичная занятость оформление по тк рф бонусы "
+    "задачи поддержка сервиса высоконагруженного интеграция с платежными системами "
+    "команда дружная гибкий старт отпуск оплачиваемый релокация помощь собеседование"
+).split()
+ENGLISH_WORDS = (
+    "python backend senior middle junior developer remote fulltime django fastapi asyncio "
+    "postgres redis kafka docker kubernetes aws team lead salary usd per month contract "
+    "frontend react typescript golang rust devops mlops data engineer hiring apply now"
+).split()
+NOISE = ("🔥", "👉", "!!!", "?", ",", "—", "https://t.me/joinchat/abc", "@recruiter", "#вакансия", "100k", "3+")
+SYLLABLES = ("ка", "ро", "ми", "ла", "ст", "ен", "ко", "ва", "ba", "ro", "ne", "ti", "da", "ko", "mi", "lu")
+HOMOGLYPHS = str.maketrans("аеорсх", "aeopcx")
+
+
+def synthetic_word(rnd: random.Random) -> str:
+    return "".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 5)))
+
+
+def generate_messages(count: int, seed: int = 0, spam_ratio: float = 0.02) -> list[str]:
+    rnd = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        length = int(rnd.lognormvariate(3, 0.8)) + 1
+        russian_share = rnd.random()
+        words = []
+        for _ in range(length):
+            roll = rnd.random()
+            if roll < 0.08:
+                words.append(rnd.choice(NOISE))
+            elif roll < 0.12:
+                words.append(synthetic_word(rnd))
+            elif rnd.random() < russian_share:
+                words.append(rnd.choice(RUSSIAN_WORDS))
+            else:
+                words.append(rnd.choice(ENGLISH_WORDS))
+        if rnd.random() < 0.3:
+            words[0] = words[0].capitalize()
+        if rnd.random() < spam_ratio:
+            index = rnd.randrange(len(words))
+            words[index] = words[index].translate(HOMOGLYPHS)
+        messages.append(" ".join(words))
+    return messages
+
+
+def generate_keywords(count: int, seed: int = 0, prefix_ratio: float = 0.05) -> list[str]:
+    """
+    Real vocabulary first, then unique synthetic words; a share of them as '|' prefix keywords.
+    """
+    rnd = random.Random(seed)
+    vocabulary = RUSSIAN_WORDS + ENGLISH_WORDS
+    candidates = rnd.sample(vocabulary, k=min(count // 10 + 1, len(vocabulary)))
+    seen = set(candidates)
+    while len(candidates) < count:
+        word = synthetic_word(rnd) + synthetic_word(rnd)
+        if word not in seen:
+            seen.add(word)
+            candidates.append(word)
+    rnd.shuffle(candidates)
+    keywords = candidates[:count]
+    for index in rnd.sample(range(len(keywords)), k=int(len(keywords) * prefix_ratio)):
+        keywords[index] = "|" + keywords[index][:max(3, len(keywords[index]) - 2)]
+    return keywords
+
+
+def generate_minus_words(count: int, seed: int = 0) -> list[str]:
+    return generate_keywords(count, seed=seed + 1, prefix_ratio=0.0)
@@ -3,6 +3,8 @@ import logging
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings
 
+from core.resources.enums import HomoglyphPolicy, OverflowPolicy
+
 
 class Settings(BaseSettings):
     API_ID: int
@@ -10,8 +12,42 @@ class Settings(BaseSettings):
     BOT_TOKEN: SecretStr
     ADMIN_ID: int
     GROUP_ID: int
+    telegram_sessions: list[str] = ["test_client_session"]
     db_url: str = "sqlite+aiosqlite:///database.db"
     db_echo: bool = False
+    db_pool_size: int = 10
+    db_max_overflow: int = 5
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    notify_rate_per_minute: int = 20
+    notify_burst: int = 3
+    notify_queue_size: int = 1000
+    sender_cache_size: int = 1024
+    sender_cache_ttl: int = 3600
+    sender_resolve_timeout: float | None = 2.0
+    matching_workers: int = 0
+    matching_queue_size: int = 1000
+    matching_overflow: OverflowPolicy = OverflowPolicy.BLOCK
+    homoglyph_policy: HomoglyphPolicy = HomoglyphPolicy.DROP
+    dedup_window: int = 3600
+    dedup_max_entries: int = 10_000
+    join_concurrency: int = 3
+    dialog_rescan_interval: int = 3600
+    backfill_concurrency: int = 2
+    backfill_checkpoint_every: int = 200
+    gap_recovery_concurrency: int = 4
+    gap_recovery_max_messages: int = 1000
+    last_seen_flush_interval: float = 5.0
+    reconnect_check_interval: float = 5.0
+    admin_page_size: int = 20
+    match_log_batch_size: int = 500
+    match_log_flush_interval: float = 5.0
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int | None = None
+    ipc_socket: str = "keyword_seek.sock"
+    bus_max_pending: int = 1000
+    admin_session: str = "admin_client_session"
+    matcher_processes: int = 1
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,73 @@
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class Backend:
+    def engine_options(self) -> dict:
+        return {}
+
+    def configure(self, engine: AsyncEngine) -> None:
+        pass
+
+
+class SqliteBackend(Backend):
+    PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+        "cache_size": -20000,
+        "foreign_keys": "ON",
+    }
+
+    def __init__(self, in_memory: bool) -> None:
+        self.in_memory = in_memory
+
+    def configure(self, engine: AsyncEngine) -> None:
+        pragmas = dict(self.PRAGMAS)
+        if self.in_memory:
+            del pragmas["journal_mode"]
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_pragmas(dbapi_connection, _):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+
+class PostgresBackend(Backend):
+    def __init__(self, pool_size: int, max_overflow: int, pool_timeout: float, pool_recycle: int) -> None:
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+
+    def engine_options(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": True,
+        }
+
+
+def get_backend(
+    url: str,
+    pool_size: int = 10,
+    max_overflow: int = 5,
+    pool_timeout: float = 30,
+    pool_recycle: int = 1800,
+) -> Backend:
+    parsed = make_url(url)
+    match parsed.get_backend_name():
+        case "sqlite":
+            return SqliteBackend(in_memory=parsed.database in (None, "", ":memory:"))
+        case "postgresql":
+            return PostgresBackend(pool_size, max_overflow, pool_timeout, pool_recycle)
+    logging.warning(f"No tuning for database backend {parsed.get_backend_name()}, using engine defaults")
+    return Backend()
@@ -1,10 +1,35 @@
-from typing import Sequence
+from datetime import datetime
+from itertools import islice
+from typing import AsyncIterator, Iterable, Sequence
 
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import Select, case, delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database.models import Group, Word
-from core.resources.enums import EntityType
+from core.database.models import BackfillCheckpoint, Dialog, Group, LastSeenMessage, Word, WordScope
+from core.resources.enums import EntityType, MatchMode
+from core.utils.stemming import stem_keyword
+
+SNAPSHOT_DIRTY = "snapshot_dirty"
+# SQLite's default bound parameter limit before 3.32 (32766 since); multi-row VALUES stay below it.
+SQLITE_MAX_PARAMS = 999
+STREAM_BATCH_SIZE = 400
+PAGE_SIZE = 20
+
+
+def upsert_batch_size(params_per_row: int) -> int:
+    """
+    Rows per multi-row INSERT, sized from the parameters each row binds.
+    """
+    return SQLITE_MAX_PARAMS // params_per_row
+
+
+def mark_snapshot_dirty(session: AsyncSession) -> None:
+    session.info[SNAPSHOT_DIRTY] = True
+
+
+def is_snapshot_dirty(session: AsyncSession) -> bool:
+    return session.info.pop(SNAPSHOT_DIRTY, False)
 
 
 async def get_group(group_id: int, session: AsyncSession) -> Group:
@@ -20,15 +45,124 @@ async def get_active_groups_dict(session: AsyncSession) -> dict[int, Group]:
     return active_groups
 
 
-async def get_keywords(session: AsyncSession, entity: EntityType) -> Sequence[str]:
+class Page:
+    """
+    One keyset page of rows ordered by id. A page is fetched again by `after=page.cursor`.
+    """
+
+    __slots__ = ("items", "has_prev", "has_next")
+
+    def __init__(self, items: Sequence, has_prev: bool, has_next: bool) -> None:
+        self.items = items
+        self.has_prev = has_prev
+        self.has_next = has_next
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def cursor(self) -> int:
+        return self.items[0].id - 1 if self.items else 0
+
+    @property
+    def first_id(self) -> int:
+        return self.items[0].id
+
+    @property
+    def last_id(self) -> int:
+        return self.items[-1].id
+
+
+async def get_page(
+    session: AsyncSession, query: Select, after: int = 0, before: int | None = None, size: int = PAGE_SIZE
+) -> Page:
+    """
+    Rows with id > after, or the rows right before `before` when it is given;
+    one extra row is fetched to tell whether there is more in that direction.
+    """
+    model = query.column_descriptions[0]["entity"]
+    if before is not None:
+        result = await session.execute(query.where(model.id < before).order_by(model.id.desc()).limit(size + 1))
+        rows = result.scalars().all()
+        return Page(list(reversed(rows[:size])), has_prev=len(rows) > size, has_next=True)
+    result = await session.execute(query.where(model.id > after).order_by(model.id).limit(size + 1))
+    rows = result.scalars().all()
+    if not rows and after > 0:
+        # The last rows of this page were deleted: show the page before it.
+        return await get_page(session, query, before=after + 1, size=size)
+    return Page(rows[:size], has_prev=after > 0, has_next=len(rows) > size)
+
+
+async def get_active_groups_page(
+    session: AsyncSession, after: int = 0, before: int | None = None, size: int = PAGE_SIZE
+) -> Page:
+    return await get_page(session, select(Group).where(Group.is_active), after, before, size)
+
+
+async def get_keywords_page(
+    session: AsyncSession, entity: EntityType, after: int = 0, before: int | None = None, size: int = PAGE_SIZE
+) -> Page:
+    minus = entity is EntityType.MINUS_WORD
+    return await get_page(session, select(Word).where(Word.minus_word.is_(minus)), after, before, size)
+
+
+def word_stem(keyword: str, mode: MatchMode) -> str | None:
+    return stem_keyword(keyword) if mode is MatchMode.STEM else None
+
+
+async def get_keywords(session: AsyncSession, entity: EntityType) -> list[tuple[str, MatchMode, str | None]]:
+    """
+    Keywords with their match modes and stored stems that apply to every group, i.e. without scopes.
+    """
     minus = entity is EntityType.MINUS_WORD
     result = await session.execute(
-        select(Word.keyword).where(Word.minus_word.is_(minus))
+        select(Word.keyword, Word.match_mode, Word.stem)
+        .where(Word.minus_word.is_(minus))
+        .where(~select(WordScope.id).where(WordScope.word_id == Word.id).exists())
     )
-    keywords = result.scalars().all()
+    keywords = [(keyword, mode, stem) for keyword, mode, stem in result]
     return keywords
 
 
+async def get_scoped_keywords(
+    session: AsyncSession, entity: EntityType
+) -> dict[int, list[tuple[str, MatchMode, str | None]]]:
+    """
+    Scoped keywords by the telegram_id of the active groups they are restricted to.
+    """
+    minus = entity is EntityType.MINUS_WORD
+    result = await session.execute(
+        select(Group.telegram_id, Word.keyword, Word.match_mode, Word.stem)
+        .join(WordScope, WordScope.word_id == Word.id)
+        .join(Group, Group.id == WordScope.group_id)
+        .where(Word.minus_word.is_(minus), Group.is_active)
+        .order_by(Word.id)
+    )
+    scoped = {}
+    for telegram_id, keyword, mode, stem in result:
+        scoped.setdefault(telegram_id, []).append((keyword, mode, stem))
+    return scoped
+
+
+async def get_word(word_id: int, session: AsyncSession) -> Word | None:
+    return await session.get(Word, word_id)
+
+
+async def get_word_scope_ids(word_id: int, session: AsyncSession) -> set[int]:
+    result = await session.execute(select(WordScope.group_id).where(WordScope.word_id == word_id))
+    return set(result.scalars().all())
+
+
+async def toggle_word_scope(word_id: int, group_id: int, session: AsyncSession) -> None:
+    result = await session.execute(
+        delete(WordScope).where(WordScope.word_id == word_id, WordScope.group_id == group_id)
+    )
+    if result.rowcount == 0:
+        session.add(WordScope(word_id=word_id, group_id=group_id))
+        await session.flush()
+    mark_snapshot_dirty(session)
+
+
 async def get_keywords_dict(
     session: AsyncSession, entity: EntityType
 ) -> dict[int, Word]:
@@ -39,9 +173,66 @@ async def get_keywords_dict(
     return keywords_dict
 
 
+async def add_group(telegram_id: int, link: str, title: str, session: AsyncSession) -> Group:
+    group = Group(telegram_id=telegram_id, link=link, title=title)
+    session.add(group)
+    await session.flush()
+    mark_snapshot_dirty(session)
+    return group
+
+
+async def add_keyword(
+    keyword: str, entity: EntityType, session: AsyncSession, mode: MatchMode = MatchMode.SUBSTRING
+) -> Word:
+    word = Word(
+        keyword=keyword, minus_word=entity is EntityType.MINUS_WORD, match_mode=mode, stem=word_stem(keyword, mode)
+    )
+    session.add(word)
+    await session.flush()
+    mark_snapshot_dirty(session)
+    return word
+
+
+async def add_keywords(
+    keywords: Iterable[tuple[str, MatchMode]], entity: EntityType, session: AsyncSession
+) -> int:
+    """
+    Bulk insert in batches, skipping keywords that already exist in either list.
+    Consumes `keywords` lazily and marks the snapshot dirty once; returns how many were inserted.
+    """
+    minus = entity is EntityType.MINUS_WORD
+    inserted = 0
+    rows = (
+        {"keyword": keyword, "minus_word": minus, "match_mode": mode, "stem": word_stem(keyword, mode)}
+        for keyword, mode in keywords
+    )
+    # keyword, minus_word, match_mode and stem per row
+    size = upsert_batch_size(4)
+    while batch := list(islice(rows, size)):
+        query = upsert(session, Word).values(batch)
+        result = await session.execute(query.on_conflict_do_nothing(index_elements=[Word.keyword]))
+        inserted += result.rowcount
+    if inserted:
+        mark_snapshot_dirty(session)
+    return inserted
+
+
+async def iter_keywords(session: AsyncSession, entity: EntityType) -> AsyncIterator[tuple[str, MatchMode]]:
+    minus = entity is EntityType.MINUS_WORD
+    result = await session.stream(
+        select(Word.keyword, Word.match_mode)
+        .where(Word.minus_word.is_(minus))
+        .order_by(Word.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    async for keyword, mode in result:
+        yield keyword, mode
+
+
 async def delete_keyword(keyword_id: int, session: AsyncSession):
     query = delete(Word).filter(Word.id == keyword_id)
     await session.execute(query)
+    mark_snapshot_dirty(session)
 
 
 async def toggle_group_activeness(telegram_id: int, session: AsyncSession) -> None:
@@ -51,3 +242,123 @@ async def toggle_group_activeness(telegram_id: int, session: AsyncSession) -> No
         .values(is_active=func.not_(Group.is_active))
     )
     await session.flush()
+    mark_snapshot_dirty(session)
+
+
+def upsert(session: AsyncSession, model):
+    """
+    Dialect-specific INSERT that supports on_conflict_do_update / on_conflict_do_nothing.
+    """
+    match session.get_bind().dialect.name:
+        case "postgresql":
+            return postgresql.insert(model)
+        case "sqlite":
+            return sqlite.insert(model)
+    raise ValueError(f"Upsert is not supported for {session.get_bind().dialect.name}")
+
+
+async def get_dialog_ids(shard: str, session: AsyncSession) -> set[int]:
+    result = await session.execute(select(Dialog.telegram_id).where(Dialog.shard == shard))
+    return set(result.scalars().all())
+
+
+async def get_dialogs_watermark(shard: str, session: AsyncSession) -> datetime | None:
+    result = await session.execute(select(func.max(Dialog.last_message_at)).where(Dialog.shard == shard))
+    return result.scalar()
+
+
+async def save_dialogs(shard: str, dialogs: dict[int, datetime | None], session: AsyncSession) -> None:
+    rows = [
+        {"shard": shard, "telegram_id": telegram_id, "last_message_at": date}
+        for telegram_id, date in dialogs.items()
+    ]
+    size = upsert_batch_size(3)
+    for start in range(0, len(rows), size):
+        query = upsert(session, Dialog).values(rows[start:start + size])
+        await session.execute(
+            query.on_conflict_do_update(
+                index_elements=[Dialog.shard, Dialog.telegram_id],
+                set_={"last_message_at": query.excluded.last_message_at},
+            )
+        )
+
+
+async def delete_dialogs(shard: str, telegram_ids: Iterable[int], session: AsyncSession) -> None:
+    telegram_ids = iter(telegram_ids)
+    # One parameter is taken by the shard.
+    while batch := list(islice(telegram_ids, SQLITE_MAX_PARAMS - 1)):
+        await session.execute(delete(Dialog).where(Dialog.shard == shard, Dialog.telegram_id.in_(batch)))
+
+
+async def get_backfill_checkpoint(group_id: int, session: AsyncSession) -> BackfillCheckpoint | None:
+    result = await session.execute(select(BackfillCheckpoint).where(BackfillCheckpoint.group_id == group_id))
+    return result.scalar_one_or_none()
+
+
+async def start_backfill(
+    group_id: int, limit: int | None, since: datetime | None, session: AsyncSession
+) -> BackfillCheckpoint:
+    """
+    The group's unfinished checkpoint, so an interrupted backfill resumes with its own bounds,
+    or a checkpoint for a new scan from the newest message.
+    """
+    checkpoint = await get_backfill_checkpoint(group_id, session)
+    if checkpoint is None:
+        checkpoint = BackfillCheckpoint(group_id=group_id)
+        session.add(checkpoint)
+    elif checkpoint.finished_at is None:
+        return checkpoint
+    checkpoint.offset_id = 0
+    checkpoint.remaining = limit
+    checkpoint.since = since
+    checkpoint.scanned = 0
+    checkpoint.finished_at = None
+    await session.flush()
+    return checkpoint
+
+
+async def save_backfill_progress(
+    checkpoint_id: int,
+    offset_id: int,
+    remaining: int | None,
+    scanned: int,
+    session: AsyncSession,
+    finished: bool = False,
+) -> None:
+    await session.execute(
+        update(BackfillCheckpoint)
+        .where(BackfillCheckpoint.id == checkpoint_id)
+        .values(
+            offset_id=offset_id,
+            remaining=remaining,
+            scanned=scanned,
+            finished_at=func.current_timestamp() if finished else None,
+        )
+    )
+
+
+async def get_last_seen(shard: str, session: AsyncSession) -> dict[int, int]:
+    result = await session.execute(
+        select(LastSeenMessage.telegram_id, LastSeenMessage.message_id).where(LastSeenMessage.shard == shard)
+    )
+    return dict(result.tuples().all())
+
+
+async def save_last_seen(shard: str, last_seen: dict[int, int], session: AsyncSession) -> None:
+    """
+    Upsert in batches; a stored id is never moved back.
+    """
+    rows = [
+        {"shard": shard, "telegram_id": telegram_id, "message_id": message_id}
+        for telegram_id, message_id in last_seen.items()
+    ]
+    size = upsert_batch_size(3)
+    for start in range(0, len(rows), size):
+        query = upsert(session, LastSeenMessage).values(rows[start:start + size])
+        newer = query.excluded.message_id > LastSeenMessage.message_id
+        await session.execute(
+            query.on_conflict_do_update(
+                index_elements=[LastSeenMessage.shard, LastSeenMessage.telegram_id],
+                set_={"message_id": case((newer, query.excluded.message_id), else_=LastSeenMessage.message_id)},
+            )
+        )
@@ -1,12 +1,26 @@
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from core.database.backends import get_backend
+from core.database.snapshot import SnapshotStore
+
 
 class DatabaseConnector:
-    def __init__(self, url: str, echo: bool = False) -> None:
-        self.engine = create_async_engine(url=url, echo=echo)
+    def __init__(
+        self,
+        url: str,
+        echo: bool = False,
+        pool_size: int = 10,
+        max_overflow: int = 5,
+        pool_timeout: float = 30,
+        pool_recycle: int = 1800,
+    ) -> None:
+        self.backend = get_backend(url, pool_size, max_overflow, pool_timeout, pool_recycle)
+        self.engine = create_async_engine(url=url, echo=echo, **self.backend.engine_options())
+        self.backend.configure(self.engine)
         self.session_factory = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
+        self.snapshot = SnapshotStore(self.session_factory)
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.database.models import MatchLog
+from core.resources.enums import IgnoreReason
+from core.utils.result import Ok, Result
+
+
+class MatchLogWriter:
+    """
+    Write-behind buffer for match_log: rows are kept in memory and inserted with one
+    executemany per batch, when batch_size rows are pending or every flush_interval seconds.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer: list[dict] = []
+        self.written = 0
+        self.failed = 0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._pending_flush: asyncio.Task | None = None
+
+    def stats(self) -> dict[str, int]:
+        return {"buffered": len(self.buffer), "written": self.written, "failed": self.failed}
+
+    def record(self, event, result: Result[str, IgnoreReason]) -> None:
+        self.buffer.append({
+            "chat_id": event.chat_id,
+            "message_id": event.id,
+            "sender_id": event.sender_id,
+            "keyword": result.value if isinstance(result, Ok) else None,
+            "ignore_reason": None if isinstance(result, Ok) else result.value.name,
+        })
+        if len(self.buffer) >= self.batch_size and (self._pending_flush is None or self._pending_flush.done()):
+            self._pending_flush = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        async with self._lock:
+            rows, self.buffer = self.buffer, []
+            if not rows:
+                return
+            try:
+                async with self.session_factory.begin() as session:
+                    await session.execute(insert(MatchLog), rows)
+                self.written += len(rows)
+            except Exception:
+                self.failed += len(rows)
+                logging.exception(f"Failed to write {len(rows)} match log rows")
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._pending_flush is not None:
+            await self._pending_flush
+        await self.flush()
@@ -1,8 +1,10 @@
 from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy import BigInteger, Enum, ForeignKey, UniqueConstraint, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from core.resources.enums import MatchMode
+
 
 class Base(DeclarativeBase):
     __abstract__ = True
@@ -17,10 +19,11 @@ class Base(DeclarativeBase):
 class Group(Base):
     __tablename__ = "groups"
 
-    telegram_id: Mapped[int] = mapped_column(unique=True)
+    # Telegram ids need 64 bits: supergroup ids are below -10**12, user ids pass 2**31.
+    telegram_id: Mapped[int] = mapped_column(BigInteger, unique=True)
     link: Mapped[str]
     title: Mapped[str]
-    is_active: Mapped[bool] = mapped_column(default=True)
+    is_active: Mapped[bool] = mapped_column(default=True, index=True)
 
     def __str__(self):
         return f"{self.__class__.__name__}(id={self.id}, group_name={self.link!r})"
@@ -29,4 +32,70 @@ class Group(Base):
 class Word(Base):
     __tablename__ = "words"
     keyword: Mapped[str] = mapped_column(unique=True)
-    minus_word: Mapped[bool] = mapped_column(default=False, server_default="0")
+    minus_word: Mapped[bool] = mapped_column(default=False, server_default="0", index=True)
+    match_mode: Mapped[MatchMode] = mapped_column(
+        Enum(MatchMode, native_enum=False, values_callable=lambda modes: [mode.value for mode in modes]),
+        default=MatchMode.SUBSTRING,
+        server_default=MatchMode.SUBSTRING.value,
+    )
+    # Russian stem of a stem-mode keyword, computed once when the keyword is saved.
+    stem: Mapped[str | None]
+
+
+class WordScope(Base):
+    """
+    Restricts a keyword or minus-word to a group. Words without scopes apply to every group.
+    """
+    __tablename__ = "word_scopes"
+    __table_args__ = (UniqueConstraint("word_id", "group_id"), Base.__table_args__)
+
+    word_id: Mapped[int] = mapped_column(ForeignKey("words.id", ondelete="CASCADE"))
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id", ondelete="CASCADE"), index=True)
+
+
+class BackfillCheckpoint(Base):
+    """
+    Progress of a history backfill of one group. Messages are scanned newest first, so
+    `offset_id` is the oldest message handled so far (0 before the first one) and an
+    interrupted scan resumes below it; `remaining` and `since` are the bounds it was started with.
+    """
+    __tablename__ = "backfill_checkpoints"
+
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id", ondelete="CASCADE"), unique=True)
+    offset_id: Mapped[int] = mapped_column(default=0)
+    remaining: Mapped[int | None]
+    since: Mapped[datetime | None]
+    scanned: Mapped[int] = mapped_column(default=0)
+    finished_at: Mapped[datetime | None]
+
+
+class Dialog(Base):
+    __tablename__ = "dialogs"
+    __table_args__ = (UniqueConstraint("shard", "telegram_id"), Base.__table_args__)
+
+    shard: Mapped[str] = mapped_column(server_default="")
+    telegram_id: Mapped[int] = mapped_column(BigInteger)
+    last_message_at: Mapped[datetime | None]
+
+
+class LastSeenMessage(Base):
+    """
+    Newest message processed per group and session, from which missed messages are fetched
+    after a restart or reconnect. Keyed by session, as basic group message ids are per account.
+    """
+    __tablename__ = "last_seen_messages"
+    __table_args__ = (UniqueConstraint("shard", "telegram_id"), Base.__table_args__)
+
+    shard: Mapped[str]
+    telegram_id: Mapped[int] = mapped_column(BigInteger)
+    message_id: Mapped[int]
+
+
+class MatchLog(Base):
+    __tablename__ = "match_log"
+
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    message_id: Mapped[int]
+    sender_id: Mapped[int | None] = mapped_column(BigInteger)
+    keyword: Mapped[str | None]
+    ignore_reason: Mapped[str | None]
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.database.crud import get_active_groups_dict, get_keywords, get_scoped_keywords
+from core.database.models import Group
+from core.resources.enums import EntityType
+from core.resources.matcher import KeywordEntry, MatcherIndex
+
+
+class Snapshot:
+    """
+    Immutable view of active groups and keyword lists used by the message hot path.
+    """
+
+    __slots__ = (
+        "version",
+        "groups",
+        "keywords",
+        "minus_words",
+        "scoped_keywords",
+        "scoped_minus_words",
+        "matchers",
+        "keyword_matcher",
+        "minus_word_matcher",
+    )
+
+    def __init__(
+        self,
+        version: int,
+        groups: dict[int, Group],
+        keywords: Sequence[KeywordEntry],
+        minus_words: Sequence[KeywordEntry],
+        scoped_keywords: dict[int, Sequence[KeywordEntry]] | None = None,
+        scoped_minus_words: dict[int, Sequence[KeywordEntry]] | None = None,
+    ) -> None:
+        self.version = version
+        self.groups = groups
+        self.keywords = tuple(keywords)
+        self.minus_words = tuple(minus_words)
+        self.scoped_keywords = {chat_id: tuple(words) for chat_id, words in (scoped_keywords or {}).items()}
+        self.scoped_minus_words = {chat_id: tuple(words) for chat_id, words in (scoped_minus_words or {}).items()}
+        self.matchers = MatcherIndex(self.keywords, self.minus_words, self.scoped_keywords, self.scoped_minus_words)
+        self.keyword_matcher = self.matchers.keyword_matcher
+        self.minus_word_matcher = self.matchers.minus_word_matcher
+
+    def __repr__(self) -> str:
+        return (
+            f"Snapshot(version={self.version}, groups={len(self.groups)}, "
+            f"keywords={len(self.keywords)}, minus_words={len(self.minus_words)}, "
+            f"scoped_groups={len(self.matchers)})"
+        )
+
+
+class SnapshotStore:
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.session_factory = session_factory
+        self.current = Snapshot(version=0, groups={}, keywords=(), minus_words=())
+        self._lock = asyncio.Lock()
+
+    async def rebuild(self) -> Snapshot:
+        # One rebuild at a time: otherwise one that read the tables before a write could
+        # finish last and install the older lists under the newest version.
+        async with self._lock:
+            return await self._rebuild()
+
+    async def _rebuild(self) -> Snapshot:
+        async with self.session_factory() as session:
+            groups = await get_active_groups_dict(session)
+            keywords = await get_keywords(session, EntityType.WORD)
+            minus_words = await get_keywords(session, EntityType.MINUS_WORD)
+            scoped_keywords = await get_scoped_keywords(session, EntityType.WORD)
+            scoped_minus_words = await get_scoped_keywords(session, EntityType.MINUS_WORD)
+        self.current = Snapshot(
+            version=self.current.version + 1,
+            groups=groups,
+            keywords=keywords,
+            minus_words=minus_words,
+            scoped_keywords=scoped_keywords,
+            scoped_minus_words=scoped_minus_words,
+        )
+        logging.info(f"snapshot rebuilt: {self.current}")
+        return self.current
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable
+
+from telethon.errors import FloodWaitError
+
+from core.database.crud import save_backfill_progress, start_backfill
+from core.database.database_connector import DatabaseConnector
+from core.database.models import Group
+from core.resources.shards import ShardManager
+from core.resources.telethon_events import RemoteMessage
+
+MessageHandler = Callable[[RemoteMessage], Awaitable[None]]
+DoneHandler = Callable[[dict[str, int]], Awaitable[None]]
+
+
+class Backfill:
+    """
+    Replays the recent history of groups through the live matching path.
+
+    Groups are scanned concurrently, at most `concurrency` at a time, each one newest first
+    in a single iter_messages stream read by the session that owns the group. Progress is
+    saved every `checkpoint_every` messages and on a flood wait, and a group with an
+    unfinished checkpoint resumes from it instead of starting over.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseConnector,
+        shards: ShardManager,
+        on_message: MessageHandler,
+        concurrency: int = 2,
+        checkpoint_every: int = 200,
+    ) -> None:
+        self.db = db
+        self.shards = shards
+        self.on_message = on_message
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.scanned = 0
+        self.groups_done = 0
+        self.groups_failed = 0
+        self.flood_waits = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "scanned": self.scanned,
+            "groups_done": self.groups_done,
+            "groups_failed": self.groups_failed,
+            "flood_waits": self.flood_waits,
+        }
+
+    def start(
+        self,
+        group_ids: Iterable[int],
+        limit: int | None = None,
+        since: datetime | None = None,
+        on_done: DoneHandler | None = None,
+    ) -> bool:
+        """
+        Run in the background, e.g. from an admin command; False if a backfill is already running.
+        """
+        if self.running:
+            return False
+
+        async def run_and_report():
+            stats = await self.run(group_ids, limit, since)
+            if on_done is not None:
+                await on_done(stats)
+
+        self._task = asyncio.create_task(run_and_report())
+        return True
+
+    async def run(
+        self, group_ids: Iterable[int], limit: int | None = None, since: datetime | None = None
+    ) -> dict[str, int]:
+        """
+        Scan the last `limit` messages and/or the messages after `since` (naive UTC) of the
+        given groups; returns the counters of this run.
+        """
+        assert limit is not None or since is not None, "a backfill needs a message limit or a start date"
+        before = self.stats()
+        groups = self.db.snapshot.current.groups
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def backfill(group: Group):
+            async with semaphore:
+                try:
+                    await self._backfill_group(group, limit, since)
+                    self.groups_done += 1
+                except Exception:
+                    self.groups_failed += 1
+                    logging.exception(f"Backfill of group {group.telegram_id} stopped, it resumes on the next run")
+
+        await asyncio.gather(*(backfill(groups[group_id]) for group_id in group_ids if group_id in groups))
+        return {name: value - before[name] for name, value in self.stats().items()}
+
+    async def _backfill_group(self, group: Group, limit: int | None, since: datetime | None) -> None:
+        async with self.db.session_factory.begin() as session:
+            checkpoint = await start_backfill(group.id, limit, since, session)
+            checkpoint_id = checkpoint.id
+            offset_id, remaining, since, scanned = (
+                checkpoint.offset_id, checkpoint.remaining, checkpoint.since, checkpoint.scanned
+            )
+        if offset_id:
+            logging.info(f"Resuming backfill of group {group.telegram_id} below message {offset_id}")
+        client = self.shards.client_for(group.telegram_id)
+
+        async def save(finished: bool = False):
+            async with self.db.session_factory.begin() as session:
+                await save_backfill_progress(checkpoint_id, offset_id, remaining, scanned, session, finished)
+
+        while remaining != 0:
+            try:
+                async for message in client.iter_messages(group.telegram_id, limit=remaining, offset_id=offset_id):
+                    if since is not None and message.date.replace(tzinfo=None) < since:
+                        remaining = 0
+                        break
+                    offset_id = message.id
+                    scanned += 1
+                    self.scanned += 1
+                    if remaining is not None:
+                        remaining -= 1
+                    if not message.out and message.message:
+                        await self.on_message(RemoteMessage(
+                            group.telegram_id, message.id, message.sender_id, message.message, client, message.sender
+                        ))
+                    if scanned % self.checkpoint_every == 0:
+                        await save()
+                break
+            except FloodWaitError as e:
+                self.flood_waits += 1
+                logging.info(f"Flood wait for {e.seconds}s while backfilling group {group.telegram_id}")
+                await save()
+                await asyncio.sleep(e.seconds)
+        await save(finished=True)
+        logging.info(f"Backfilled {scanned} messages of group {group.telegram_id}")
@@ -1,10 +1,21 @@
 from aiogram.filters.callback_data import CallbackData
 
-from core.resources.enums import Action, EntityType
+from core.resources.enums import Action, EntityType, ListView
 
 
 class ActionDataFactory(CallbackData, prefix="actiondata"):
+    """
+    Packed into at most 64 bytes, so fields a button doesn't use are left None and packed
+    empty; positions to return to are kept in FSM state rather than here.
+    """
     action: Action
     entity: EntityType
     id: int = 0
+    # Keyset position of the list page the button belongs to, see crud.Page.
+    cursor: int = 0
+    page: int = 0
+    # Set on the paging buttons only.
+    view: ListView | None = None
+    # Second id for actions on a pair, e.g. the group when toggling a keyword's scope.
+    target: int | None = None
 
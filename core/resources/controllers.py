@@ -1,25 +1,67 @@
+import asyncio
+import csv
 import logging
-import re
-import unicodedata
-from typing import Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Sequence
 
 import arrow
 from telethon import TelegramClient
+from telethon.errors import FloodWaitError, UserAlreadyParticipantError
 from telethon.tl.functions.channels import JoinChannelRequest
 from telethon.tl.functions.messages import ImportChatInviteRequest
 from telethon.tl.types import Channel, Chat, User
 
 from core.database.models import Group, Word
-from core.resources.enums import IgnoreReason
+from core.resources.enums import HomoglyphPolicy, IgnoreReason, MatchMode
+from core.resources.matcher import KeywordEntry, KeywordMatcher, MatcherChain, keyword_label, parse_keyword
 from core.resources.replies import (
     groups_list,
     keywords_list,
+    mixed_scripts_warning,
     no_groups_yet,
     no_keywords_yet,
     text_with_username,
+    text_without_sender,
     text_without_username,
 )
+from core.resources.sender_cache import SenderCache
+from core.utils.metrics import MESSAGES, STAGE_SECONDS
+from core.utils.normalized_text import NormalizedText
 from core.utils.result import Result, Ok, Err
+from core.utils.unicode_scripts import has_mixed_script_word
+
+
+class KeywordFileParser:
+    """
+    Streams (keyword, match mode) pairs out of an uploaded file: one per line, or the first
+    column of a CSV, with the same mode markers as typed keywords. Blank lines are skipped;
+    lines with several words are rejected like in the one-word form.
+    """
+
+    __slots__ = ("parsed", "invalid", "repeated")
+
+    def __init__(self) -> None:
+        self.parsed = 0
+        self.invalid = 0
+        self.repeated = 0
+
+    def parse(self, lines: Iterable[str], is_csv: bool = False) -> Iterator[tuple[str, MatchMode]]:
+        rows = (row[0] if row else "" for row in csv.reader(lines)) if is_csv else lines
+        seen = set()
+        for row in rows:
+            keyword = row.strip()
+            if not keyword:
+                continue
+            if len(keyword.split()) > 1:
+                self.invalid += 1
+                continue
+            keyword, mode = parse_keyword(keyword)
+            if keyword in seen:
+                self.repeated += 1
+                continue
+            seen.add(keyword)
+            self.parsed += 1
+            yield keyword, mode
 
 
 async def get_telegram_entity(
@@ -32,72 +74,90 @@ async def get_telegram_entity(
         logging.info(f"Error getting group entity: {e}")
 
 
-async def join_group(client, channel_entity):
-    try:
-        await client(JoinChannelRequest(channel_entity))
-        logging.info(f"Successfully joined {channel_entity}")
-    except Exception as e:
-        logging.info(f"Error joining {channel_entity}: {e}")
-
-
-async def join_group_via_link(client, chat_hash: str):
-    try:
-        await client(ImportChatInviteRequest(chat_hash))
-        logging.info(f"Successfully joined group via link https://t.me/+{chat_hash}")
-    except Exception as e:
-        logging.info(f"Error joining group via link https://t.me/+{chat_hash}: {e}")
-
+async def join_group(client, channel_entity) -> bool:
+    while True:
+        try:
+            await client(JoinChannelRequest(channel_entity))
+            logging.info(f"Successfully joined {channel_entity}")
+            return True
+        except FloodWaitError as e:
+            logging.info(f"Flood wait for {e.seconds}s before joining {channel_entity}")
+            await asyncio.sleep(e.seconds)
+        except Exception as e:
+            logging.info(f"Error joining {channel_entity}: {e}")
+            return False
 
-def regex_matches(target_word: str, text: str) -> bool:
-    pattern = f"\\b{target_word}.*"
-    match = re.findall(pattern, text)
-    return bool(match)
 
+async def join_group_via_link(client, chat_hash: str) -> bool:
+    while True:
+        try:
+            await client(ImportChatInviteRequest(chat_hash))
+            logging.info(f"Successfully joined group via link https://t.me/+{chat_hash}")
+            return True
+        except UserAlreadyParticipantError:
+            return True
+        except FloodWaitError as e:
+            logging.info(f"Flood wait for {e.seconds}s before joining https://t.me/+{chat_hash}")
+            await asyncio.sleep(e.seconds)
+        except Exception as e:
+            logging.info(f"Error joining group via link https://t.me/+{chat_hash}: {e}")
+            return False
 
-def contains_keyword(text: str, words: Sequence[str]) -> str | None:
-    lower_text = text.lower()
-    for word in words:
-        assert len(word) > 0
-        if word[0] == '|' and regex_matches(word[1:], lower_text):
-            return word[1:]
-        if word.lower() in lower_text:
-            return word
-    return None
 
+async def leave_group(client, entity) -> None:
+    try:
+        await client.delete_dialog(entity)
+        logging.info(f"Left {entity.id}, another session owns it")
+    except Exception as e:
+        logging.info(f"Error leaving {entity.id}: {e}")
 
-def get_alphabet(char: str):
-    assert len(char) == 1
-    return unicodedata.name(char).split()[0]
 
+def invite_hash(link: str) -> str | None:
+    """
+    The hash of an invite link, "https://t.me/+AbC" -> "AbC"; None for other links.
+    """
+    if 't.me/+' not in link:
+        return None
+    return link.split('/')[-1][1:] or None
 
-def detect_spam_evading(text: str) -> bool:
-    in_word = False
-    alphabet = None
-    for i, c in enumerate(text):
-        if not c.isalpha():
-            in_word = False
-            continue
 
-        if in_word is False:
-            in_word = True
-            alphabet = get_alphabet(c)
-            continue
+def contains_keyword(
+        text: str | NormalizedText, words: Sequence[KeywordEntry] | KeywordMatcher | MatcherChain
+) -> str | None:
+    if not isinstance(words, (KeywordMatcher, MatcherChain)):
+        words = KeywordMatcher(words)
+    return words.find(text)
 
-        if alphabet != get_alphabet(c):
-            return True
 
-    return False
+def detect_spam_evading(text: str | NormalizedText) -> bool:
+    return has_mixed_script_word(NormalizedText.of(text).scripts)
 
 
-def text_matches(text: str, keywords: Sequence[str], minus_words: Sequence[str]) -> Result[str, IgnoreReason]:
-    keyword = contains_keyword(text, keywords)
+def text_matches(
+        text: str | NormalizedText,
+        keywords: Sequence[KeywordEntry] | KeywordMatcher | MatcherChain,
+        minus_words: Sequence[KeywordEntry] | KeywordMatcher | MatcherChain,
+        homoglyphs: HomoglyphPolicy = HomoglyphPolicy.DROP,
+) -> Result[str, IgnoreReason]:
+    """
+    Matching runs on the canonicalized text, so look-alike letters from another script
+    don't hide a keyword, and on the text as written, so canonicalization doesn't hide one
+    either; `homoglyphs` decides whether a match in a mixed-script message is dropped.
+    FLAG and MATCH both return it, FLAG is marked when the notification is rendered.
+    """
+    message = NormalizedText.of(text)
+    keyword = contains_keyword(message, keywords)
+    if keyword is None and message.canonicalized:
+        keyword = contains_keyword(message.as_written(), keywords)
     if keyword is None:
         return Err(IgnoreReason.NO_MATCH)
 
-    if detect_spam_evading(text):
+    if homoglyphs is HomoglyphPolicy.DROP and detect_spam_evading(message):
         return Err(IgnoreReason.SPAM_EVADING_MATCH)
 
-    minus_word = contains_keyword(text, minus_words)
+    minus_word = contains_keyword(message, minus_words)
+    if minus_word is None and message.canonicalized:
+        minus_word = contains_keyword(message.as_written(), minus_words)
     if minus_word is not None:
         logging.info(f"Filtered out by minus-word: {minus_word}")
         return Err(IgnoreReason.MINUS_WORD_MATCH)
@@ -105,18 +165,26 @@ def text_matches(text: str, keywords: Sequence[str], minus_words: Sequence[str])
     return Ok(keyword)
 
 
-async def prepare_text_when_match(event, groups: dict[int, Group], keyword: str) -> str:
+async def prepare_text_when_match(
+        event,
+        groups: dict[int, Group],
+        keyword: str,
+        sender_cache: SenderCache,
+        homoglyphs: HomoglyphPolicy = HomoglyphPolicy.DROP,
+) -> str:
     chat_title = groups[event.chat_id].title
-    sender = await event.get_sender()
+    with STAGE_SECONDS.time("sender"):
+        sender = await sender_cache.get(event)
     event_text = event.text
     chat_name = groups[event.chat_id].link
     event_id = event.message.id
-    fullname = sender.first_name + " " + sender.last_name if sender.last_name else sender.first_name
-    if sender.username:
+    if sender is None:
+        text = text_without_sender.format(chat_title, keyword, event_text, chat_name, event_id)
+    elif sender.username:
         text = text_with_username.format(
             chat_title,
             keyword,
-            fullname,
+            sender.fullname,
             sender.username,
             event_text,
             chat_name,
@@ -124,30 +192,79 @@ async def prepare_text_when_match(event, groups: dict[int, Group], keyword: str)
         )
     else:
         text = text_without_username.format(
-            chat_title, keyword, fullname, event_text, chat_name, event_id
+            chat_title, keyword, sender.fullname, event_text, chat_name, event_id
         )
+    if homoglyphs is HomoglyphPolicy.FLAG and detect_spam_evading(event_text):
+        text = mixed_scripts_warning + text
     return text
 
 
-def get_active_groups_list(active_groups: dict[int, Group]) -> str:
+def get_active_groups_list(active_groups: Sequence[Group], start: int = 1) -> str:
     text: str = ""
-    for i, group in enumerate(active_groups, start=1):
-        created_at = arrow.get(active_groups[group].created_at)
+    for i, group in enumerate(active_groups, start=start):
+        created_at = arrow.get(group.created_at)
         text += groups_list.format(
-            i, active_groups[group].title, created_at.humanize(locale="ru")
+            i, group.title, created_at.humanize(locale="ru")
         )
     if len(text) == 0:
         text = no_groups_yet
     return text
 
 
-def format_keywords(keywords: dict[int, Word]) -> str:
+def format_keywords(keywords: Sequence[Word], start: int = 1) -> str:
     text: str = ""
-    for i, keyword in enumerate(keywords, start=1):
-        created_at = arrow.get(keywords[keyword].created_at)
+    for i, keyword in enumerate(keywords, start=start):
+        created_at = arrow.get(keyword.created_at)
         text += keywords_list.format(
-            i, keywords[keyword].keyword, created_at.humanize(locale="ru")
+            i, keyword_label(keyword.keyword, keyword.match_mode), created_at.humanize(locale="ru")
         )
     if len(text) == 0:
         text = no_keywords_yet
     return text
+
+
+def parse_backfill_args(args: str | None, now: datetime | None = None) -> tuple[int | None, datetime | None, str | None]:
+    """
+    "500" is the last 500 messages, "3d" the last three days, optionally followed by the group;
+    returns (limit, since in naive UTC, group). Raises ValueError on anything else.
+    """
+    parts = (args or "").split()
+    if not 1 <= len(parts) <= 2:
+        raise ValueError(args)
+    bound, group = parts[0].lower(), parts[1] if len(parts) == 2 else None
+    if bound.endswith("d") and bound[:-1].isdigit() and int(bound[:-1]) > 0:
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        return None, now - timedelta(days=int(bound[:-1])), group
+    if bound.isdigit() and int(bound) > 0:
+        return int(bound), None, group
+    raise ValueError(args)
+
+
+def _link_name(link: str) -> str:
+    return link.removeprefix("https://").removeprefix("t.me/").lstrip("@").casefold()
+
+
+def find_group(groups: dict[int, Group], query: str) -> Group | None:
+    """
+    A monitored group by telegram id, or by link or username as it was added.
+    """
+    if query.lstrip("-").isdigit():
+        return groups.get(int(query))
+    name = _link_name(query)
+    return next((group for group in groups.values() if _link_name(group.link) == name), None)
+
+
+def format_stats(components: dict[str, dict[str, float]]) -> str:
+    text = "<b>Стадии</b> (кол-во · p50 · p99, мс)\n"
+    for stage in STAGE_SECONDS.series:
+        p50 = STAGE_SECONDS.quantile(stage, 0.5) * 1000
+        p99 = STAGE_SECONDS.quantile(stage, 0.99) * 1000
+        text += f"{stage}: {STAGE_SECONDS.count(stage)} · {p50:.2f} · {p99:.2f}\n"
+    text += "\n<b>Сообщения</b>\n"
+    for result, count in MESSAGES.values.items():
+        text += f"{result}: {count:.0f}\n"
+    for name, stats in components.items():
+        text += f"\n<b>{name}</b>\n"
+        for key, value in stats.items():
+            text += f"{key}: {round(value, 3)}\n"
+    return text
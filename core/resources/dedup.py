@@ -0,0 +1,95 @@
+import re
+from collections import OrderedDict
+from time import monotonic
+from typing import Awaitable, Callable
+
+from core.resources.notifier import Notification, NotificationDispatcher
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_for_dedup(text: str) -> str:
+    """
+    Reduce a message to its words, so reposts that differ only in case,
+    punctuation, emoji or spacing are treated as the same text.
+    """
+    return " ".join(_WORD.findall(text.casefold()))
+
+
+class DuplicateFilter:
+    """
+    Remembers the notification created for each normalized text for `window` seconds,
+    keeping at most `max_entries` of them.
+    """
+
+    def __init__(self, window: float = 3600, max_entries: int = 10_000) -> None:
+        self.window = window
+        self.max_entries = max_entries
+        self.entries: OrderedDict[int, tuple[float, str, Notification]] = OrderedDict()
+        self.collapsed = 0
+        self.suppressed = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self.entries), "collapsed": self.collapsed, "suppressed": self.suppressed}
+
+    def _expire(self, now: float) -> None:
+        while self.entries:
+            seen_at, _, _ = next(iter(self.entries.values()))
+            if now - seen_at < self.window and len(self.entries) < self.max_entries:
+                return
+            self.entries.popitem(last=False)
+
+    def check(self, text: str, group: str) -> Notification | None:
+        """
+        Return a fresh notification to fill in and send, or None if this text was already
+        notified within the window; then the group is added to the earlier notification.
+        The text is recorded right away, so reposts arriving while it is rendered collapse
+        into it; call forget if it is not sent after all.
+        """
+        now = monotonic()
+        self._expire(now)
+        key = hash(normalize_for_dedup(text))
+        entry = self.entries.get(key)
+        if entry is not None:
+            _, origin, notification = entry
+            if group != origin and notification.add_group(group):
+                self.collapsed += 1
+            else:
+                self.suppressed += 1
+            return None
+        notification = Notification()
+        self.entries[key] = (now, group, notification)
+        return notification
+
+    def forget(self, text: str, notification: Notification) -> None:
+        """
+        Drop the record of a notification that was not queued, so the next repost is notified.
+        """
+        key = hash(normalize_for_dedup(text))
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] is notification:
+            del self.entries[key]
+
+
+async def notify_once(
+    dedup: DuplicateFilter,
+    notifier: NotificationDispatcher,
+    text: str,
+    group: str,
+    render: Callable[[], Awaitable[str]],
+) -> bool:
+    """
+    Render and queue a notification for `text` unless it is a repost; False if it was not queued.
+    A notification that fails to render or is dropped by a full queue is not remembered.
+    """
+    notification = dedup.check(text, group)
+    if notification is None:
+        return False
+    queued = False
+    try:
+        notification.text = await render()
+        queued = notifier.submit(notification)
+    finally:
+        if not queued:
+            dedup.forget(text, notification)
+    return queued
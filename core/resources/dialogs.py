@@ -0,0 +1,35 @@
+import logging
+
+from telethon import TelegramClient
+
+from core.database.crud import delete_dialogs, get_dialog_ids, get_dialogs_watermark, save_dialogs
+from core.database.database_connector import DatabaseConnector
+
+
+async def fetch_dialog_ids(
+        db_connector: DatabaseConnector, shard: str, client: TelegramClient, full: bool = False
+) -> set[int]:
+    """
+    The chats the session is in. Dialogs are listed newest first, so only those active
+    since the last stored message date are fetched; everything older is already in the
+    dialogs table.
+
+    That misses chats the session was removed from, so a `full` scan lists every dialog and
+    forgets the stored ones that are gone.
+    """
+    async with db_connector.session_factory.begin() as session:
+        watermark = None if full else await get_dialogs_watermark(shard, session)
+        changed = {}
+        async for dialog in client.iter_dialogs():
+            date = dialog.date.replace(tzinfo=None) if dialog.date else None
+            if watermark and date and date <= watermark and not dialog.pinned:
+                break
+            changed[dialog.id] = date
+        if full:
+            gone = await get_dialog_ids(shard, session) - changed.keys()
+            await delete_dialogs(shard, gone, session)
+            logging.info(f"{shard}: rescanned {len(changed)} dialogs, {len(gone)} gone")
+        else:
+            logging.info(f"{shard}: fetched {len(changed)} changed dialogs since {watermark}")
+        await save_dialogs(shard, changed, session)
+        return await get_dialog_ids(shard, session)
@@ -12,9 +12,56 @@ class Action(Enum):
     DELETE_PRE = "delete_pre"
     DELETE = "delete"
     BACK = "back"
+    PREV = "prev"
+    NEXT = "next"
+    SCOPE_PRE = "scope_pre"
+    SCOPE = "scope"
+    SCOPE_TOGGLE = "toggle"
+
+
+class ListView(Enum):
+    MAIN = "main"
+    DELETE = "delete"
+    SCOPE = "scope"
 
 
 class IgnoreReason(Enum):
     NO_MATCH = auto()
     MINUS_WORD_MATCH = auto()
     SPAM_EVADING_MATCH = auto()
+
+
+class MatchMode(Enum):
+    SUBSTRING = "substring"
+    WORD = "word"
+    PREFIX = "prefix"
+    STEM = "stem"
+
+
+class OverflowPolicy(Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    SHED = "shed"
+
+
+class HomoglyphPolicy(Enum):
+    FLAG = "flag"
+    MATCH = "match"
+    DROP = "drop"
+
+
+class Role(Enum):
+    ALL = "all"
+    SPLIT = "split"
+    BROKER = "broker"
+    INGEST = "ingest"
+    MATCHER = "matcher"
+    BOT = "bot"
+    BACKFILL = "backfill"
+
+
+class Topic(Enum):
+    MESSAGES = "messages"
+    RENDER = "render"
+    NOTIFY = "notify"
+    RELOAD = "reload"
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable
+
+from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+
+from core.database.crud import get_last_seen, save_last_seen
+from core.database.database_connector import DatabaseConnector
+from core.resources.telethon_events import RemoteMessage
+
+MessageHandler = Callable[[object], Awaitable[None]]
+
+
+class GapRecovery:
+    """
+    Remembers the newest message processed per group and replays what was missed while a
+    session was down: on startup and whenever the client comes back after a disconnect.
+
+    Live messages of a session wait while its gap is replayed, and every message, live or
+    replayed, is processed only if its id is above the group's last seen one, so a message
+    fetched by both paths is handled once. Last seen ids are kept in memory and written with
+    one batched upsert every flush_interval seconds, however many messages arrived.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseConnector,
+        on_message: MessageHandler,
+        concurrency: int = 4,
+        max_messages: int = 1000,
+        flush_interval: float = 5.0,
+        check_interval: float = 5.0,
+    ) -> None:
+        self.db = db
+        self.on_message = on_message
+        self.concurrency = concurrency
+        self.max_messages = max_messages
+        self.flush_interval = flush_interval
+        self.check_interval = check_interval
+        self.last_seen: defaultdict[str, dict[int, int]] = defaultdict(dict)
+        self.dirty: defaultdict[str, dict[int, int]] = defaultdict(dict)
+        self.recoveries = 0
+        self.replayed = 0
+        self.duplicates = 0
+        self.truncated = 0
+        self.written = 0
+        self._ready: defaultdict[str, asyncio.Event] = defaultdict(asyncio.Event)
+        self._lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task] = []
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "recoveries": self.recoveries,
+            "replayed": self.replayed,
+            "duplicates": self.duplicates,
+            "truncated": self.truncated,
+            "pending_writes": sum(len(chats) for chats in self.dirty.values()),
+            "written": self.written,
+        }
+
+    def seen(self, shard: str, chat_id: int, message_id: int) -> bool:
+        """
+        Record a message as processed; False if it, or a newer one, already was.
+        """
+        last_seen = self.last_seen[shard]
+        if message_id <= last_seen.get(chat_id, 0):
+            self.duplicates += 1
+            return False
+        last_seen[chat_id] = self.dirty[shard][chat_id] = message_id
+        return True
+
+    async def handle(self, shard: str, event) -> None:
+        """
+        Event handler for live messages of `shard`.
+        """
+        await self._ready[shard].wait()
+        if self.seen(shard, event.chat_id, event.id):
+            await self.on_message(event)
+
+    async def load(self, shard: str) -> None:
+        async with self.db.session_factory() as session:
+            self.last_seen[shard].update(await get_last_seen(shard, session))
+
+    async def _fetch(self, client: TelegramClient, chat_id: int, min_id: int) -> list:
+        while True:
+            try:
+                return [message async for message in client.iter_messages(chat_id, min_id=min_id, limit=self.max_messages)]
+            except FloodWaitError as e:
+                logging.info(f"Flood wait for {e.seconds}s while fetching missed messages of {chat_id}")
+                await asyncio.sleep(e.seconds)
+
+    async def _recover_group(self, shard: str, client: TelegramClient, chat_id: int) -> None:
+        min_id = self.last_seen[shard].get(chat_id)
+        if min_id is None:
+            # Never seen: there is no known point to recover from.
+            return
+        messages = await self._fetch(client, chat_id, min_id)
+        if len(messages) == self.max_messages:
+            self.truncated += 1
+            logging.warning(f"{shard}: more than {self.max_messages} missed messages in {chat_id}, replaying the newest")
+        for message in reversed(messages):
+            if not self.seen(shard, chat_id, message.id) or message.out or not message.message:
+                continue
+            self.replayed += 1
+            await self.on_message(
+                RemoteMessage(chat_id, message.id, message.sender_id, message.message, client, message.sender)
+            )
+
+    async def recover(self, shard: str, client: TelegramClient, group_ids: set[int]) -> None:
+        """
+        Replay the messages missed in `group_ids`, holding the live ones of `shard` meanwhile.
+        """
+        ready = self._ready[shard]
+        ready.clear()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def recover_group(chat_id: int):
+            async with semaphore:
+                try:
+                    await self._recover_group(shard, client, chat_id)
+                except Exception:
+                    logging.exception(f"{shard}: failed to recover missed messages of {chat_id}")
+
+        try:
+            before = self.replayed
+            await asyncio.gather(*(recover_group(chat_id) for chat_id in group_ids))
+            self.recoveries += 1
+            logging.info(f"{shard}: replayed {self.replayed - before} missed messages")
+        finally:
+            ready.set()
+
+    @staticmethod
+    def _reconnected(client: TelegramClient) -> asyncio.Event:
+        """
+        An event set each time Telethon reconnects the client on its own.
+
+        Telethon runs its reconnect callback after every automatic reconnect, however short
+        the disconnect was; the callback is chained, so its own handling still runs.
+        """
+        reconnected = asyncio.Event()
+        sender = client._sender
+        callback = sender._auto_reconnect_callback
+
+        async def on_reconnect():
+            reconnected.set()
+            if callback:
+                await callback()
+
+        sender._auto_reconnect_callback = on_reconnect
+        return reconnected
+
+    async def watch(self, shard: str, client: TelegramClient, group_ids: Callable[[], set[int]]) -> None:
+        """
+        Recover once the session is started, then again each time it reconnects.
+
+        Reconnects are taken from Telethon's reconnect callback; the connection is also
+        checked every check_interval seconds for a client connected again by other means.
+        """
+        reconnected = self._reconnected(client)
+        try:
+            await self.load(shard)
+        except Exception:
+            logging.exception(f"{shard}: failed to load last seen messages, nothing to recover")
+        await self.recover(shard, client, group_ids())
+        connected = True
+        while True:
+            try:
+                await asyncio.wait_for(reconnected.wait(), self.check_interval)
+            except asyncio.TimeoutError:
+                was_connected, connected = connected, client.is_connected()
+                if was_connected or not connected:
+                    continue
+            reconnected.clear()
+            connected = True
+            logging.info(f"{shard}: reconnected, recovering missed messages")
+            await self.recover(shard, client, group_ids())
+
+    async def flush(self) -> None:
+        async with self._lock:
+            for shard in list(self.dirty):
+                last_seen, self.dirty[shard] = self.dirty[shard], {}
+                if not last_seen:
+                    continue
+                try:
+                    async with self.db.session_factory.begin() as session:
+                        await save_last_seen(shard, last_seen, session)
+                    self.written += len(last_seen)
+                except Exception:
+                    for chat_id, message_id in last_seen.items():
+                        pending = self.dirty[shard]
+                        pending[chat_id] = max(message_id, pending.get(chat_id, 0))
+                    logging.exception(f"Failed to save last seen messages of {shard}")
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self, shards: dict[str, TelegramClient], group_ids: Callable[[str], set[int]]) -> None:
+        self._tasks = [asyncio.create_task(self._flush_periodically())]
+        self._tasks += [
+            asyncio.create_task(self.watch(name, client, lambda name=name: group_ids(name)))
+            for name, client in shards.items()
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
@@ -1,40 +1,81 @@
 import logging
+import os
+import tempfile
 
 from aiogram import F, Router, types
 from aiogram.exceptions import TelegramBadRequest
-from aiogram.filters import CommandStart
+from aiogram.filters import Command, CommandObject, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State
+from aiogram.types import FSInputFile, InlineKeyboardMarkup
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from telethon import TelegramClient
 from telethon.tl.functions.messages import CheckChatInviteRequest
+from telethon.utils import get_peer_id
 from telethon.tl.types import ChatInviteAlready, ChatInvitePeek, ChatInvite
 
+from core.config import settings
+from core.database.database_connector import DatabaseConnector
 from core.database.crud import (
+    add_group,
+    add_keyword,
+    add_keywords,
     delete_keyword,
-    get_active_groups_dict,
+    get_active_groups_page,
     get_group,
-    get_keywords_dict,
+    get_keywords_page,
+    get_word,
+    get_word_scope_ids,
+    iter_keywords,
+    Page,
     toggle_group_activeness,
+    toggle_word_scope,
 )
-from core.database.models import Group, Word
+from core.resources.backfill import Backfill
 from core.resources.callback_data import ActionDataFactory
 from core.resources.controllers import (
     get_active_groups_list,
     format_keywords,
+    find_group,
+    format_stats,
     get_telegram_entity,
+    invite_hash,
     join_group, join_group_via_link,
+    leave_group,
+    KeywordFileParser,
+    parse_backfill_args,
 )
-from core.resources.enums import EntityType, Action
+from core.resources.dedup import DuplicateFilter
+from core.resources.enums import EntityType, Action, ListView
 from core.resources.keyboards import (
     get_delete_groups_buttons,
     get_delete_keywords_buttons,
     get_main_keyboard,
+    get_scope_groups_buttons,
+    get_scope_keywords_buttons,
     start_keyboard,
     StartKeyboardText,
 )
-from core.resources.replies import ADD_TEXT_REPLY, WORD_LIST_REPLY
+from core.resources.matcher import keyword_label, parse_keyword
+from core.resources.matching_pool import MatchingPool
+from core.resources.notifier import NotificationDispatcher
+from core.resources.replies import (
+    ADD_TEXT_REPLY,
+    EXPORT_FILE_NAME,
+    WORD_LIST_REPLY,
+    backfill_busy,
+    backfill_group_not_found,
+    backfill_started,
+    backfill_summary,
+    backfill_unavailable,
+    backfill_usage,
+    import_summary,
+    import_wrong_format,
+    scope_header,
+)
+from core.resources.sender_cache import SenderCache
+from core.resources.shards import ShardManager
 from core.resources.states import States
 
 
@@ -49,6 +90,86 @@ def entity_to_state(entity: EntityType) -> State:
     raise ValueError(f"Unexpected entity: {entity}")
 
 
+async def list_screen(
+        session: AsyncSession,
+        entity: EntityType,
+        after: int = 0,
+        before: int | None = None,
+        page: int = 0,
+        view: ListView = ListView.MAIN,
+) -> tuple[str, InlineKeyboardMarkup]:
+    """
+    Text and keyboard for one page of the groups or keywords list.
+    """
+    size = settings.admin_page_size
+    match entity:
+        case EntityType.GROUP:
+            entities = await get_active_groups_page(session, after, before, size)
+        case EntityType.WORD | EntityType.MINUS_WORD:
+            entities = await get_keywords_page(session, entity, after, before, size)
+        case _:
+            raise ValueError(f"Unexpected entity: {entity}")
+    page = page_number(entities, after, page)
+    start = page * size + 1
+    match entity:
+        case EntityType.GROUP:
+            text = "📮 Список групп: \n\n" + get_active_groups_list(entities.items, start)
+        case _:
+            text = WORD_LIST_REPLY[entity] + format_keywords(entities.items, start)
+    match view:
+        case ListView.DELETE:
+            keyboard = delete_keyboard(entity, entities, page)
+        case ListView.SCOPE:
+            keyboard = get_scope_keywords_buttons(entity, entities, page)
+        case _:
+            keyboard = get_main_keyboard(mode=entity, entities=entities, page=page)
+    return text, keyboard
+
+
+async def scope_screen(
+        session: AsyncSession,
+        word_id: int,
+        after: int = 0,
+        before: int | None = None,
+        page: int = 0,
+        back_cursor: int = 0,
+        back_page: int = 0,
+) -> tuple[str, InlineKeyboardMarkup]:
+    """
+    Text and keyboard for picking the groups a keyword is restricted to; "back" returns to the
+    keyword page at back_cursor.
+    """
+    word = await get_word(word_id, session)
+    if word is None:
+        return await list_screen(session, EntityType.WORD)
+    groups = await get_active_groups_page(session, after, before, settings.admin_page_size)
+    scope_ids = await get_word_scope_ids(word_id, session)
+    page = page_number(groups, after, page)
+    keyboard = get_scope_groups_buttons(word, groups, scope_ids, page, back_cursor, back_page)
+    return scope_header.format(word.keyword), keyboard
+
+
+def page_number(entities: Page, after: int, page: int) -> int:
+    if after and len(entities) and entities.first_id <= after:
+        # The page emptied out and the one before it was returned instead.
+        return max(page - 1, 0)
+    return page
+
+
+async def edit_screen(callback: types.CallbackQuery, text: str, keyboard: InlineKeyboardMarkup) -> None:
+    try:
+        await callback.message.edit_text(text=text, reply_markup=keyboard)
+    except TelegramBadRequest:
+        # Pressed twice: the screen is already shown.
+        pass
+
+
+def delete_keyboard(entity: EntityType, entities: Page, page: int) -> InlineKeyboardMarkup:
+    if entity is EntityType.GROUP:
+        return get_delete_groups_buttons(entities, page)
+    return get_delete_keywords_buttons(entity, entities, page)
+
+
 router = Router()
 
 
@@ -60,15 +181,31 @@ async def start_handler(message: types.Message) -> None:
     )
 
 
+@router.message(Command("stats"), F.from_user.id == settings.ADMIN_ID)
+async def stats_handler(
+        message: types.Message,
+        notifier: NotificationDispatcher,
+        dedup: DuplicateFilter,
+        sender_cache: SenderCache | None = None,
+        matching_pool: MatchingPool | None = None,
+        backfill: Backfill | None = None,
+) -> None:
+    components = {"notifier": notifier.stats(), "dedup": dedup.stats()}
+    if sender_cache is not None:
+        components["sender_cache"] = sender_cache.stats()
+    if matching_pool is not None:
+        components["matching_pool"] = matching_pool.stats()
+    if backfill is not None:
+        components["backfill"] = backfill.stats()
+    await message.answer(text=format_stats(components))
+
+
 @router.message(F.text == StartKeyboardText.GROUPS)
 async def manage_groups(
         message: types.Message, session: AsyncSession, state: FSMContext
 ) -> None:
-    active_groups = await get_active_groups_dict(session=session)
-    msg = await message.answer(
-        text="📮 Список групп: \n\n" + get_active_groups_list(active_groups),
-        reply_markup=get_main_keyboard(mode=EntityType.GROUP, entities=active_groups),
-    )
+    text, keyboard = await list_screen(session, EntityType.GROUP)
+    msg = await message.answer(text=text, reply_markup=keyboard)
     await state.update_data(msg_id=msg.message_id)
 
 
@@ -84,11 +221,8 @@ async def manage_words(
         else EntityType.WORD
     )
     logging.info(f"Processing as {entity}")
-    keywords = await get_keywords_dict(session, entity)
-    msg = await message.answer(
-        text=WORD_LIST_REPLY[entity] + format_keywords(keywords=keywords),
-        reply_markup=get_main_keyboard(mode=entity, entities=keywords),
-    )
+    text, keyboard = await list_screen(session, entity)
+    msg = await message.answer(text=text, reply_markup=keyboard)
     await state.update_data(msg_id=msg.message_id)
 
 
@@ -108,19 +242,10 @@ async def delete_callback_processing(
         session: AsyncSession,
         callback_data: ActionDataFactory,
 ) -> None:
-    match callback_data.entity:
-        case EntityType.GROUP:
-            groups = await get_active_groups_dict(session)
-            await callback.message.edit_reply_markup(
-                reply_markup=get_delete_groups_buttons(groups)
-            )
-        case EntityType.WORD | EntityType.MINUS_WORD:
-            keywords = await get_keywords_dict(session, callback_data.entity)
-            await callback.message.edit_reply_markup(
-                reply_markup=get_delete_keywords_buttons(callback_data.entity, keywords=keywords)
-            )
-        case _:
-            raise ValueError(f"Unexpected entity: {callback_data.entity}")
+    _, keyboard = await list_screen(
+        session, callback_data.entity, after=callback_data.cursor, page=callback_data.page, view=ListView.DELETE
+    )
+    await callback.message.edit_reply_markup(reply_markup=keyboard)
     await callback.answer()
 
 
@@ -130,23 +255,96 @@ async def back_callback_processing(
         session: AsyncSession,
         callback_data: ActionDataFactory,
 ) -> None:
-    match callback_data.entity:
-        case EntityType.GROUP:
-            active_groups = await get_active_groups_dict(session=session)
-            await callback.message.edit_reply_markup(
-                reply_markup=get_main_keyboard(
-                    mode=EntityType.GROUP, entities=active_groups
-                )
-            )
-        case EntityType.WORD | EntityType.MINUS_WORD:
-            keywords = await get_keywords_dict(session, callback_data.entity)
-            await callback.message.edit_reply_markup(
-                reply_markup=get_main_keyboard(
-                    mode=callback_data.entity, entities=keywords
-                )
-            )
-        case _:
-            raise ValueError(f"Unexpected entity: {callback_data.entity}")
+    text, keyboard = await list_screen(
+        session, callback_data.entity, after=callback_data.cursor, page=callback_data.page
+    )
+    await edit_screen(callback, text, keyboard)
+    await callback.answer()
+
+
+@router.callback_query(ActionDataFactory.filter(F.action.in_({Action.PREV, Action.NEXT})))
+async def page_callback_processing(
+        callback: types.CallbackQuery,
+        state: FSMContext,
+        session: AsyncSession,
+        callback_data: ActionDataFactory,
+) -> None:
+    if callback_data.action is Action.NEXT:
+        after, before = callback_data.cursor, None
+    else:
+        after, before = 0, callback_data.cursor
+    if callback_data.view is ListView.SCOPE and callback_data.entity is EntityType.GROUP:
+        data = await state.get_data()
+        text, keyboard = await scope_screen(
+            session,
+            callback_data.id,
+            after,
+            before,
+            callback_data.page,
+            data.get("scope_back_cursor", 0),
+            data.get("scope_back_page", 0),
+        )
+    else:
+        text, keyboard = await list_screen(
+            session,
+            callback_data.entity,
+            after=after,
+            before=before,
+            page=callback_data.page,
+            view=callback_data.view,
+        )
+    await edit_screen(callback, text, keyboard)
+    await callback.answer()
+
+
+@router.callback_query(ActionDataFactory.filter(F.action == Action.SCOPE_PRE))
+async def scope_pre_callback_processing(
+        callback: types.CallbackQuery,
+        session: AsyncSession,
+        callback_data: ActionDataFactory,
+) -> None:
+    text, keyboard = await list_screen(
+        session, callback_data.entity, after=callback_data.cursor, page=callback_data.page, view=ListView.SCOPE
+    )
+    await edit_screen(callback, text, keyboard)
+    await callback.answer()
+
+
+@router.callback_query(ActionDataFactory.filter(F.action == Action.SCOPE))
+async def scope_callback_processing(
+        callback: types.CallbackQuery,
+        state: FSMContext,
+        session: AsyncSession,
+        callback_data: ActionDataFactory,
+) -> None:
+    # The keyword page to return to is remembered here, as it doesn't fit in the group
+    # list's callback data next to the group list's own position.
+    await state.update_data(scope_back_cursor=callback_data.cursor, scope_back_page=callback_data.page)
+    text, keyboard = await scope_screen(
+        session, callback_data.id, back_cursor=callback_data.cursor, back_page=callback_data.page
+    )
+    await edit_screen(callback, text, keyboard)
+    await callback.answer()
+
+
+@router.callback_query(ActionDataFactory.filter(F.action == Action.SCOPE_TOGGLE))
+async def scope_toggle_callback_processing(
+        callback: types.CallbackQuery,
+        state: FSMContext,
+        session: AsyncSession,
+        callback_data: ActionDataFactory,
+) -> None:
+    await toggle_word_scope(callback_data.id, callback_data.target, session)
+    data = await state.get_data()
+    text, keyboard = await scope_screen(
+        session,
+        callback_data.id,
+        after=callback_data.cursor,
+        page=callback_data.page,
+        back_cursor=data.get("scope_back_cursor", 0),
+        back_page=data.get("scope_back_page", 0),
+    )
+    await edit_screen(callback, text, keyboard)
     await callback.answer()
 
 
@@ -155,6 +353,7 @@ async def add_group_handler(
         message: types.Message,
         state: FSMContext,
         client: TelegramClient,
+        shards: ShardManager,
         session: AsyncSession,
 ) -> None:
     data = await state.get_data()
@@ -167,74 +366,76 @@ async def add_group_handler(
         pass
     user_input = message.text
 
-    if 't.me/+' in user_input:
-        link_hash = user_input.split('/')[-1][1:]
+    link_hash = invite_hash(user_input)
+    if link_hash:
         check = await client(CheckChatInviteRequest(link_hash))
         match check:
             case ChatInviteAlready():
                 logging.info(f"You are already member of group {user_input}. toggling activness...")
                 await toggle_group_activeness(check.chat.id, session=session)
-                active_groups = await get_active_groups_dict(session=session)
+                text, keyboard = await list_screen(session, EntityType.GROUP)
                 try:
                     msg = await message.bot.edit_message_text(
                         message_id=data["msg_id"],
                         chat_id=message.chat.id,
-                        text="📮 Список групп: \n\n" + get_active_groups_list(active_groups),
-                        reply_markup=get_main_keyboard(
-                            mode=EntityType.GROUP, entities=active_groups
-                        ),
+                        text=text,
+                        reply_markup=keyboard,
                     )
                     await state.update_data(msg_id=msg.message_id)
                 except TelegramBadRequest:
                     msg = await message.answer(
-                        text="📮 Список групп: \n\n" + get_active_groups_list(active_groups),
-                        reply_markup=get_main_keyboard(
-                            mode=EntityType.GROUP, entities=active_groups
-                        ),
+                        text=text,
+                        reply_markup=keyboard,
                     )
                     await state.update_data(msg_id=msg.message_id)
                     return
                 except KeyError:
                     msg = await message.answer(
-                        text="📮 Список групп: \n\n" + get_active_groups_list(active_groups),
-                        reply_markup=get_main_keyboard(
-                            mode=EntityType.GROUP, entities=active_groups
-                        ),
+                        text=text,
+                        reply_markup=keyboard,
                     )
                     await state.update_data(msg_id=msg.message_id)
                     return
             case ChatInvitePeek() | ChatInvite():
-                # logging.info(f"ChatInvite case: {check}")
-                await join_group_via_link(client=client, chat_hash=link_hash)
-                group = await get_telegram_entity(entity=user_input, client=client)
-                group_exist_in_db = await get_group(group_id=group.id, session=session)
+                # Only a peek carries the chat; otherwise it is resolved by joining for a moment.
+                chat = getattr(check, 'chat', None)
+                joined = False
+                if chat is None:
+                    joined = await join_group_via_link(client=client, chat_hash=link_hash)
+                    chat = await get_telegram_entity(entity=user_input, client=client)
+                if chat is None:
+                    await message.answer(text=f"Такой группы не существует.")
+                    return
+                telegram_id = get_peer_id(chat)
+                # The group is joined by the session that owns it; in split mode that session
+                # runs in an ingest process, which joins it on the reload published after commit.
+                owner = shards.local_client_for(telegram_id)
+                if owner is not None and not (owner is client and joined):
+                    await join_group_via_link(client=owner, chat_hash=link_hash)
+                if joined and owner is not client:
+                    await leave_group(client, chat)
+                group_exist_in_db = await get_group(group_id=telegram_id, session=session)
                 if not group_exist_in_db:
-                    new_group = Group(
-                        telegram_id=group.id * -1,
-                        link=f'https://t.me/c/{group.id}',
-                        # link=user_input,
-                        title=group.title,
+                    await add_group(
+                        telegram_id=telegram_id,
+                        link=f'https://t.me/+{link_hash}',
+                        title=chat.title,
+                        session=session,
                     )
-                    session.add(new_group)
-                    await session.flush()
                     await state.set_state()
-                    active_groups = await get_active_groups_dict(session=session)
+                    text, keyboard = await list_screen(session, EntityType.GROUP)
                     try:
                         msg = await message.bot.edit_message_text(
                             message_id=data["msg_id"],
                             chat_id=message.chat.id,
-                            text="📮 Список групп: \n\n" + get_active_groups_list(active_groups),
-                            reply_markup=get_main_keyboard(
-                                mode=EntityType.GROUP, entities=active_groups
-                            ),
+                            text=text,
+                            reply_markup=keyboard,
                         )
                         await state.update_data(msg_id=msg.message_id)
                     except KeyError:
                         msg = await message.answer(
-                            text="📮 Список групп: \n\n" + get_active_groups_list(active_groups),
-                            reply_markup=get_main_keyboard(
-                                mode=EntityType.GROUP, entities=active_groups
-                            ),
+                            text=text,
+                            reply_markup=keyboard,
                         )
                         await state.update_data(msg_id=msg.message_id)
                         return
@@ -252,45 +453,40 @@ async def add_group_handler(
                 user_input = user_input.replace('t.me/', 'https://t.me/')
             if not user_input.startswith('https://t.me/'):
                 user_input = 'https://t.me/' + user_input
-            new_group = Group(
+            new_group = await add_group(
                 telegram_id=int('-100' + str(group.id)),
                 link=user_input,
                 title=group.title,
+                session=session,
             )
-            session.add(new_group)
-            await session.flush()
             await state.set_state()
-            await join_group(client=client, channel_entity=new_group.telegram_id)
-            active_groups = await get_active_groups_dict(session=session)
+            owner = shards.local_client_for(new_group.telegram_id)
+            if owner is not None:
+                await join_group(client=owner, channel_entity=new_group.telegram_id)
+            text, keyboard = await list_screen(session, EntityType.GROUP)
             try:
                 msg = await message.bot.edit_message_text(
                     message_id=data["msg_id"],
                     chat_id=message.chat.id,
-                    text="📮 Список групп: \n\n" + get_active_groups_list(active_groups),
-                    reply_markup=get_main_keyboard(
-                        mode=EntityType.GROUP, entities=active_groups
-                    ),
+                    text=text,
+                    reply_markup=keyboard,
                 )
                 await state.update_data(msg_id=msg.message_id)
             except KeyError:
                 msg = await message.answer(
-                    text="📮 Список групп: \n\n" + get_active_groups_list(active_groups),
-                    reply_markup=get_main_keyboard(
-                        mode=EntityType.GROUP, entities=active_groups
-                    ),
+                    text=text,
+                    reply_markup=keyboard,
                 )
                 await state.update_data(msg_id=msg.message_id)
         else:
             await toggle_group_activeness(group_exist_in_db.telegram_id, session=session)
-            active_groups = await get_active_groups_dict(session=session)
+            text, keyboard = await list_screen(session, EntityType.GROUP)
             try:
                 msg = await message.bot.edit_message_text(
                     message_id=data["msg_id"],
                     chat_id=message.chat.id,
-                    text="📮 Список групп: \n\n" + get_active_groups_list(active_groups),
-                    reply_markup=get_main_keyboard(
-                        mode=EntityType.GROUP, entities=active_groups
-                    ),
+                    text=text,
+                    reply_markup=keyboard,
                 )
                 await state.update_data(msg_id=msg.message_id)
             except TelegramBadRequest:
@@ -298,15 +494,107 @@ async def add_group_handler(
 
             except KeyError:
                 msg = await message.answer(
-                    text="📮 Список групп: \n\n" + get_active_groups_list(active_groups),
-                    reply_markup=get_main_keyboard(
-                        mode=EntityType.GROUP, entities=active_groups
-                    ),
+                    text=text,
+                    reply_markup=keyboard,
                 )
                 await state.update_data(msg_id=msg.message_id)
             return
 
 
+@router.message(States.add_keyword, F.document)
+@router.message(States.add_minus_word, F.document)
+async def import_keywords_handler(
+        message: types.Message, state: FSMContext, session: AsyncSession
+) -> None:
+    fsm_state = await state.get_state()
+    entity = EntityType.WORD
+    if fsm_state == States.add_minus_word.state:
+        entity = EntityType.MINUS_WORD
+
+    file_name = (message.document.file_name or "").lower()
+    if not file_name.endswith((".txt", ".csv")):
+        await message.answer(text=import_wrong_format)
+        return
+    parser = KeywordFileParser()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "keywords")
+        await message.bot.download(message.document, destination=path)
+        with open(path, encoding="utf-8-sig", errors="replace", newline="") as file:
+            inserted = await add_keywords(parser.parse(file, is_csv=file_name.endswith(".csv")), entity, session)
+    logging.info(f"Imported {inserted} of {parser.parsed} keywords from {file_name}")
+    await state.set_state()
+    await message.answer(
+        text=import_summary.format(inserted, parser.parsed - inserted, parser.repeated, parser.invalid)
+    )
+
+    data = await state.get_data()
+    text, keyboard = await list_screen(session, entity)
+    try:
+        msg = await message.bot.edit_message_text(
+            message_id=data["msg_id"],
+            chat_id=message.chat.id,
+            text=text,
+            reply_markup=keyboard,
+        )
+    except (KeyError, TelegramBadRequest):
+        msg = await message.answer(text=text, reply_markup=keyboard)
+    await state.update_data(msg_id=msg.message_id)
+
+
+@router.message(Command("export"), F.from_user.id == settings.ADMIN_ID)
+async def export_keywords_handler(
+        message: types.Message, session: AsyncSession, command: CommandObject
+) -> None:
+    """
+    /export sends the keywords as a file, /export minus the minus-words.
+    """
+    entity = EntityType.MINUS_WORD if (command.args or "").strip() == "minus" else EntityType.WORD
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, EXPORT_FILE_NAME[entity])
+        with open(path, "w", encoding="utf-8") as file:
+            async for keyword, mode in iter_keywords(session, entity):
+                file.write(keyword_label(keyword, mode) + "\n")
+        await message.answer_document(FSInputFile(path))
+
+
+@router.message(Command("backfill"), F.from_user.id == settings.ADMIN_ID)
+async def backfill_handler(
+        message: types.Message,
+        command: CommandObject,
+        db: DatabaseConnector,
+        backfill: Backfill | None = None,
+) -> None:
+    """
+    /backfill 500 or /backfill 3d [group] replays recent history through the matcher.
+    """
+    if backfill is None:
+        await message.answer(text=backfill_unavailable)
+        return
+    try:
+        limit, since, query = parse_backfill_args(command.args)
+    except ValueError:
+        await message.answer(text=backfill_usage)
+        return
+    groups = db.snapshot.current.groups
+    group_ids = list(groups)
+    if query is not None:
+        group = find_group(groups, query)
+        if group is None:
+            await message.answer(text=backfill_group_not_found)
+            return
+        group_ids = [group.telegram_id]
+
+    async def report(stats: dict[str, int]):
+        await message.answer(
+            text=backfill_summary.format(stats["scanned"], stats["groups_done"], stats["groups_failed"])
+        )
+
+    if not backfill.start(group_ids, limit, since, on_done=report):
+        await message.answer(text=backfill_busy)
+        return
+    await message.answer(text=backfill_started.format(len(group_ids)))
+
+
 @router.message(States.add_keyword)
 @router.message(States.add_minus_word)
 async def add_keyword_handler(
@@ -329,15 +617,14 @@ async def add_keyword_handler(
         new_keyword = message.text
         if len(new_keyword.split()) > 1:
             raise ValueError()
-        keyword = Word(keyword=new_keyword, minus_word=entity is EntityType.MINUS_WORD)
-        session.add(keyword)
-        await session.flush()
-        keywords = await get_keywords_dict(session, entity)
+        keyword, mode = parse_keyword(new_keyword)
+        await add_keyword(keyword, entity, session, mode)
+        text, keyboard = await list_screen(session, entity)
         msg = await message.bot.edit_message_text(
             message_id=data["msg_id"],
             chat_id=message.chat.id,
-            text=WORD_LIST_REPLY[entity] + format_keywords(keywords=keywords),
-            reply_markup=get_main_keyboard(mode=entity, entities=keywords),
+            text=text,
+            reply_markup=keyboard,
         )
         await state.update_data(msg_id=msg.message_id)
         await state.set_state()
@@ -348,11 +635,8 @@ async def add_keyword_handler(
         await message.answer(text=f"Ошибка. Введено несколько слов.\n{message.text}")
         logging.error(e)
     except KeyError:
-        keywords = await get_keywords_dict(session, entity)
-        msg = await message.answer(
-            text=WORD_LIST_REPLY[entity] + format_keywords(keywords=keywords),
-            reply_markup=get_main_keyboard(mode=entity, entities=keywords),
-        )
+        text, keyboard = await list_screen(session, entity)
+        msg = await message.answer(text=text, reply_markup=keyboard)
         await state.update_data(msg_id=msg.message_id)
 
 
@@ -367,18 +651,14 @@ async def remove_callback_processing(
     match callback_data.entity:
         case EntityType.GROUP:
             await toggle_group_activeness(telegram_id=callback_data.id, session=session)
-            entities = await get_active_groups_dict(session=session)
-            text = "📮 Список групп: \n\n" + get_active_groups_list(entities)
         case EntityType.WORD | EntityType.MINUS_WORD:
             await delete_keyword(callback_data.id, session)
-            entities = await get_keywords_dict(session, callback_data.entity)
-            text = WORD_LIST_REPLY[callback_data.entity] + format_keywords(
-                keywords=entities
-            )
         case _:
             raise ValueError(f"Unexpected entity: {callback_data.entity}")
 
-    keyboard = get_main_keyboard(mode=callback_data.entity, entities=entities)
+    text, keyboard = await list_screen(
+        session, callback_data.entity, after=callback_data.cursor, page=callback_data.page
+    )
     message_id = await safe_send_message(text, callback, data, keyboard)
     await state.update_data(msg_id=message_id)
     await callback.answer()
@@ -5,8 +5,11 @@ from aiogram.types import (
     ReplyKeyboardMarkup,
 )
 
+from core.database.crud import Page
+from core.database.models import Word
 from core.resources.callback_data import ActionDataFactory
-from core.resources.enums import EntityType, Action
+from core.resources.enums import EntityType, Action, ListView
+from core.resources.matcher import keyword_label
 
 
 class StartKeyboardText:
@@ -26,46 +29,118 @@ start_keyboard = ReplyKeyboardMarkup(
 )
 
 
-def get_delete_keywords_buttons(word_type: EntityType, keywords: dict) -> InlineKeyboardMarkup:
+def get_navigation_row(
+        mode: EntityType,
+        entities: Page,
+        page: int,
+        view: ListView,
+        id: int = 0,
+) -> list[InlineKeyboardButton]:
+    row = []
+    if entities.has_prev and len(entities):
+        prev_data = ActionDataFactory(
+            action=Action.PREV, entity=mode, id=id, cursor=entities.first_id, page=page - 1, view=view
+        )
+        row.append(InlineKeyboardButton(text="⬅️", callback_data=prev_data.pack()))
+    if entities.has_next:
+        next_data = ActionDataFactory(
+            action=Action.NEXT, entity=mode, id=id, cursor=entities.last_id, page=page + 1, view=view
+        )
+        row.append(InlineKeyboardButton(text="➡️", callback_data=next_data.pack()))
+    return row
+
+
+def get_delete_keywords_buttons(word_type: EntityType, keywords: Page, page: int = 0) -> InlineKeyboardMarkup:
     buttons = []
-    for keyword in keywords:
+    for keyword in keywords.items:
         data = ActionDataFactory(
-            action=Action.DELETE, entity=word_type, id=keywords[keyword].id
+            action=Action.DELETE, entity=word_type, id=keyword.id, cursor=keywords.cursor, page=page
         )
         button = [
             InlineKeyboardButton(
-                text=f"❌ {keywords[keyword].keyword}", callback_data=data.pack()
+                text=f"❌ {keyword_label(keyword.keyword, keyword.match_mode)}", callback_data=data.pack()
             )
         ]
         buttons.append(button)
-    back_data = ActionDataFactory(action=Action.BACK, entity=word_type)
+    navigation = get_navigation_row(word_type, keywords, page, ListView.DELETE)
+    if navigation:
+        buttons.append(navigation)
+    back_data = ActionDataFactory(action=Action.BACK, entity=word_type, cursor=keywords.cursor, page=page)
     buttons.append(
         [InlineKeyboardButton(text="↩️ Назад", callback_data=back_data.pack())]
     )
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def get_delete_groups_buttons(groups: dict) -> InlineKeyboardMarkup:
+def get_delete_groups_buttons(groups: Page, page: int = 0) -> InlineKeyboardMarkup:
     buttons = []
-    for group_id, group in groups.items():
+    for group in groups.items:
         data = ActionDataFactory(
-            action=Action.DELETE, entity=EntityType.GROUP, id=group.telegram_id
+            action=Action.DELETE, entity=EntityType.GROUP, id=group.telegram_id, cursor=groups.cursor, page=page
         )
         button = [
             InlineKeyboardButton(text=f"❌ {group.title[:32]}", callback_data=data.pack())
         ]
         buttons.append(button)
-    back_data = ActionDataFactory(action=Action.BACK, entity=EntityType.GROUP)
+    navigation = get_navigation_row(EntityType.GROUP, groups, page, ListView.DELETE)
+    if navigation:
+        buttons.append(navigation)
+    back_data = ActionDataFactory(action=Action.BACK, entity=EntityType.GROUP, cursor=groups.cursor, page=page)
+    buttons.append(
+        [InlineKeyboardButton(text="↩️ Назад", callback_data=back_data.pack())]
+    )
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def get_scope_keywords_buttons(word_type: EntityType, keywords: Page, page: int = 0) -> InlineKeyboardMarkup:
+    buttons = []
+    for keyword in keywords.items:
+        data = ActionDataFactory(
+            action=Action.SCOPE, entity=word_type, id=keyword.id, cursor=keywords.cursor, page=page
+        )
+        label = keyword_label(keyword.keyword, keyword.match_mode)
+        buttons.append([InlineKeyboardButton(text=f"🎯 {label}", callback_data=data.pack())])
+    navigation = get_navigation_row(word_type, keywords, page, ListView.SCOPE)
+    if navigation:
+        buttons.append(navigation)
+    back_data = ActionDataFactory(action=Action.BACK, entity=word_type, cursor=keywords.cursor, page=page)
     buttons.append(
         [InlineKeyboardButton(text="↩️ Назад", callback_data=back_data.pack())]
     )
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def get_main_keyboard(mode: EntityType, entities: dict) -> InlineKeyboardMarkup:
+def get_scope_groups_buttons(
+        word: Word, groups: Page, scope_ids: set[int], page: int = 0, back_cursor: int = 0, back_page: int = 0
+) -> InlineKeyboardMarkup:
+    buttons = []
+    for group in groups.items:
+        data = ActionDataFactory(
+            action=Action.SCOPE_TOGGLE,
+            entity=EntityType.GROUP,
+            id=word.id,
+            cursor=groups.cursor,
+            page=page,
+            target=group.id,
+        )
+        mark = "✅" if group.id in scope_ids else "▫️"
+        buttons.append([InlineKeyboardButton(text=f"{mark} {group.title[:32]}", callback_data=data.pack())])
+    navigation = get_navigation_row(EntityType.GROUP, groups, page, ListView.SCOPE, id=word.id)
+    if navigation:
+        buttons.append(navigation)
+    word_type = EntityType.MINUS_WORD if word.minus_word else EntityType.WORD
+    back_data = ActionDataFactory(action=Action.SCOPE_PRE, entity=word_type, cursor=back_cursor, page=back_page)
+    buttons.append(
+        [InlineKeyboardButton(text="↩️ Назад", callback_data=back_data.pack())]
+    )
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def get_main_keyboard(mode: EntityType, entities: Page, page: int = 0) -> InlineKeyboardMarkup:
     buttons = []
     add_btn_data = ActionDataFactory(action=Action.ADD, entity=mode)
-    del_btn_data = ActionDataFactory(action=Action.DELETE_PRE, entity=mode)
+    del_btn_data = ActionDataFactory(action=Action.DELETE_PRE, entity=mode, cursor=entities.cursor, page=page)
+    navigation = get_navigation_row(mode, entities, page, ListView.MAIN)
     match mode:
         case EntityType.GROUP:
             if len(entities) == 0:
@@ -85,7 +160,6 @@ def get_main_keyboard(mode: EntityType, entities: dict) -> InlineKeyboardMarkup:
                     ),
                 ]
                 buttons.append(keys)
-            return InlineKeyboardMarkup(inline_keyboard=buttons)
         case EntityType.WORD | EntityType.MINUS_WORD:
             if len(entities) == 0:
                 key = (
@@ -104,4 +178,14 @@ def get_main_keyboard(mode: EntityType, entities: dict) -> InlineKeyboardMarkup:
                     ),
                 ]
                 buttons.append(keys)
+                scope_btn_data = ActionDataFactory(
+                    action=Action.SCOPE_PRE, entity=mode, cursor=entities.cursor, page=page
+                )
+                buttons.append([
+                    InlineKeyboardButton(
+                        text="🎯 Группы для слова", callback_data=scope_btn_data.pack()
+                    )
+                ])
+    if navigation:
+        buttons.append(navigation)
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -0,0 +1,228 @@
+from typing import Mapping, Sequence
+
+from core.resources.enums import MatchMode
+from core.utils.aho_corasick import AhoCorasick
+from core.utils.normalized_text import NormalizedText, fold, is_token, is_word_char
+from core.utils.stemming import stem_keyword
+
+# A stem-mode row may carry the stem computed when it was saved as a third item.
+KeywordEntry = str | tuple[str, MatchMode] | tuple[str, MatchMode, str | None]
+# Marks that select the match mode in admin input and exports: "|java", "=java", "~java".
+MODE_MARKERS = {"|": MatchMode.PREFIX, "=": MatchMode.WORD, "~": MatchMode.STEM}
+MARKER_OF_MODE = {mode: marker for marker, mode in MODE_MARKERS.items()}
+# Keeps a substring keyword that starts with a marker literal: "\=java" is the substring "=java".
+LITERAL_MARKER = "\\"
+
+
+def parse_keyword(entry: str) -> tuple[str, MatchMode]:
+    """
+    A keyword typed or imported by an admin, where a leading mode marker selects the mode.
+    Stored rows carry their mode and are never parsed.
+    """
+    if len(entry) > 1 and entry[0] == LITERAL_MARKER:
+        return entry[1:], MatchMode.SUBSTRING
+    if len(entry) > 1 and entry[0] in MODE_MARKERS:
+        return entry[1:], MODE_MARKERS[entry[0]]
+    return entry, MatchMode.SUBSTRING
+
+
+def keyword_label(keyword: str, mode: MatchMode) -> str:
+    """
+    The admin syntax of a keyword, parsed back by parse_keyword into the same keyword and mode.
+    """
+    if mode is MatchMode.SUBSTRING and (keyword[:1] in MODE_MARKERS or keyword[:1] == LITERAL_MARKER):
+        return LITERAL_MARKER + keyword
+    return MARKER_OF_MODE.get(mode, "") + keyword
+
+
+class KeywordMatcher:
+    """
+    Keyword list compiled once, so a text is checked against every keyword in a single pass.
+
+    Substring keywords go through one automaton. Whole-word and prefix keywords that are a
+    single word run are looked up per message token: a set of words and a map of prefixes
+    grouped by length, so the cost depends on the tokens, not on the number of keywords.
+    Stem keywords are a map of Russian stems probed with the stems of the message tokens.
+    Other whole-word, prefix and stem keywords (with punctuation or spaces) use a second automaton
+    whose hits are checked against the word boundaries of the message.
+    When several keywords occur, the one listed first wins.
+    """
+
+    __slots__ = (
+        "_results",
+        "_plain_ids",
+        "_plain_words",
+        "_automaton",
+        "_whole_words",
+        "_prefixes",
+        "_prefix_lengths",
+        "_stems",
+        "_bounded_words",
+        "_bounded_automaton",
+    )
+
+    # Below this size a C-level `in` per keyword beats a pure-Python automaton walk.
+    LINEAR_SCAN_LIMIT = 250
+
+    def __init__(self, words: Sequence[KeywordEntry], linear_scan_limit: int = LINEAR_SCAN_LIMIT) -> None:
+        self._results = []
+        self._plain_ids = []
+        plain_words = []
+        self._whole_words: dict[str, int] = {}
+        self._prefixes: dict[str, int] = {}
+        self._stems: dict[str, int] = {}
+        bounded_words = []
+        for index, entry in enumerate(words):
+            keyword, mode = entry[:2] if isinstance(entry, tuple) else parse_keyword(entry)
+            assert len(keyword) > 0
+            self._results.append(keyword)
+            folded = fold(keyword)
+            if mode is MatchMode.SUBSTRING:
+                self._plain_ids.append(index)
+                plain_words.append(folded)
+            elif not is_token(folded):
+                bounded_words.append((index, folded, mode))
+            elif mode is MatchMode.STEM:
+                stem = entry[2] if isinstance(entry, tuple) and len(entry) > 2 else None
+                self._stems.setdefault(stem or stem_keyword(folded), index)
+            elif mode is MatchMode.WORD:
+                self._whole_words.setdefault(folded, index)
+            else:
+                self._prefixes.setdefault(folded, index)
+        self._plain_words = plain_words
+        self._automaton = AhoCorasick(plain_words) if len(plain_words) > linear_scan_limit else None
+        self._prefix_lengths = tuple(sorted({len(prefix) for prefix in self._prefixes}))
+        self._bounded_words = bounded_words
+        self._bounded_automaton = AhoCorasick([word for _, word, _ in bounded_words]) if bounded_words else None
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def _find_in_tokens(self, message: NormalizedText, found: int | None) -> int | None:
+        whole_words = self._whole_words
+        prefixes = self._prefixes
+        lengths = self._prefix_lengths
+        for token in message.tokens:
+            index = whole_words.get(token)
+            if index is not None and (found is None or index < found):
+                found = index
+            for length in lengths:
+                if length > len(token):
+                    break
+                index = prefixes.get(token[:length])
+                if index is not None and (found is None or index < found):
+                    found = index
+        return found
+
+    def _find_in_stems(self, message: NormalizedText, found: int | None) -> int | None:
+        stems = self._stems
+        for stem in message.stems:
+            index = stems.get(stem)
+            if index is not None and (found is None or index < found):
+                found = index
+        return found
+
+    def _find_bounded(self, message: NormalizedText, found: int | None) -> int | None:
+        folded = message.folded
+        for end, bounded_id in self._bounded_automaton.iter_matches(folded):
+            index, word, mode = self._bounded_words[bounded_id]
+            if found is not None and index >= found:
+                continue
+            start = end - len(word) + 1
+            if mode is MatchMode.PREFIX:
+                matched = start in message.boundaries
+            else:
+                matched = not is_word_char(folded, start - 1) and not is_word_char(folded, end + 1)
+            if matched:
+                found = index
+                if bounded_id == 0:
+                    break
+        return found
+
+    def find(self, text: str | NormalizedText) -> str | None:
+        message = NormalizedText.of(text)
+        folded = message.folded
+        if self._automaton is not None:
+            found = self._automaton.first(folded)
+        else:
+            found = next((i for i, word in enumerate(self._plain_words) if word in folded), None)
+        if found is not None:
+            found = self._plain_ids[found]
+        if self._whole_words or self._prefixes:
+            found = self._find_in_tokens(message, found)
+        if self._stems:
+            found = self._find_in_stems(message, found)
+        if self._bounded_automaton is not None and (found is None or self._bounded_words[0][0] < found):
+            found = self._find_bounded(message, found)
+        if found is None:
+            return None
+        return self._results[found]
+
+
+class MatcherChain:
+    """
+    Several compiled lists checked in turn; used to add a group's scoped keywords to the global ones.
+    """
+
+    __slots__ = ("matchers",)
+
+    def __init__(self, *matchers: KeywordMatcher) -> None:
+        self.matchers = matchers
+
+    def __len__(self) -> int:
+        return sum(len(matcher) for matcher in self.matchers)
+
+    def find(self, text: str | NormalizedText) -> str | None:
+        message = NormalizedText.of(text)
+        for matcher in self.matchers:
+            found = matcher.find(message)
+            if found is not None:
+                return found
+        return None
+
+
+class MatcherIndex:
+    """
+    chat_id -> (keyword matcher, minus-word matcher).
+
+    Global lists are compiled once. A chat with scoped words gets a chain of the global matcher
+    and a matcher of its own words only, so the global automaton is never duplicated; chats
+    with the same scoped words share that matcher.
+    """
+
+    __slots__ = ("keyword_matcher", "minus_word_matcher", "_chats")
+
+    def __init__(
+        self,
+        keywords: Sequence[KeywordEntry],
+        minus_words: Sequence[KeywordEntry],
+        scoped_keywords: Mapping[int, Sequence[KeywordEntry]] | None = None,
+        scoped_minus_words: Mapping[int, Sequence[KeywordEntry]] | None = None,
+    ) -> None:
+        self.keyword_matcher = KeywordMatcher(keywords)
+        self.minus_word_matcher = KeywordMatcher(minus_words)
+        scoped_keywords = scoped_keywords or {}
+        scoped_minus_words = scoped_minus_words or {}
+        compiled: dict[tuple[KeywordEntry, ...], KeywordMatcher] = {}
+
+        def chain(base: KeywordMatcher, words: Sequence[KeywordEntry] | None) -> KeywordMatcher | MatcherChain:
+            if not words:
+                return base
+            key = tuple(words)
+            if key not in compiled:
+                compiled[key] = KeywordMatcher(key)
+            return MatcherChain(base, compiled[key])
+
+        self._chats = {
+            chat_id: (
+                chain(self.keyword_matcher, scoped_keywords.get(chat_id)),
+                chain(self.minus_word_matcher, scoped_minus_words.get(chat_id)),
+            )
+            for chat_id in scoped_keywords.keys() | scoped_minus_words.keys()
+        }
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def for_chat(self, chat_id: int) -> tuple[KeywordMatcher | MatcherChain, KeywordMatcher | MatcherChain]:
+        return self._chats.get(chat_id, (self.keyword_matcher, self.minus_word_matcher))
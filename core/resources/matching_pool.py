@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable
+
+from core.database.snapshot import Snapshot, SnapshotStore
+from core.resources.controllers import text_matches
+from core.resources.enums import HomoglyphPolicy, IgnoreReason, OverflowPolicy
+from core.resources.matcher import MatcherIndex
+from core.utils.metrics import STAGE_SECONDS
+from core.utils.result import Result
+from core.utils.unicode_scripts import script_table
+
+# Worker process state: matchers for the last keyword-set version shipped to this worker.
+_worker_version: int | None = None
+_worker_matchers: MatcherIndex | None = None
+_worker_homoglyphs = HomoglyphPolicy.DROP
+
+
+def _init_worker(homoglyphs: HomoglyphPolicy = HomoglyphPolicy.DROP) -> None:
+    global _worker_homoglyphs
+    _worker_homoglyphs = homoglyphs
+    script_table()
+
+
+def _match_text(
+    version: int,
+    chat_id: int,
+    text: str,
+    keyword_lists: tuple | None = None,
+) -> Result[str, IgnoreReason] | None:
+    """
+    Match in a worker process. Returns None when the worker has not seen this
+    version yet and no keyword lists were shipped with the call.
+    """
+    global _worker_version, _worker_matchers
+    if version != _worker_version:
+        if keyword_lists is None:
+            return None
+        _worker_matchers = MatcherIndex(*keyword_lists)
+        _worker_version = version
+    return text_matches(text, *_worker_matchers.for_chat(chat_id), _worker_homoglyphs)
+
+
+ResultHandler = Callable[[object, Snapshot, Result[str, IgnoreReason]], Awaitable[None]]
+
+
+class MatchingPool:
+    """
+    Runs text_matches in worker processes behind a bounded queue, so CPU-heavy matching
+    does not block the event loop shared by Telethon and the admin bot.
+
+    With the BLOCK policy, submit waits for room in the queue. That bounds memory only if
+    its callers wait too: Telethon clients feeding the pool must dispatch updates with
+    sequential_updates=True, else every update gets its own task that waits in submit.
+    """
+
+    def __init__(
+        self,
+        snapshot: SnapshotStore,
+        on_result: ResultHandler,
+        workers: int,
+        max_queue: int = 1000,
+        overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+        homoglyphs: HomoglyphPolicy = HomoglyphPolicy.DROP,
+    ) -> None:
+        self.snapshot = snapshot
+        self.on_result = on_result
+        self.workers = workers
+        self.overflow = overflow
+        self.homoglyphs = homoglyphs
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.executor: ProcessPoolExecutor | None = None
+        self.processed = 0
+        self.dropped = 0
+        self.keyword_shipments = 0
+        self.blocked = 0
+        self._tasks: list[asyncio.Task] = []
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "keyword_shipments": self.keyword_shipments,
+            "blocked": self.blocked,
+        }
+
+    async def submit(self, event) -> bool:
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+            return True
+        match self.overflow:
+            case OverflowPolicy.BLOCK:
+                self.blocked += 1
+                try:
+                    await self.queue.put(event)
+                finally:
+                    self.blocked -= 1
+                return True
+            case OverflowPolicy.DROP_OLDEST:
+                self.queue.get_nowait()
+                self.queue.task_done()
+                self.queue.put_nowait(event)
+                self.dropped += 1
+                return True
+            case OverflowPolicy.SHED:
+                self.dropped += 1
+                return False
+        raise ValueError(f"Unexpected overflow policy: {self.overflow}")
+
+    async def _match(self, snapshot: Snapshot, chat_id: int, text: str) -> Result[str, IgnoreReason]:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self.executor, _match_text, snapshot.version, chat_id, text)
+        if result is None:
+            self.keyword_shipments += 1
+            keyword_lists = (
+                snapshot.keywords, snapshot.minus_words, snapshot.scoped_keywords, snapshot.scoped_minus_words
+            )
+            result = await loop.run_in_executor(
+                self.executor, _match_text, snapshot.version, chat_id, text, keyword_lists
+            )
+        return result
+
+    async def _consume(self) -> None:
+        while True:
+            event = await self.queue.get()
+            try:
+                snapshot = self.snapshot.current
+                with STAGE_SECONDS.time("match"):
+                    result = await self._match(snapshot, event.chat_id, event.text)
+                self.processed += 1
+                await self.on_result(event, snapshot, result)
+            except Exception:
+                logging.exception("Failed to process message in matching pool")
+            finally:
+                self.queue.task_done()
+
+    def start(self) -> None:
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=_init_worker,
+            initargs=(self.homoglyphs,),
+        )
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -7,6 +7,9 @@ from aiogram.types import Message
 from aiogram.types import TelegramObject, Update
 from sqlalchemy.exc import PendingRollbackError
 
+from core.database.crud import is_snapshot_dirty
+from core.resources.enums import Topic
+
 
 class SessionMiddleware(BaseMiddleware):
     async def __call__(
@@ -23,7 +26,12 @@ class SessionMiddleware(BaseMiddleware):
                 await session.commit()
             except PendingRollbackError:
                 ...
-            return res
+        if is_snapshot_dirty(session):
+            snapshot = await db.snapshot.rebuild()
+            bus = data.get("bus")
+            if bus is not None:
+                await bus.publish(Topic.RELOAD.value, snapshot.version)
+        return res
 
 
 class UpdatesDumperMiddleware(BaseMiddleware):
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from collections import deque
+from time import monotonic
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
+from core.resources.replies import also_posted_in
+from core.utils.metrics import STAGE_SECONDS
+
+MESSAGE_LIMIT = 4096
+DIGEST_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+
+
+class Notification:
+    """
+    A queued match message. Groups where the same text was reposted can be added
+    until the notification is taken from the queue for sending.
+    """
+
+    __slots__ = ("text", "extra_groups", "sent")
+
+    def __init__(self, text: str = "") -> None:
+        self.text = text
+        self.extra_groups: list[str] = []
+        self.sent = False
+
+    def add_group(self, group: str) -> bool:
+        if self.sent:
+            return False
+        if group not in self.extra_groups:
+            self.extra_groups.append(group)
+        return True
+
+    def render(self) -> str:
+        if not self.extra_groups:
+            return self.text
+        return self.text + also_posted_in.format(", ".join(self.extra_groups))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+class NotificationDispatcher:
+    """
+    Sends match notifications to one chat at a rate Telegram accepts.
+
+    Notifications that pile up while waiting for a token are merged into digest messages
+    below MESSAGE_LIMIT; new ones are dropped once max_queue is reached.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        chat_id: int,
+        rate_per_minute: int = 20,
+        burst: int = 3,
+        max_queue: int = 1000,
+    ) -> None:
+        self.bot = bot
+        self.chat_id = chat_id
+        self.bucket = TokenBucket(rate=rate_per_minute / 60, capacity=burst)
+        self.max_queue = max_queue
+        self.queue: deque[Notification] = deque()
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.failed = 0
+        self._task: asyncio.Task | None = None
+
+    def submit(self, notification: Notification) -> bool:
+        if len(self.queue) >= self.max_queue:
+            self.dropped += 1
+            logging.warning(f"notification queue is full ({self.max_queue}), dropping match")
+            return False
+        self.queue.append(notification)
+        self.ready.set()
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queue_depth": len(self.queue),
+            "sent": self.sent,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _next_message(self) -> str:
+        notification = self.queue.popleft()
+        notification.sent = True
+        parts = [notification.render()]
+        size = len(parts[0])
+        while self.queue and size + len(DIGEST_SEPARATOR) + len(self.queue[0].render()) <= MESSAGE_LIMIT:
+            notification = self.queue.popleft()
+            notification.sent = True
+            text = notification.render()
+            size += len(DIGEST_SEPARATOR) + len(text)
+            parts.append(text)
+        self.merged += len(parts) - 1
+        return DIGEST_SEPARATOR.join(parts)
+
+    async def _send(self, text: str) -> None:
+        while True:
+            try:
+                with STAGE_SECONDS.time("send"):
+                    await self.bot.send_message(chat_id=self.chat_id, text=text, disable_web_page_preview=True)
+                self.sent += 1
+                return
+            except TelegramRetryAfter as e:
+                logging.warning(f"flood control, retrying notification in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+            except Exception:
+                self.failed += 1
+                logging.exception("Failed to send notification")
+                return
+
+    async def run(self) -> None:
+        while True:
+            if not self.queue:
+                self.ready.clear()
+                await self.ready.wait()
+            await self.bucket.acquire()
+            await self._send(self._next_message())
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def drain(self, poll_interval: float = 0.5) -> None:
+        """
+        Wait until the queue is sent; `ready` is cleared only once run() finds it empty.
+        """
+        while self.queue or self.ready.is_set():
+            await asyncio.sleep(poll_interval)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if self.queue:
+            logging.warning(f"{len(self.queue)} notifications left unsent on shutdown")
@@ -18,14 +18,66 @@ text_without_username = (
     "Текст сообщения: {}\n\n"
     '<a href="{}/{}">Ссылка на сообщение</a>'
 )
+text_without_sender = (
+    "Группа: {}\n"
+    "Ключевое слово: <b>{}</b>\n"
+    "Текст сообщения: {}\n\n"
+    '<a href="{}/{}">Ссылка на сообщение</a>'
+)
+mixed_scripts_warning = "⚠️ В сообщении есть слова из смешанных алфавитов\n"
+also_posted_in = "\n\nТакже опубликовано в: {}"
 
 WORD_LIST_REPLY = {
     EntityType.WORD: "📝 Список ключевых слов: \n\n",
     EntityType.MINUS_WORD: "📝 Список минус-слов: \n\n",
 }
 
+MATCH_MODE_HINT = (
+    "\n\njava — подстрока (найдётся и в javascript)"
+    "\n=java — только целое слово"
+    "\n|java — начало слова (java, javadoc)"
+    "\n~работа — любая форма слова (работы, работой)"
+    "\n\\=java — подстрока, начинающаяся со знака (=java)"
+)
+
 ADD_TEXT_REPLY = {
     EntityType.GROUP: "Отправте ссылку на группу, юзернейм группы или инвайт ссылку.",
-    EntityType.WORD: "Введите ключевое слово",
-    EntityType.MINUS_WORD: "Введите минус-слово",
+    EntityType.WORD: "Введите ключевое слово или отправьте .txt/.csv файл со списком слов" + MATCH_MODE_HINT,
+    EntityType.MINUS_WORD: "Введите минус-слово или отправьте .txt/.csv файл со списком слов" + MATCH_MODE_HINT,
+}
+
+EXPORT_FILE_NAME = {
+    EntityType.WORD: "keywords.txt",
+    EntityType.MINUS_WORD: "minus_words.txt",
 }
+
+scope_header = (
+    "🎯 Группы для слова <b>{}</b>\n\n"
+    "Слово ищется только в отмеченных ✅ группах. "
+    "Если не отмечена ни одна, слово ищется во всех группах."
+)
+
+backfill_usage = (
+    "/backfill 500 — последние 500 сообщений всех групп\n"
+    "/backfill 3d — сообщения за последние 3 дня\n"
+    "/backfill 3d @group — только одна группа"
+)
+backfill_unavailable = "Сканирование истории доступно только в режиме all или через main.py --role backfill"
+backfill_busy = "Сканирование истории уже идёт"
+backfill_group_not_found = "Группа не найдена среди активных"
+backfill_started = "🕓 Сканирую историю {} групп(ы)"
+backfill_summary = (
+    "Сканирование истории завершено\n"
+    "Сообщений: {}\n"
+    "Групп: {}\n"
+    "Ошибок: {}"
+)
+
+import_wrong_format = "Поддерживаются только файлы .txt и .csv"
+import_summary = (
+    "Импорт завершён\n"
+    "Добавлено: {}\n"
+    "Уже были в базе: {}\n"
+    "Повторы в файле: {}\n"
+    "Пропущено строк с несколькими словами: {}"
+)
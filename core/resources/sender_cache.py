@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from time import monotonic
+
+
+class SenderInfo:
+    __slots__ = ("first_name", "last_name", "username")
+
+    def __init__(self, first_name: str, last_name: str | None, username: str | None) -> None:
+        self.first_name = first_name
+        self.last_name = last_name
+        self.username = username
+
+    @classmethod
+    def from_entity(cls, sender) -> "SenderInfo":
+        # Channels and anonymous group admins have a title instead of a first name.
+        first_name = getattr(sender, "first_name", None) or getattr(sender, "title", None) or ""
+        return cls(first_name, getattr(sender, "last_name", None), getattr(sender, "username", None))
+
+    @property
+    def fullname(self) -> str:
+        return self.first_name + " " + self.last_name if self.last_name else self.first_name
+
+
+class SenderCache:
+    """
+    Bounded LRU of rendered sender fields with a TTL, keyed by sender_id.
+
+    When resolve_timeout is set, a lookup that takes longer is abandoned and None is returned,
+    so the caller can render the match without a sender instead of stalling. A lookup that
+    fails, e.g. for a sender the session has never seen, returns None as well.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600, resolve_timeout: float | None = 2.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.resolve_timeout = resolve_timeout
+        self.entries: OrderedDict[int, tuple[float, SenderInfo]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _lookup(self, sender_id: int) -> SenderInfo | None:
+        entry = self.entries.get(sender_id)
+        if entry is None:
+            return None
+        expires_at, info = entry
+        if expires_at < monotonic():
+            del self.entries[sender_id]
+            return None
+        self.entries.move_to_end(sender_id)
+        return info
+
+    def _store(self, sender_id: int, info: SenderInfo) -> None:
+        self.entries[sender_id] = (monotonic() + self.ttl, info)
+        self.entries.move_to_end(sender_id)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def get(self, event) -> SenderInfo | None:
+        sender_id = event.sender_id
+        if sender_id is not None:
+            info = self._lookup(sender_id)
+            if info is not None:
+                self.hits += 1
+                return info
+        self.misses += 1
+        try:
+            sender = await asyncio.wait_for(event.get_sender(), timeout=self.resolve_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logging.info(f"sender {sender_id} was not resolved in {self.resolve_timeout}s")
+            return None
+        except Exception as e:
+            self.failures += 1
+            logging.info(f"sender {sender_id} was not resolved: {e!r}")
+            return None
+        if sender is None:
+            return None
+        info = SenderInfo.from_entity(sender)
+        if sender_id is not None:
+            self._store(sender_id, info)
+        return info
@@ -0,0 +1,72 @@
+import hashlib
+import logging
+
+from telethon import TelegramClient
+
+
+def rendezvous_owner(group_id: int, shard_names: list[str]) -> str:
+    """
+    Highest-random-weight hashing: adding a group never moves other groups,
+    and adding a shard only moves the groups that the new shard wins.
+    """
+    def weight(name: str) -> bytes:
+        return hashlib.blake2b(f"{name}:{group_id}".encode(), digest_size=8).digest()
+
+    return max(shard_names, key=weight)
+
+
+class ShardManager:
+    """
+    One TelegramClient per session name; every active group is owned by exactly one of them.
+
+    `local` limits the clients started by this process to some of the sessions (one per
+    ingest process in split mode, none in the admin bot); ownership is still decided over
+    all of them.
+    """
+
+    def __init__(
+        self, sessions: list[str], api_id: int, api_hash: str, local: list[str] | None = None, **client_options
+    ) -> None:
+        assert sessions, "at least one Telegram session is required"
+        self.names = list(sessions)
+        self.clients: dict[str, TelegramClient] = {
+            name: TelegramClient(name, api_id, api_hash, **client_options)
+            for name in (sessions if local is None else local)
+        }
+        self._owners: dict[int, str] = {}
+
+    @property
+    def primary(self) -> TelegramClient:
+        return next(iter(self.clients.values()))
+
+    def owner(self, group_id: int) -> str:
+        name = self._owners.get(group_id)
+        if name is None:
+            name = self._owners[group_id] = rendezvous_owner(group_id, self.names)
+        return name
+
+    def client_for(self, group_id: int) -> TelegramClient:
+        return self.clients[self.owner(group_id)]
+
+    def local_client_for(self, group_id: int) -> TelegramClient | None:
+        """
+        The owner of a group if its session runs in this process, else None.
+        """
+        return self.clients.get(self.owner(group_id))
+
+    def owns(self, name: str, group_id: int) -> bool:
+        return self.owner(group_id) == name
+
+    def assignment(self, group_ids) -> dict[str, set[int]]:
+        shards = {name: set() for name in self.clients}
+        for group_id in group_ids:
+            name = self.owner(group_id)
+            if name in shards:
+                shards[name].add(group_id)
+        return shards
+
+    async def start(self) -> None:
+        for name, client in self.clients.items():
+            # noinspection PyUnresolvedReferences
+            await client.start()
+            logging.info(f"Telegram session {name} started")
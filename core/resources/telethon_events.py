@@ -0,0 +1,61 @@
+from typing import Callable
+
+from telethon import events
+
+from core.database.snapshot import SnapshotStore
+
+
+class MonitoredChatMessage(events.NewMessage):
+    """
+    NewMessage builder that only lets through incoming text messages from active groups.
+
+    Membership is read from the current snapshot on every update, so toggling or adding
+    a group takes effect as soon as the snapshot is rebuilt, without re-registering the handler.
+    With several sessions, `owns` keeps only the groups assigned to this session.
+    """
+
+    def __init__(self, snapshot: SnapshotStore, owns: Callable[[int], bool] | None = None) -> None:
+        super().__init__(incoming=True)
+        self.snapshot = snapshot
+        self.owns = owns
+
+    def filter(self, event):
+        message = event.message
+        if message.out or not message.message:
+            return
+        if event.chat_id not in self.snapshot.current.groups:
+            return
+        if self.owns is not None and not self.owns(event.chat_id):
+            return
+        return super().filter(event)
+
+
+class RemoteMessage:
+    """
+    The fields of a NewMessage event that travel between processes in split mode.
+
+    Quacks like the event for match logging and rendering. The sender is the one fetched
+    with the message when given (iter_messages returns it), else it is resolved through
+    `client` when one is given.
+    """
+
+    __slots__ = ("chat_id", "id", "sender_id", "text", "client", "sender")
+
+    def __init__(self, chat_id: int, id: int, sender_id: int | None, text: str, client=None, sender=None) -> None:
+        self.chat_id = chat_id
+        self.id = id
+        self.sender_id = sender_id
+        self.text = text
+        self.client = client
+        self.sender = sender
+
+    @property
+    def message(self) -> "RemoteMessage":
+        return self
+
+    async def get_sender(self):
+        if self.sender is not None:
+            return self.sender
+        if self.client is None or self.sender_id is None:
+            return None
+        return await self.client.get_entity(self.sender_id)
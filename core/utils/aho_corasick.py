@@ -0,0 +1,85 @@
+from typing import Iterator, Sequence
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring automaton which reports the lowest-indexed pattern found in a text,
+    or every occurrence of every pattern.
+    """
+
+    __slots__ = ("_goto", "_fail", "_best", "_own", "_output")
+
+    def __init__(self, patterns: Sequence[str]) -> None:
+        goto: list[dict[str, int]] = [{}]
+        best: list[int | None] = [None]
+        # Every pattern ending at each node; equal patterns share a node.
+        own: list[list[int]] = [[]]
+        for index, pattern in enumerate(patterns):
+            assert len(pattern) > 0
+            node = 0
+            for char in pattern:
+                next_node = goto[node].get(char)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto[node][char] = next_node
+                    goto.append({})
+                    best.append(None)
+                    own.append([])
+                node = next_node
+            if best[node] is None:
+                best[node] = index
+            own[node].append(index)
+
+        fail = [0] * len(goto)
+        # Nearest proper suffix of each node that is itself a pattern, 0 if none.
+        output = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fallback = goto[state].get(char, 0)
+                fail[child] = fallback
+                output[child] = fallback if own[fallback] else output[fallback]
+                inherited = best[fallback]
+                if inherited is not None and (best[child] is None or inherited < best[child]):
+                    best[child] = inherited
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._best = best
+        self._own = own
+        self._output = output
+
+    def first(self, text: str) -> int | None:
+        goto, fail, best = self._goto, self._fail, self._best
+        found = None
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            index = best[node]
+            if index is not None and (found is None or index < found):
+                if index == 0:
+                    return 0
+                found = index
+        return found
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int]]:
+        """
+        Yield (end position, pattern index) for every occurrence, end position inclusive.
+        """
+        goto, fail, own, output = self._goto, self._fail, self._own, self._output
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            match = node if own[node] else output[node]
+            while match:
+                for index in own[match]:
+                    yield position, index
+                match = output[match]
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import marshal
+import os
+import struct
+from collections import defaultdict
+from typing import Awaitable, Callable, Iterable
+
+# Frame: 4-byte big-endian length, then marshal.dumps((topic, fields)).
+# marshal only carries plain values (str, int, float, None, tuples), which is all an envelope holds.
+HEADER = struct.Struct("!I")
+SUBSCRIBE = "subscribe"
+
+Handler = Callable[..., Awaitable[None]]
+
+
+def encode(topic: str, fields: tuple) -> bytes:
+    body = marshal.dumps((topic, fields))
+    return HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    header = await reader.readexactly(HEADER.size)
+    (length,) = HEADER.unpack(header)
+    return header + await reader.readexactly(length)
+
+
+def decode(frame: bytes) -> tuple[str, tuple]:
+    return marshal.loads(frame[HEADER.size:])
+
+
+class Subscriber:
+    """
+    A broker connection with its own bounded outbox, written by its own task, so a slow
+    or broken connection delays and loses only its own envelopes.
+    """
+
+    __slots__ = ("writer", "outbox", "task", "closed")
+
+    def __init__(self, writer: asyncio.StreamWriter, max_pending: int) -> None:
+        self.writer = writer
+        self.outbox: asyncio.Queue[bytes] = asyncio.Queue(maxsize=max_pending)
+        self.task: asyncio.Task | None = None
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+        self.writer.close()
+
+
+class Broker:
+    """
+    Routes envelopes between local processes over a Unix socket.
+
+    A connection announces its topics first. Envelopes on a broadcast topic go to every
+    subscriber; any other topic is a work queue and each envelope goes to one subscriber,
+    round-robin, so adding a process for that topic spreads the load across cores.
+
+    Envelopes are queued per subscriber, at most `max_pending` of them. A work envelope
+    skips subscribers whose queue is full; a broadcast one is dropped for them. A connection
+    that fails to write is closed without affecting the others.
+    """
+
+    def __init__(self, path: str, broadcast: Iterable[str] = (), max_pending: int = 1000) -> None:
+        self.path = path
+        self.broadcast = set(broadcast)
+        self.max_pending = max_pending
+        self.subscribers: defaultdict[str, list[Subscriber]] = defaultdict(list)
+        self.connections: set[Subscriber] = set()
+        self.server: asyncio.AbstractServer | None = None
+        self.routed = 0
+        self.unrouted = 0
+        self.dropped = 0
+        self._next: defaultdict[str, int] = defaultdict(int)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "connections": len({id(s) for subscribers in self.subscribers.values() for s in subscribers}),
+            "routed": self.routed,
+            "unrouted": self.unrouted,
+            "dropped": self.dropped,
+        }
+
+    def _targets(self, topic: str) -> list[Subscriber]:
+        subscribers = [s for s in self.subscribers.get(topic, ()) if not s.closed]
+        if not subscribers or topic in self.broadcast:
+            return subscribers
+        start = self._next[topic] % len(subscribers)
+        self._next[topic] = start + 1
+        for offset in range(len(subscribers)):
+            subscriber = subscribers[(start + offset) % len(subscribers)]
+            if not subscriber.outbox.full():
+                return [subscriber]
+        return [subscribers[start]]
+
+    async def _send(self, subscriber: Subscriber) -> None:
+        try:
+            while True:
+                frame = await subscriber.outbox.get()
+                subscriber.writer.write(frame)
+                await subscriber.writer.drain()
+        except (ConnectionError, OSError) as e:
+            logging.warning(f"Dropping a bus connection that failed to write: {e!r}")
+            subscriber.close()
+
+    def _route(self, topic: str, frame: bytes) -> None:
+        targets = self._targets(topic)
+        if not targets:
+            self.unrouted += 1
+            logging.debug(f"no subscriber for {topic}")
+            return
+        for target in targets:
+            try:
+                target.outbox.put_nowait(frame)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                logging.warning(f"bus subscriber is {self.max_pending} envelopes behind, dropping {topic}")
+        self.routed += 1
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        subscriber = Subscriber(writer, self.max_pending)
+        subscriber.task = asyncio.create_task(self._send(subscriber))
+        self.connections.add(subscriber)
+        topics: tuple = ()
+        try:
+            _, topics = decode(await read_frame(reader))
+            for topic in topics:
+                self.subscribers[topic].append(subscriber)
+            while True:
+                frame = await read_frame(reader)
+                topic, _ = decode(frame)
+                self._route(topic, frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for topic in topics:
+                self.subscribers[topic].remove(subscriber)
+            self.connections.discard(subscriber)
+            subscriber.task.cancel()
+            subscriber.close()
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._serve, path=self.path)
+        logging.info(f"Broker listening on {self.path}")
+
+    async def stop(self) -> None:
+        for subscriber in self.connections:
+            subscriber.close()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+
+class BusClient:
+    """
+    One process's connection to the Broker: publish envelopes and dispatch the subscribed
+    topics to handlers, which are called with the envelope fields as positional arguments.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.handlers: dict[str, Handler] = {}
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+        self.published = 0
+        self.received = 0
+        self._task: asyncio.Task | None = None
+
+    def stats(self) -> dict[str, int]:
+        return {"published": self.published, "received": self.received}
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self.handlers[topic] = handler
+
+    async def connect(self, retries: int = 50, retry_delay: float = 0.2) -> None:
+        for attempt in range(retries):
+            try:
+                self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if attempt == retries - 1:
+                    raise
+                await asyncio.sleep(retry_delay)
+        self.writer.write(encode(SUBSCRIBE, tuple(self.handlers)))
+        await self.writer.drain()
+        self._task = asyncio.create_task(self._dispatch())
+
+    async def publish(self, topic: str, *fields) -> None:
+        self.writer.write(encode(topic, fields))
+        self.published += 1
+        await self.writer.drain()
+
+    async def _dispatch(self) -> None:
+        while True:
+            try:
+                topic, fields = decode(await read_frame(self.reader))
+            except asyncio.IncompleteReadError:
+                logging.error("Broker closed the connection")
+                return
+            self.received += 1
+            try:
+                await self.handlers[topic](*fields)
+            except Exception:
+                logging.exception(f"Failed to handle {topic} envelope")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
@@ -0,0 +1,80 @@
+import re
+from collections import Counter
+from functools import cache
+
+from core.utils.unicode_scripts import FIRST_MARKER, has_mixed_script_word, script_table
+
+# Casefolded look-alikes of each target script's letters in the other scripts. Upper-case
+# look-alikes count too ("B"/"В" fold to "b"/"в"), since evasion often uses capitals.
+CONFUSABLES = {
+    "CYRILLIC": {
+        "a": "а", "b": "в", "c": "с", "e": "е", "h": "н", "k": "к", "m": "м",
+        "o": "о", "p": "р", "t": "т", "x": "х", "y": "у",
+        "α": "а", "β": "в", "γ": "г", "ε": "е", "η": "н", "κ": "к", "μ": "м",
+        "ο": "о", "π": "п", "ρ": "р", "τ": "т", "χ": "х",
+    },
+    "LATIN": {
+        "а": "a", "в": "b", "с": "c", "е": "e", "н": "h", "і": "i", "ј": "j", "к": "k",
+        "м": "m", "о": "o", "р": "p", "ѕ": "s", "т": "t", "х": "x", "у": "y",
+        "α": "a", "β": "b", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o",
+        "ρ": "p", "τ": "t", "υ": "u", "χ": "x",
+    },
+}
+
+# Letters that look like a letter of another script; the others tell which script a word is in.
+AMBIGUOUS = frozenset(char for mapping in CONFUSABLES.values() for char in mapping)
+
+_LETTERS = re.compile(r"[^ ]+")
+# Every mixed-script word that can be canonicalized, toward Cyrillic ("рабoта") or toward
+# Latin ("pythоn"), has a Latin or Greek letter in it. So casefolded text that is all ASCII,
+# or has no a-z or Greek letter, is skipped without computing its script markers; accented
+# Latin letters are not looked for.
+_LATIN_OR_GREEK = re.compile(r"[a-zα-ω]")
+
+
+def may_mix_scripts(folded: str) -> bool:
+    return not folded.isascii() and _LATIN_OR_GREEK.search(folded) is not None
+
+
+@cache
+def confusables_tables() -> dict[str, dict[int, str]]:
+    """
+    A str.translate table per marker of a target script, built once like script_table.
+    """
+    table, scripts = script_table()
+    return {
+        chr(FIRST_MARKER + scripts.index(script)): str.maketrans(mapping)
+        for script, mapping in CONFUSABLES.items()
+    }
+
+
+def canonicalize(text: str, markers: str) -> str:
+    """
+    Rewrite each word that mixes scripts into its dominant one, e.g. "рабoта" with a Latin "o"
+    into Cyrillic, so keywords match through homoglyph evasion. The dominant script is the one
+    with most letters that have no look-alike, or with most letters if every letter has one.
+    Takes the output of script_markers for `text`; other words are left as they are.
+    """
+    if not has_mixed_script_word(markers):
+        return text
+    tables = confusables_tables()
+    parts = []
+    last = 0
+    for match in _LETTERS.finditer(markers):
+        letters = match.group()
+        if len(letters) < 2 or letters.count(letters[0]) == len(letters):
+            continue
+        start, end = match.span()
+        word = text[start:end]
+        counts = Counter(marker for char, marker in zip(word, letters) if char not in AMBIGUOUS) or Counter(letters)
+        dominant = max(counts, key=lambda marker: (counts[marker], marker == letters[0]))
+        table = tables.get(dominant)
+        if table is None:
+            continue
+        parts.append(text[last:start])
+        parts.append(word.translate(table))
+        last = end
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return "".join(parts)
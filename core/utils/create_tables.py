@@ -1,16 +1,100 @@
 import asyncio
+import logging
+
+from sqlalchemy import BigInteger, Column, Connection, exists, func, inspect, select, text, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.schema import CreateColumn
 
 from core.database.database_connector import DatabaseConnector
-from core.database.models import Base
-from core.config import settings
+from core.database.models import Base, Dialog, Word
+from core.resources.enums import MatchMode
+
+# Rebuilt from Telegram on the next sync, so recreated instead of migrated when their columns change.
+CACHE_TABLES = {Dialog.__tablename__}
+
+
+def upgrade_schema(conn: Connection) -> None:
+    """
+    Bring tables created by older versions up to the models: add missing columns
+    (they need a server default or must be nullable), widen integer columns that became
+    BigInteger and create missing indexes.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing_types = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        existing = set(existing_types)
+        if table.name in CACHE_TABLES and existing != set(table.columns.keys()):
+            table.drop(conn)
+            table.create(conn)
+            logging.info(f"Recreated cache table {table.name}")
+            continue
+        for column in table.columns:
+            if column.name in existing:
+                widen_column(conn, column, existing_types[column.name])
+                continue
+            if not column.nullable and column.server_default is None:
+                logging.warning(f"Can't add {table.name}.{column.name}: NOT NULL without server default")
+                continue
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+            logging.info(f"Added column {table.name}.{column.name}")
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(conn)
+                logging.info(f"Created index {index.name}")
+
+
+def widen_column(conn: Connection, column: Column, existing_type) -> None:
+    # SQLite stores every INTEGER in up to 8 bytes and can't alter a column type anyway.
+    if conn.dialect.name == "sqlite":
+        return
+    if isinstance(column.type, BigInteger) and not isinstance(existing_type, BigInteger):
+        ddl = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {column.table.name} ALTER COLUMN {column.name} TYPE {ddl}"))
+        logging.info(f"Widened column {column.table.name}.{column.name} to {ddl}")
+
+
+def migrate_prefix_keywords(conn: Connection) -> None:
+    """
+    Rows saved before match modes existed keep the "|" marker in the keyword; turn them into
+    prefix rows once, so stored keywords are never parsed for markers. A row whose unmarked
+    keyword already exists stays a literal substring keyword.
+    """
+    other = aliased(Word)
+    keyword = func.substr(Word.keyword, 2)
+    result = conn.execute(
+        update(Word)
+        .where(
+            Word.match_mode == MatchMode.SUBSTRING,
+            Word.keyword.startswith("|"),
+            func.length(Word.keyword) > 1,
+            ~exists(select(other.id).where(other.keyword == keyword)),
+        )
+        .values(keyword=keyword, match_mode=MatchMode.PREFIX)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        logging.info(f"Migrated {result.rowcount} legacy prefix keywords")
 
 
 async def create_db(db):
     async with db.engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all, checkfirst=True)
+        await conn.run_sync(upgrade_schema)
+        await conn.run_sync(migrate_prefix_keywords)
         # await conn.run_sync(Base.metadata.drop_all)
 
 
 if __name__ == "__main__":
-    db_connector = DatabaseConnector(url=settings.db_url, echo=settings.db_echo)
+    from core.config import settings
+
+    db_connector = DatabaseConnector(
+        url=settings.db_url,
+        echo=settings.db_echo,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
     asyncio.run(create_db(db_connector))
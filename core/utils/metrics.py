@@ -0,0 +1,150 @@
+import asyncio
+import bisect
+import logging
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Iterator
+
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.values: dict[str, float] = {}
+
+    def inc(self, label_value: str, amount: float = 1) -> None:
+        self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for label_value, value in self.values.items():
+            yield f'{self.name}{{{self.label}="{label_value}"}} {value}'
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram, one series per label value.
+    """
+
+    def __init__(self, name: str, documentation: str, label: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = buckets
+        # label value -> [per-bucket counts (last one is +Inf), sum, count]
+        self.series: dict[str, list] = {}
+
+    def observe(self, label_value: str, value: float) -> None:
+        series = self.series.get(label_value)
+        if series is None:
+            series = self.series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, label_value: str) -> Iterator[None]:
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(label_value, perf_counter() - started)
+
+    def count(self, label_value: str) -> int:
+        series = self.series.get(label_value)
+        return series[2] if series else 0
+
+    def quantile(self, label_value: str, q: float) -> float | None:
+        """
+        Estimate like Prometheus histogram_quantile: linear interpolation inside the bucket.
+        """
+        series = self.series.get(label_value)
+        if not series or not series[2]:
+            return None
+        rank = q * series[2]
+        cumulative = 0
+        lower = 0.0
+        for upper, bucket_count in zip(self.buckets, series[0]):
+            if bucket_count and cumulative + bucket_count >= rank:
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = upper
+        return self.buckets[-1]
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for label_value, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{{{self.label}="{label_value}",le="{upper}"}} {cumulative}'
+            yield f'{self.name}_bucket{{{self.label}="{label_value}",le="+Inf"}} {count}'
+            yield f'{self.name}_sum{{{self.label}="{label_value}"}} {total}'
+            yield f'{self.name}_count{{{self.label}="{label_value}"}} {count}'
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: list[Counter | Histogram] = []
+        self.collectors: dict[str, Callable[[], dict[str, float]]] = {}
+
+    def register(self, metric: Counter | Histogram) -> Counter | Histogram:
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, prefix: str, collect: Callable[[], dict[str, float]]) -> None:
+        """
+        Export every value of collect() as a gauge named {prefix}_{key}.
+        """
+        self.collectors[prefix] = collect
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for prefix, collect in self.collectors.items():
+            for key, value in collect().items():
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("keyword_seek_stage_seconds", "Time spent in each stage of keyword_seek.", label="stage")
+)
+MESSAGES = REGISTRY.register(
+    Counter("keyword_seek_messages_total", "Messages from monitored chats by match result.", label="result")
+)
+
+
+async def _handle_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.split()
+        if len(parts) >= 2 and parts[0] == b"GET" and parts[1] == b"/metrics":
+            status, body = "200 OK", REGISTRY.render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: int) -> asyncio.Server:
+    server = await asyncio.start_server(_handle_request, host, port)
+    logging.info(f"metrics are served on http://{host}:{port}/metrics")
+    return server
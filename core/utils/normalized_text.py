@@ -0,0 +1,113 @@
+import re
+import unicodedata
+
+from core.utils.confusables import canonicalize, may_mix_scripts
+from core.utils.unicode_scripts import script_markers
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text)
+
+
+def is_token(text: str) -> bool:
+    """
+    Whether `text` is a single word run, i.e. one of NormalizedText.tokens when it occurs.
+    """
+    return _WORD.fullmatch(text) is not None
+
+
+def is_word_char(text: str, position: int) -> bool:
+    return 0 <= position < len(text) and _WORD.match(text, position) is not None
+
+
+def fold(text: str) -> str:
+    """
+    Form used for keyword comparison, applied the same way to keywords and messages.
+    """
+    folded = normalize(text).casefold()
+    if not may_mix_scripts(folded):
+        return folded
+    return canonicalize(folded, script_markers(folded))
+
+
+class NormalizedText:
+    """
+    A message prepared once for every matcher: NFKC form, casefolded form with homoglyphs
+    of mixed-script words canonicalized, word runs and their boundaries in that form and
+    per-character script markers of the casefolded form before canonicalization, the last
+    three computed on first use unless canonicalization needed the markers.
+    """
+
+    __slots__ = ("raw", "text", "folded", "canonicalized", "_tokens", "_boundaries", "_stems", "_scripts")
+
+    def __init__(self, raw: str, canonical: bool = True) -> None:
+        self.raw = raw
+        self.text = normalize(raw)
+        casefolded = self.text.casefold()
+        folded = casefolded
+        self._scripts: str | None = None
+        if canonical and may_mix_scripts(casefolded):
+            self._scripts = script_markers(casefolded)
+            folded = canonicalize(casefolded, self._scripts)
+        self.canonicalized = folded != casefolded
+        self.folded = folded
+        self._tokens: tuple[str, ...] | None = None
+        self._boundaries: frozenset[int] | None = None
+        self._stems: frozenset[str] | None = None
+
+    @classmethod
+    def of(cls, text: "str | NormalizedText") -> "NormalizedText":
+        return text if isinstance(text, NormalizedText) else cls(text)
+
+    def as_written(self) -> "NormalizedText":
+        """
+        The same message with homoglyphs left as they are, e.g. to find "abc" in "абвabc".
+        """
+        return NormalizedText(self.raw, canonical=False) if self.canonicalized else self
+
+    @property
+    def boundaries(self) -> frozenset[int]:
+        """
+        Start and end positions of word runs in `folded`, i.e. where regex \\b matches.
+        """
+        if self._boundaries is None:
+            self._scan()
+        return self._boundaries
+
+    @property
+    def tokens(self) -> tuple[str, ...]:
+        """
+        Word runs of `folded`, in order.
+        """
+        if self._tokens is None:
+            self._scan()
+        return self._tokens
+
+    @property
+    def stems(self) -> frozenset[str]:
+        """
+        Russian stems of the tokens, computed only for matchers that have stem keywords.
+        """
+        if self._stems is None:
+            from core.utils.stemming import stem
+
+            self._stems = frozenset(stem(token) for token in self.tokens)
+        return self._stems
+
+    def _scan(self) -> None:
+        tokens = []
+        positions = set()
+        for match in _WORD.finditer(self.folded):
+            tokens.append(match.group())
+            positions.add(match.start())
+            positions.add(match.end())
+        self._tokens = tuple(tokens)
+        self._boundaries = frozenset(positions)
+
+    @property
+    def scripts(self) -> str:
+        if self._scripts is None:
+            self._scripts = script_markers(self.folded)
+        return self._scripts
@@ -0,0 +1,37 @@
+from functools import lru_cache
+
+import snowballstemmer
+
+from core.utils.normalized_text import fold, is_token
+
+# Distinct word forms seen in messages; a Russian chat vocabulary fits well within this.
+STEM_CACHE_SIZE = 65_536
+
+_stemmer = snowballstemmer.stemmer("russian")
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(token: str) -> str:
+    """
+    Snowball Russian stem of a casefolded token; other scripts come back unchanged.
+    """
+    return _stemmer.stemWord(token)
+
+
+def stem_keyword(keyword: str) -> str | None:
+    """
+    Stem stored with a stem-mode keyword, or None when the keyword is not a single word.
+    """
+    folded = fold(keyword)
+    return stem(folded) if is_token(folded) else None
+
+
+def stem_cache_stats() -> dict[str, float]:
+    info = stem.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
@@ -0,0 +1,57 @@
+import re
+import sys
+import unicodedata
+from functools import cache
+
+NOT_A_LETTER = " "
+FIRST_MARKER = 0x21
+
+# Two adjacent letters whose script markers differ.
+_MIXED_SCRIPT_PAIR = re.compile(r"([^ ])(?!\1)[^ ]")
+
+
+@cache
+def script_table() -> tuple[str, tuple[str | None, ...]]:
+    """
+    Build a str.translate table covering every code point: letters map to one marker
+    character per script (the first word of their Unicode name, None if unnamed), everything
+    else maps to a space. Returns the table and the script name of each marker.
+    """
+    scripts: dict[str | None, str] = {}
+    table = []
+    for code_point in range(sys.maxunicode + 1):
+        char = chr(code_point)
+        if not char.isalpha():
+            table.append(NOT_A_LETTER)
+            continue
+        name = unicodedata.name(char, None)
+        script = name.split()[0] if name else None
+        marker = scripts.get(script)
+        if marker is None:
+            marker = scripts[script] = chr(FIRST_MARKER + len(scripts))
+        table.append(marker)
+    return "".join(table), tuple(scripts)
+
+
+def script_of(char: str) -> str | None:
+    assert len(char) == 1
+    table, scripts = script_table()
+    marker = table[ord(char)]
+    if marker == NOT_A_LETTER:
+        return None
+    return scripts[ord(marker) - FIRST_MARKER]
+
+
+def script_markers(text: str) -> str:
+    """
+    One marker per character of text: the script marker for letters, a space otherwise.
+    """
+    table, _ = script_table()
+    return text.translate(table)
+
+
+def has_mixed_script_word(markers: str) -> bool:
+    """
+    Takes the output of script_markers.
+    """
+    return _MIXED_SCRIPT_PAIR.search(markers) is not None
@@ -1,89 +1,644 @@
+import argparse
 import asyncio
 import logging
+import multiprocessing
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import partial
 
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
-from telethon import TelegramClient, events
+from telethon import TelegramClient
 
 from core.config import settings
-from core.database.crud import get_active_groups_dict, get_keywords
+from core.database.crud import save_dialogs
 from core.database.database_connector import DatabaseConnector
-from core.resources.controllers import join_group, prepare_text_when_match, text_matches
-from core.resources.enums import EntityType, IgnoreReason
+from core.database.match_log import MatchLogWriter
+from core.database.models import Group
+from core.database.snapshot import Snapshot
+from core.resources.backfill import Backfill
+from core.resources.controllers import (
+    invite_hash,
+    join_group,
+    join_group_via_link,
+    prepare_text_when_match,
+    text_matches,
+)
+from core.resources.enums import IgnoreReason, OverflowPolicy, Role, Topic
+from core.resources.dedup import DuplicateFilter, notify_once
+from core.resources.dialogs import fetch_dialog_ids
 from core.resources.errors_handlers import router as error_router
+from core.resources.gap_recovery import GapRecovery
 from core.resources.handlers import router as base_router
+from core.resources.matching_pool import MatchingPool
 from core.resources.middlewares import SessionMiddleware, UpdatesDumperMiddleware
+from core.resources.notifier import NotificationDispatcher
 from core.resources.notify_admin import on_shutdown_notify, on_startup_notify
+from core.resources.sender_cache import SenderCache
+from core.resources.shards import ShardManager
+from core.resources.telethon_events import MonitoredChatMessage, RemoteMessage
+from core.utils.bus import Broker, BusClient
 from core.utils.create_tables import create_db
-from core.utils.result import Err, Ok
+from core.utils.metrics import MESSAGES, REGISTRY, STAGE_SECONDS, start_metrics_server
+from core.utils.result import Err, Ok, Result
+from core.utils.stemming import stem_cache_stats
+from core.utils.unicode_scripts import script_table
 
 
-async def keyword_seek(event, bot: Bot, db: DatabaseConnector):
-    if event.sender_id == settings.ADMIN_ID:
-        logging.info(f'new message: {event.text} in group {event.chat_id}')
-    async with db.session_factory() as internal_session:
-        groups = await get_active_groups_dict(internal_session)
-        keywords = await get_keywords(internal_session, EntityType.WORD)
-        minus_words = await get_keywords(internal_session, EntityType.MINUS_WORD)
-    if event.chat_id not in groups:
-        return
-    match text_matches(event.text, keywords, minus_words):
+def group_anchor(group: Group) -> str:
+    return f'<a href="{group.link}">{group.title}</a>'
+
+
+def record_match_result(event, result: Result[str, IgnoreReason], match_log: MatchLogWriter) -> str | None:
+    """
+    Count and log the outcome of matching one message; returns the keyword when it matched.
+    """
+    MESSAGES.inc("match" if isinstance(result, Ok) else result.value.name.lower())
+    match_log.record(event, result)
+    match result:
         case Err(IgnoreReason.NO_MATCH):
             logging.debug(f"didn't find any matches: {event.text} in group {event.chat_id}")
-            return
         case Err(IgnoreReason.MINUS_WORD_MATCH):
             logging.info("Filtered out by minus-word")
-            return
         case Err(IgnoreReason.SPAM_EVADING_MATCH):
             logging.info("Spam detected")
-            return
         case Ok(keyword):
-            text = await prepare_text_when_match(event=event, groups=groups, keyword=keyword)
-            await bot.send_message(chat_id=settings.GROUP_ID, text=text, disable_web_page_preview=True)
+            return keyword
+    return None
 
 
-async def sync_missing_groups(db_connector, client):
-    async with db_connector.session_factory() as session:
-        subscribed_groups = []
-        async for dialog in client.iter_dialogs():
-            subscribed_groups.append(dialog.id)
+async def handle_match_result(
+        event,
+        snapshot: Snapshot,
+        result: Result[str, IgnoreReason],
+        notifier: NotificationDispatcher,
+        sender_cache: SenderCache,
+        dedup: DuplicateFilter,
+        match_log: MatchLogWriter,
+):
+    group = snapshot.groups.get(event.chat_id)
+    if group is None:
+        # Deactivated while the message waited in the matching pool.
+        logging.info(f"Group {event.chat_id} is no longer monitored, skipping its message")
+        return
+    keyword = record_match_result(event, result, match_log)
+    if keyword is None:
+        return
 
-        active_groups = await get_active_groups_dict(session)
-        for group_id in active_groups:
-            if group_id not in subscribed_groups:
-                await join_group(client, group_id)
+    async def render() -> str:
+        return await prepare_text_when_match(
+            event=event,
+            groups=snapshot.groups,
+            keyword=keyword,
+            sender_cache=sender_cache,
+            homoglyphs=settings.homoglyph_policy,
+        )
 
+    if not await notify_once(dedup, notifier, event.text, group_anchor(group), render):
+        logging.info(f"No new notification for the match in group {event.chat_id}")
 
-async def main():
-    db_connector = DatabaseConnector(url=settings.db_url, echo=settings.db_echo)
-    await create_db(db_connector)
-    client = TelegramClient('test_client_session',
-                            settings.API_ID,
-                            settings.API_HASH.get_secret_value(),
-                            request_retries=5000,
-                            retry_delay=10,
-                            connection_retries=5000,
-                            )
-    client.parse_mode = 'HTML'
-    bot = Bot(token=settings.BOT_TOKEN.get_secret_value(), parse_mode='HTML')
-    storage = MemoryStorage()
-    dispatcher = Dispatcher(storage=storage, client=client, db=db_connector)
+
+async def keyword_seek(
+        event,
+        notifier: NotificationDispatcher,
+        db: DatabaseConnector,
+        sender_cache: SenderCache,
+        dedup: DuplicateFilter,
+        match_log: MatchLogWriter,
+        matching_pool: MatchingPool | None = None,
+):
+    if event.sender_id == settings.ADMIN_ID:
+        logging.info(f'new message: {event.text} in group {event.chat_id}')
+    with STAGE_SECONDS.time("snapshot"):
+        snapshot = db.snapshot.current
+    if event.chat_id not in snapshot.groups:
+        return
+    if matching_pool is not None:
+        await matching_pool.submit(event)
+        return
+    with STAGE_SECONDS.time("match"):
+        result = text_matches(event.text, *snapshot.matchers.for_chat(event.chat_id), settings.homoglyph_policy)
+    await handle_match_result(event, snapshot, result, notifier, sender_cache, dedup, match_log)
+
+
+async def sync_shard_groups(
+        db_connector: DatabaseConnector, shard: str, client: TelegramClient, group_ids: set[int], full: bool = False
+):
+    subscribed_groups = await fetch_dialog_ids(db_connector, shard, client, full)
+    missing_groups = group_ids - subscribed_groups
+    if not missing_groups:
+        return
+    logging.info(f"{shard}: joining {len(missing_groups)} missing groups")
+    semaphore = asyncio.Semaphore(settings.join_concurrency)
+    groups = db_connector.snapshot.current.groups
+
+    async def join(group_id: int):
+        group = groups.get(group_id)
+        # Private groups added by invite link can only be joined through the link.
+        link_hash = invite_hash(group.link) if group is not None and group.link else None
+        async with semaphore:
+            if link_hash:
+                joined = await join_group_via_link(client, link_hash)
+            else:
+                joined = await join_group(client, group_id)
+            if not joined:
+                return
+        # Recorded right away, so an interrupted sync resumes with the groups still missing.
+        async with db_connector.session_factory.begin() as session:
+            await save_dialogs(shard, {group_id: None}, session)
+
+    await asyncio.gather(*(join(group_id) for group_id in missing_groups))
+
+
+async def sync_missing_groups(db_connector: DatabaseConnector, shards: ShardManager, full: bool = False):
+    assignment = shards.assignment(db_connector.snapshot.current.groups)
+    await asyncio.gather(*(
+        sync_shard_groups(db_connector, name, shards.clients[name], group_ids, full)
+        for name, group_ids in assignment.items()
+    ))
+
+
+async def rescan_dialogs(db_connector: DatabaseConnector, shards: ShardManager):
+    """
+    Rejoin the groups a session was removed from; the scan on startup and reload only sees
+    dialogs with new messages.
+    """
+    while True:
+        await asyncio.sleep(settings.dialog_rescan_interval)
+        try:
+            await sync_missing_groups(db_connector, shards, full=True)
+        except Exception:
+            logging.exception("Failed to rescan dialogs")
+
+
+def make_db_connector() -> DatabaseConnector:
+    return DatabaseConnector(
+        url=settings.db_url,
+        echo=settings.db_echo,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+
+
+def make_shards(
+        sessions: list[str], local: list[str] | None = None, sequential_updates: bool = False
+) -> ShardManager:
+    shards = ShardManager(sessions,
+                          settings.API_ID,
+                          settings.API_HASH.get_secret_value(),
+                          local=local,
+                          request_retries=5000,
+                          retry_delay=10,
+                          connection_retries=5000,
+                          sequential_updates=sequential_updates,
+                          )
+    for client in shards.clients.values():
+        client.parse_mode = 'HTML'
+    return shards
+
+
+def make_notifier(bot: Bot) -> NotificationDispatcher:
+    return NotificationDispatcher(
+        bot=bot,
+        chat_id=settings.GROUP_ID,
+        rate_per_minute=settings.notify_rate_per_minute,
+        burst=settings.notify_burst,
+        max_queue=settings.notify_queue_size,
+    )
+
+
+def make_sender_cache() -> SenderCache:
+    return SenderCache(
+        max_size=settings.sender_cache_size,
+        ttl=settings.sender_cache_ttl,
+        resolve_timeout=settings.sender_resolve_timeout,
+    )
+
+
+def make_match_log(db_connector: DatabaseConnector) -> MatchLogWriter:
+    return MatchLogWriter(
+        db_connector.session_factory,
+        batch_size=settings.match_log_batch_size,
+        flush_interval=settings.match_log_flush_interval,
+    )
+
+
+def make_backfill(db_connector: DatabaseConnector, shards: ShardManager, on_message) -> Backfill:
+    return Backfill(
+        db_connector,
+        shards,
+        on_message,
+        concurrency=settings.backfill_concurrency,
+        checkpoint_every=settings.backfill_checkpoint_every,
+    )
+
+
+def make_gap_recovery(db_connector: DatabaseConnector, on_message) -> GapRecovery:
+    return GapRecovery(
+        db_connector,
+        on_message,
+        concurrency=settings.gap_recovery_concurrency,
+        max_messages=settings.gap_recovery_max_messages,
+        flush_interval=settings.last_seen_flush_interval,
+        check_interval=settings.reconnect_check_interval,
+    )
+
+
+def make_dispatcher(**data) -> Dispatcher:
+    dispatcher = Dispatcher(storage=MemoryStorage(), **data)
     dispatcher.message.middleware(SessionMiddleware())
     dispatcher.callback_query.middleware(SessionMiddleware())
     dispatcher.update.outer_middleware(UpdatesDumperMiddleware())
     dispatcher.startup.register(on_startup_notify)
     dispatcher.shutdown.register(on_shutdown_notify)
     dispatcher.include_routers(base_router, error_router)
+    return dispatcher
 
-    # noinspection PyUnresolvedReferences
-    await client.start()
 
-    await sync_missing_groups(db_connector, client)
+async def main():
+    db_connector = make_db_connector()
+    await create_db(db_connector)
+    await db_connector.snapshot.rebuild()
+    script_table()
+    bot = Bot(token=settings.BOT_TOKEN.get_secret_value(), parse_mode='HTML')
+    notifier = make_notifier(bot)
+    sender_cache = make_sender_cache()
+    match_log = make_match_log(db_connector)
+    dedup = DuplicateFilter(window=settings.dedup_window, max_entries=settings.dedup_max_entries)
+    matching_pool = None
+    if settings.matching_workers > 0:
+        matching_pool = MatchingPool(
+            snapshot=db_connector.snapshot,
+            on_result=lambda event, snapshot, result: handle_match_result(
+                event, snapshot, result, notifier, sender_cache, dedup, match_log
+            ),
+            workers=settings.matching_workers,
+            max_queue=settings.matching_queue_size,
+            overflow=settings.matching_overflow,
+            homoglyphs=settings.homoglyph_policy,
+        )
+    # A pool that blocks on a full queue slows the update loop down only if updates are
+    # dispatched one at a time; concurrent dispatch would pile up a waiting task per update.
+    shards = make_shards(
+        settings.telegram_sessions,
+        sequential_updates=matching_pool is not None and settings.matching_overflow is OverflowPolicy.BLOCK,
+    )
+    # Replayed history is matched inline: it arrives no faster than Telegram pages it out.
+    backfill = make_backfill(
+        db_connector,
+        shards,
+        lambda event: keyword_seek(event, notifier, db_connector, sender_cache, dedup, match_log),
+    )
+    gap_recovery = make_gap_recovery(
+        db_connector,
+        lambda event: keyword_seek(event, notifier, db_connector, sender_cache, dedup, match_log, matching_pool),
+    )
+    REGISTRY.register_collector("keyword_seek_notifier", notifier.stats)
+    REGISTRY.register_collector("keyword_seek_sender_cache", sender_cache.stats)
+    REGISTRY.register_collector("keyword_seek_dedup", dedup.stats)
+    REGISTRY.register_collector("keyword_seek_match_log", match_log.stats)
+    REGISTRY.register_collector("keyword_seek_stem_cache", stem_cache_stats)
+    REGISTRY.register_collector("keyword_seek_backfill", backfill.stats)
+    REGISTRY.register_collector("keyword_seek_gap_recovery", gap_recovery.stats)
+    if matching_pool is not None:
+        REGISTRY.register_collector("keyword_seek_matching_pool", matching_pool.stats)
+    if settings.metrics_port is not None:
+        await start_metrics_server(settings.metrics_host, settings.metrics_port)
+    dispatcher = make_dispatcher(
+        client=shards.primary,
+        shards=shards,
+        db=db_connector,
+        notifier=notifier,
+        sender_cache=sender_cache,
+        dedup=dedup,
+        matching_pool=matching_pool,
+        backfill=backfill,
+    )
+    dispatcher.shutdown.register(gap_recovery.stop)
+    dispatcher.shutdown.register(notifier.stop)
+    dispatcher.shutdown.register(match_log.stop)
+    if matching_pool is not None:
+        dispatcher.shutdown.register(matching_pool.stop)
 
-    client.add_event_handler(lambda x: keyword_seek(x, bot, db_connector), events.NewMessage())
+    await shards.start()
+
+    await sync_missing_groups(db_connector, shards)
+    rescan = asyncio.create_task(rescan_dialogs(db_connector, shards))
+
+    async def stop_rescan():
+        rescan.cancel()
+
+    dispatcher.shutdown.register(stop_rescan)
+
+    notifier.start()
+    match_log.start()
+    if matching_pool is not None:
+        matching_pool.start()
+    for name, client in shards.clients.items():
+        owns = partial(shards.owns, name) if len(shards.names) > 1 else None
+        client.add_event_handler(
+            partial(gap_recovery.handle, name), MonitoredChatMessage(db_connector.snapshot, owns=owns)
+        )
+    # Live messages are held until the messages missed while offline are replayed.
+    gap_recovery.start(shards.clients, lambda name: shards.assignment(db_connector.snapshot.current.groups)[name])
 
     await dispatcher.start_polling(bot)
 
 
+def render_topic(shard: str) -> str:
+    return f"{Topic.RENDER.value}.{shard}"
+
+
+async def run_ingest(session: str, metrics_port: int | None = None):
+    """
+    One Telegram session: forwards messages from the groups it owns to the matchers and
+    renders the matches they send back, since only this session can resolve their senders.
+    """
+    db_connector = make_db_connector()
+    await db_connector.snapshot.rebuild()
+    shards = make_shards(settings.telegram_sessions, local=[session])
+    client = shards.clients[session]
+    sender_cache = make_sender_cache()
+    bus = BusClient(settings.ipc_socket)
+    # Events awaiting a verdict, kept so a match can reuse the sender Telethon already has.
+    pending: OrderedDict[tuple[int, int], object] = OrderedDict()
+
+    async def forward(event):
+        pending[(event.chat_id, event.id)] = event
+        if len(pending) > settings.matching_queue_size:
+            pending.popitem(last=False)
+        await bus.publish(Topic.MESSAGES.value, session, event.chat_id, event.id, event.sender_id, event.text)
+
+    async def on_render(chat_id: int, message_id: int, sender_id: int | None, text: str, keyword: str):
+        event = pending.pop((chat_id, message_id), None)
+        groups = db_connector.snapshot.current.groups
+        if chat_id not in groups:
+            logging.info(f"Group {chat_id} is no longer monitored, skipping its match")
+            return
+        if event is None:
+            event = RemoteMessage(chat_id, message_id, sender_id, text, client)
+        rendered = await prepare_text_when_match(
+            event=event,
+            groups=groups,
+            keyword=keyword,
+            sender_cache=sender_cache,
+            homoglyphs=settings.homoglyph_policy,
+        )
+        await bus.publish(Topic.NOTIFY.value, chat_id, text, rendered)
+
+    async def on_reload(version: int):
+        logging.info(f"{session}: reloading after admin snapshot {version}")
+        await db_connector.snapshot.rebuild()
+        await sync_missing_groups(db_connector, shards)
+
+    gap_recovery = make_gap_recovery(db_connector, forward)
+
+    bus.subscribe(render_topic(session), on_render)
+    bus.subscribe(Topic.RELOAD.value, on_reload)
+    REGISTRY.register_collector("keyword_seek_sender_cache", sender_cache.stats)
+    REGISTRY.register_collector("keyword_seek_bus", bus.stats)
+    REGISTRY.register_collector("keyword_seek_gap_recovery", gap_recovery.stats)
+    if metrics_port is not None:
+        await start_metrics_server(settings.metrics_host, metrics_port)
+
+    await shards.start()
+    await sync_missing_groups(db_connector, shards)
+    rescan = asyncio.create_task(rescan_dialogs(db_connector, shards))
+    await bus.connect()
+    client.add_event_handler(
+        partial(gap_recovery.handle, session),
+        MonitoredChatMessage(db_connector.snapshot, owns=partial(shards.owns, session)),
+    )
+    gap_recovery.start(shards.clients, lambda name: shards.assignment(db_connector.snapshot.current.groups)[name])
+    try:
+        # noinspection PyUnresolvedReferences
+        await client.run_until_disconnected()
+    finally:
+        rescan.cancel()
+        await gap_recovery.stop()
+        await bus.close()
+
+
+async def run_matcher(metrics_port: int | None = None):
+    """
+    Matches forwarded messages against the keyword snapshot and logs every outcome.
+    Start more of these to spread matching across cores: the broker hands each message to one.
+    """
+    db_connector = make_db_connector()
+    await db_connector.snapshot.rebuild()
+    script_table()
+    match_log = make_match_log(db_connector)
+    bus = BusClient(settings.ipc_socket)
+
+    async def on_message(shard: str, chat_id: int, message_id: int, sender_id: int | None, text: str):
+        snapshot = db_connector.snapshot.current
+        if chat_id not in snapshot.groups:
+            return
+        with STAGE_SECONDS.time("match"):
+            result = text_matches(text, *snapshot.matchers.for_chat(chat_id), settings.homoglyph_policy)
+        keyword = record_match_result(RemoteMessage(chat_id, message_id, sender_id, text), result, match_log)
+        if keyword is not None:
+            await bus.publish(render_topic(shard), chat_id, message_id, sender_id, text, keyword)
+
+    async def on_reload(version: int):
+        await db_connector.snapshot.rebuild()
+
+    bus.subscribe(Topic.MESSAGES.value, on_message)
+    bus.subscribe(Topic.RELOAD.value, on_reload)
+    REGISTRY.register_collector("keyword_seek_match_log", match_log.stats)
+    REGISTRY.register_collector("keyword_seek_stem_cache", stem_cache_stats)
+    REGISTRY.register_collector("keyword_seek_bus", bus.stats)
+    if metrics_port is not None:
+        await start_metrics_server(settings.metrics_host, metrics_port)
+
+    match_log.start()
+    await bus.connect()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await bus.close()
+        await match_log.stop()
+
+
+async def run_bot(metrics_port: int | None = None):
+    """
+    The admin bot and the notification queue. Admin edits are broadcast to every worker;
+    links are resolved through its own Telegram session, as session files can't be shared
+    between processes, and the owning ingest joins the group when it reloads.
+    """
+    db_connector = make_db_connector()
+    await create_db(db_connector)
+    await db_connector.snapshot.rebuild()
+    admin = make_shards([settings.admin_session])
+    # Ownership only: the sessions themselves run in the ingest processes.
+    shards = make_shards(settings.telegram_sessions, local=[])
+    bot = Bot(token=settings.BOT_TOKEN.get_secret_value(), parse_mode='HTML')
+    notifier = make_notifier(bot)
+    dedup = DuplicateFilter(window=settings.dedup_window, max_entries=settings.dedup_max_entries)
+    bus = BusClient(settings.ipc_socket)
+
+    async def on_notify(chat_id: int, text: str, rendered: str):
+        group = db_connector.snapshot.current.groups.get(chat_id)
+        if group is None:
+            return
+        async def render() -> str:
+            return rendered
+
+        if not await notify_once(dedup, notifier, text, group_anchor(group), render):
+            logging.info(f"No new notification for the match in group {chat_id}")
+
+    bus.subscribe(Topic.NOTIFY.value, on_notify)
+    REGISTRY.register_collector("keyword_seek_notifier", notifier.stats)
+    REGISTRY.register_collector("keyword_seek_dedup", dedup.stats)
+    REGISTRY.register_collector("keyword_seek_bus", bus.stats)
+    if metrics_port is not None:
+        await start_metrics_server(settings.metrics_host, metrics_port)
+    dispatcher = make_dispatcher(
+        client=admin.primary,
+        shards=shards,
+        db=db_connector,
+        notifier=notifier,
+        dedup=dedup,
+        bus=bus,
+    )
+    dispatcher.shutdown.register(notifier.stop)
+    dispatcher.shutdown.register(bus.close)
+
+    await admin.start()
+    await bus.connect()
+    notifier.start()
+    await dispatcher.start_polling(bot)
+
+
+async def run_broker():
+    broker = Broker(settings.ipc_socket, broadcast=[Topic.RELOAD.value], max_pending=settings.bus_max_pending)
+    REGISTRY.register_collector("keyword_seek_broker", broker.stats)
+    if settings.metrics_port is not None:
+        await start_metrics_server(settings.metrics_host, settings.metrics_port)
+    await broker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await broker.stop()
+
+
+async def run_backfill(limit: int | None, days: int | None, group_id: int | None = None):
+    """
+    One-off scan of the recent history of every active group, or of one, through the matcher
+    and the notification queue. It uses the Telegram sessions, so stop the monitoring
+    processes first; an interrupted scan resumes from its checkpoints on the next run.
+    """
+    db_connector = make_db_connector()
+    await create_db(db_connector)
+    await db_connector.snapshot.rebuild()
+    script_table()
+    shards = make_shards(settings.telegram_sessions)
+    bot = Bot(token=settings.BOT_TOKEN.get_secret_value(), parse_mode='HTML')
+    notifier = make_notifier(bot)
+    sender_cache = make_sender_cache()
+    match_log = make_match_log(db_connector)
+    dedup = DuplicateFilter(window=settings.dedup_window, max_entries=settings.dedup_max_entries)
+    backfill = make_backfill(
+        db_connector,
+        shards,
+        lambda event: keyword_seek(event, notifier, db_connector, sender_cache, dedup, match_log),
+    )
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days) if days else None
+    group_ids = [group_id] if group_id is not None else list(db_connector.snapshot.current.groups)
+
+    await shards.start()
+    notifier.start()
+    match_log.start()
+    try:
+        stats = await backfill.run(group_ids, limit, since)
+        logging.info(f"Backfill finished: {stats}")
+        await notifier.drain()
+    finally:
+        await match_log.stop()
+        await notifier.stop()
+        await bot.session.close()
+        for client in shards.clients.values():
+            await client.disconnect()
+
+
+def run_role(role: Role, session: str | None = None, metrics_port: int | None = None):
+    match role:
+        case Role.INGEST:
+            asyncio.run(run_ingest(session, metrics_port))
+        case Role.MATCHER:
+            asyncio.run(run_matcher(metrics_port))
+        case Role.BOT:
+            asyncio.run(run_bot(metrics_port))
+        case _:
+            raise ValueError(f"Unexpected worker role: {role}")
+
+
+async def run_split():
+    """
+    Runs the broker here and every other role in its own process: the admin bot,
+    settings.matcher_processes matchers and one ingest per Telegram session.
+    Sessions must already be authorized, as the workers have no terminal to log in from.
+    """
+    db_connector = make_db_connector()
+    await create_db(db_connector)
+    await db_connector.engine.dispose()
+    broker = Broker(settings.ipc_socket, broadcast=[Topic.RELOAD.value], max_pending=settings.bus_max_pending)
+    REGISTRY.register_collector("keyword_seek_broker", broker.stats)
+    if settings.metrics_port is not None:
+        await start_metrics_server(settings.metrics_host, settings.metrics_port)
+    await broker.start()
+
+    roles = [(Role.BOT, None)]
+    roles += [(Role.MATCHER, None)] * settings.matcher_processes
+    roles += [(Role.INGEST, session) for session in settings.telegram_sessions]
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for i, (role, session) in enumerate(roles, start=1):
+        metrics_port = settings.metrics_port + i if settings.metrics_port is not None else None
+        process = context.Process(
+            target=run_role, args=(role, session, metrics_port), name=f"{role.value}-{session or i}"
+        )
+        process.start()
+        processes.append(process)
+    loop = asyncio.get_running_loop()
+    try:
+        await asyncio.wait(
+            [loop.run_in_executor(None, process.join) for process in processes],
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        logging.error(f"{[p.name for p in processes if not p.is_alive()]} exited, stopping the others")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        await broker.stop()
+
+
 if __name__ == '__main__':
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--role", choices=[role.value for role in Role], default=Role.ALL.value)
+    parser.add_argument("--session", help="Telegram session for the ingest role")
+    parser.add_argument("--limit", type=int, help="backfill: last N messages of each group")
+    parser.add_argument("--days", type=int, help="backfill: messages of the last N days")
+    parser.add_argument("--group", type=int, help="backfill: telegram id of one group instead of all")
+    args = parser.parse_args()
+    match Role(args.role):
+        case Role.ALL:
+            asyncio.run(main())
+        case Role.SPLIT:
+            asyncio.run(run_split())
+        case Role.BROKER:
+            asyncio.run(run_broker())
+        case Role.BACKFILL:
+            if args.limit is None and args.days is None:
+                parser.error("--limit or --days is required for the backfill role")
+            asyncio.run(run_backfill(args.limit, args.days, args.group))
+        case Role.INGEST:
+            if args.session is None:
+                parser.error("--session is required for the ingest role")
+            run_role(Role.INGEST, args.session, settings.metrics_port)
+        case role:
+            run_role(role, metrics_port=settings.metrics_port)
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from telethon.errors import FloodWaitError
+
+from core.database.crud import get_backfill_checkpoint
+from core.database.database_connector import DatabaseConnector
+from core.database.models import Base, Group
+from core.resources.backfill import Backfill
+from core.resources.controllers import find_group, parse_backfill_args
+
+NOW = datetime(2024, 5, 10, 12, 0)
+
+
+def make_message(id: int, text: str = "python", out: bool = False):
+    date = (NOW - timedelta(hours=100 - id)).replace(tzinfo=timezone.utc)
+    sender = SimpleNamespace(id=7, first_name="Ivan")
+    return SimpleNamespace(id=id, message=text, out=out, sender_id=7, sender=sender, date=date)
+
+
+class FakeClient:
+    """
+    iter_messages over a fixed history, newest first, failing once after `fail_after` messages.
+    """
+
+    def __init__(self, messages, fail_after: int | None = None, error: Exception | None = None):
+        self.messages = sorted(messages, key=lambda message: -message.id)
+        self.fail_after = fail_after
+        self.error = error
+        self.calls = []
+
+    async def iter_messages(self, chat_id, limit=None, offset_id=0):
+        self.calls.append((chat_id, limit, offset_id))
+        messages = [message for message in self.messages if not offset_id or message.id < offset_id][:limit]
+        for i, message in enumerate(messages):
+            if self.fail_after is not None and i == self.fail_after:
+                self.fail_after = None
+                raise self.error
+            yield message
+
+
+class TestBackfill(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db = DatabaseConnector(url='sqlite+aiosqlite://')
+        async with self.db.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with self.db.session_factory.begin() as session:
+            session.add(Group(telegram_id=-1001, link='https://t.me/first', title='First'))
+        await self.db.snapshot.rebuild()
+        self.seen = []
+        self.senders = []
+
+    def make_backfill(self, client, checkpoint_every=2) -> Backfill:
+        async def on_message(event):
+            self.seen.append((event.chat_id, event.id, event.text))
+            self.senders.append(await event.get_sender())
+
+        shards = SimpleNamespace(client_for=lambda group_id: client)
+        return Backfill(self.db, shards, on_message, concurrency=2, checkpoint_every=checkpoint_every)
+
+    async def checkpoint(self):
+        async with self.db.session_factory() as session:
+            return await get_backfill_checkpoint(self.db.snapshot.current.groups[-1001].id, session)
+
+    async def test_limit_skips_outgoing_and_empty_messages(self):
+        messages = [make_message(1), make_message(2, out=True), make_message(3, text=""), make_message(4), make_message(5)]
+        backfill = self.make_backfill(FakeClient(messages))
+
+        stats = await backfill.run([-1001, -999], limit=4)
+
+        self.assertEqual(self.seen, [(-1001, 5, "python"), (-1001, 4, "python")])
+        # The sender fetched with the message is used without resolving it again.
+        self.assertEqual([sender.first_name for sender in self.senders], ["Ivan", "Ivan"])
+        self.assertEqual(stats, {"scanned": 4, "groups_done": 1, "groups_failed": 0, "flood_waits": 0})
+        checkpoint = await self.checkpoint()
+        self.assertEqual((checkpoint.offset_id, checkpoint.remaining, checkpoint.scanned), (2, 0, 4))
+        self.assertIsNotNone(checkpoint.finished_at)
+
+    async def test_interrupted_backfill_resumes_from_checkpoint(self):
+        messages = [make_message(i) for i in range(1, 8)]
+        client = FakeClient(messages, fail_after=3, error=ConnectionError())
+        backfill = self.make_backfill(client)
+
+        stats = await backfill.run([-1001], limit=6)
+        self.assertEqual(stats["groups_failed"], 1)
+        checkpoint = await self.checkpoint()
+        self.assertEqual((checkpoint.offset_id, checkpoint.remaining), (6, 4))
+        self.assertIsNone(checkpoint.finished_at)
+
+        # A new request does not restart the unfinished scan.
+        self.seen.clear()
+        await backfill.run([-1001], limit=100)
+        self.assertEqual([message_id for _, message_id, _ in self.seen], [5, 4, 3, 2])
+        self.assertEqual(client.calls[-1], (-1001, 4, 6))
+        self.assertIsNotNone((await self.checkpoint()).finished_at)
+
+        # A finished scan is started over from the newest message.
+        self.seen.clear()
+        await backfill.run([-1001], limit=1)
+        self.assertEqual([message_id for _, message_id, _ in self.seen], [7])
+
+    async def test_since_stops_at_older_messages_and_waits_out_floods(self):
+        messages = [make_message(i) for i in range(90, 101)]
+        client = FakeClient(messages, fail_after=2, error=FloodWaitError(request=None, capture=0))
+        backfill = self.make_backfill(client, checkpoint_every=100)
+
+        stats = await backfill.run([-1001], since=NOW - timedelta(hours=5))
+
+        self.assertEqual([message_id for _, message_id, _ in self.seen], [100, 99, 98, 97, 96, 95])
+        self.assertEqual(stats["flood_waits"], 1)
+        self.assertEqual(client.calls[1], (-1001, None, 99))
+        self.assertIsNotNone((await self.checkpoint()).finished_at)
+
+
+class TestBackfillArgs(TestCase):
+    def test_parse_backfill_args(self):
+        self.assertEqual(parse_backfill_args("500"), (500, None, None))
+        self.assertEqual(parse_backfill_args("3d @first", now=NOW), (None, NOW - timedelta(days=3), "@first"))
+        for args in (None, "", "0", "-5", "3w", "1 2 3"):
+            with self.assertRaises(ValueError):
+                parse_backfill_args(args)
+
+    def test_find_group(self):
+        first = Group(telegram_id=-1001, link='https://t.me/First', title='First')
+        groups = {-1001: first}
+        self.assertIs(find_group(groups, "-1001"), first)
+        self.assertIs(find_group(groups, "@first"), first)
+        self.assertIs(find_group(groups, "t.me/first"), first)
+        self.assertIsNone(find_group(groups, "second"))
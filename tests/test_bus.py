@@ -0,0 +1,120 @@
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from core.utils.bus import SUBSCRIBE, Broker, BusClient, decode, encode
+
+
+class TestEnvelope(TestCase):
+    def test_round_trip(self):
+        frame = encode("messages", ("a", -1001, 7, None, "текст"))
+        self.assertEqual(decode(frame), ("messages", ("a", -1001, 7, None, "текст")))
+
+
+class TestBroker(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "bus.sock")
+        self.broker = Broker(self.path, broadcast=["reload"])
+        await self.broker.start()
+        self.clients = []
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            await client.close()
+        await self.broker.stop()
+        self.tmp.cleanup()
+
+    async def client(self, **handlers) -> BusClient:
+        client = BusClient(self.path)
+        for topic, handler in handlers.items():
+            client.subscribe(topic, handler)
+        await client.connect()
+        self.clients.append(client)
+        return client
+
+    async def test_queue_topic_is_round_robin_and_broadcast_reaches_all(self):
+        received = {"a": [], "b": []}
+
+        def recorder(name):
+            async def handler(*fields):
+                received[name].append(fields)
+            return handler
+
+        await self.client(messages=recorder("a"), reload=recorder("a"))
+        await self.client(messages=recorder("b"), reload=recorder("b"))
+        publisher = await self.client()
+        await asyncio.sleep(0.01)
+
+        for i in range(4):
+            await publisher.publish("messages", i)
+        await publisher.publish("reload", 1)
+        await publisher.publish("nobody", 1)
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(received["a"], [(0,), (2,), (1,)])
+        self.assertEqual(received["b"], [(1,), (3,), (1,)])
+        self.assertEqual(self.broker.stats()["routed"], 5)
+        self.assertEqual(self.broker.stats()["unrouted"], 1)
+
+    async def stuck_subscriber(self, *topics) -> asyncio.StreamWriter:
+        """
+        A connection that subscribes and then never reads, like a hung process.
+        """
+        reader, writer = await asyncio.open_unix_connection(self.path)
+        writer.write(encode(SUBSCRIBE, topics))
+        await writer.drain()
+        self.addAsyncCleanup(self.close_writer, writer)
+        return writer
+
+    @staticmethod
+    async def close_writer(writer):
+        writer.close()
+
+    async def test_slow_subscriber_does_not_block_the_others(self):
+        self.broker.max_pending = 100
+        received = []
+
+        async def handler(*fields):
+            received.append(fields)
+
+        await self.stuck_subscriber("reload", "messages")
+        await self.client(reload=handler, messages=handler)
+        publisher = await self.client()
+        await asyncio.sleep(0.01)
+
+        # Far more than the socket buffers and the queue of the stuck connection hold.
+        payload = "x" * 32768
+        for i in range(300):
+            await publisher.publish("reload", i, payload)
+            if i % 10 == 0:
+                await asyncio.sleep(0.001)
+        await asyncio.sleep(0.05)
+        for i in range(10):
+            await publisher.publish("messages", i)
+        await asyncio.sleep(0.1)
+
+        self.assertEqual([fields[0] for fields in received if len(fields) == 2], list(range(300)))
+        # Work envelopes skip the stuck subscriber once its queue is full.
+        self.assertEqual([fields for fields in received if len(fields) == 1], [(i,) for i in range(10)])
+        self.assertGreater(self.broker.stats()["dropped"], 0)
+
+    async def test_broken_subscriber_is_dropped(self):
+        received = []
+
+        async def handler(*fields):
+            received.append(fields)
+
+        broken = await self.stuck_subscriber("reload")
+        await self.client(reload=handler)
+        publisher = await self.client()
+        await asyncio.sleep(0.01)
+        broken.transport.abort()
+
+        for i in range(3):
+            await publisher.publish("reload", i)
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(received, [(0,), (1,), (2,)])
+        self.assertEqual(self.broker.stats()["connections"], 1)
@@ -1,20 +1,58 @@
-from unittest import IsolatedAsyncioTestCase
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase, skipUnless
+
+from core.database.crud import (
+    add_keyword,
+    add_keywords,
+    delete_keyword,
+    get_dialog_ids,
+    get_dialogs_watermark,
+    get_group,
+    get_keywords_dict,
+    get_keywords_page,
+    get_last_seen,
+    is_snapshot_dirty,
+    iter_keywords,
+    save_dialogs,
+    save_last_seen,
+    toggle_group_activeness,
+    toggle_word_scope,
+)
+from sqlalchemy import inspect, select, text
 
-from core.database.crud import toggle_group_activeness, get_group, get_keywords_dict
 from core.database.database_connector import DatabaseConnector
-from core.database.models import Base, Group, Word
-from core.resources.enums import EntityType
+from core.database.match_log import MatchLogWriter
+from core.database.models import Base, Group, MatchLog, Word
+from core.resources.controllers import KeywordFileParser
+from core.resources.enums import EntityType, IgnoreReason, MatchMode
+from core.resources.matcher import keyword_label
+from core.utils.create_tables import create_db
+from core.utils.result import Err, Ok
+
+POSTGRES_URL = os.environ.get('TEST_POSTGRES_URL')
+# Real-sized Telegram ids: supergroup ids and recent user ids don't fit in 32 bits.
+FIRST_GROUP_ID = -1001234567890
+SECOND_GROUP_ID = -1001234567891
+THIRD_GROUP_ID = -1001234567892
+SENDER_ID = 7000000000
 
 
 class Test(IsolatedAsyncioTestCase):
+    url = 'sqlite+aiosqlite://'
+
     async def asyncSetUp(self):
-        self.test_database = DatabaseConnector(url=f'sqlite+aiosqlite://', echo=True)
+        self.test_database = DatabaseConnector(url=self.url, echo=True)
 
         async with self.test_database.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
             await conn.run_sync(Base.metadata.create_all, checkfirst=True)
 
     async def test_toggle_group_activeness(self):
-        group_id = 100500
+        group_id = FIRST_GROUP_ID
         async with self.test_database.session_factory.begin() as session:
             grp = Group(telegram_id=group_id, link='abacaba', title='Test title')
             session.add(grp)
@@ -56,5 +94,299 @@ class Test(IsolatedAsyncioTestCase):
             self.assertEqual(len(minus_words_dict), target_count_minus)
             self.assertTrue(all([word.minus_word for word in minus_words_dict.values()]))
 
+    async def test_snapshot_rebuild(self):
+        self.assertEqual(self.test_database.snapshot.current.version, 0)
+
+        async with self.test_database.session_factory.begin() as session:
+            session.add(Group(telegram_id=FIRST_GROUP_ID, link='abacaba', title='Test title'))
+            await add_keyword('python', EntityType.WORD, session)
+            await add_keyword('junior', EntityType.MINUS_WORD, session)
+        self.assertTrue(is_snapshot_dirty(session))
+        self.assertFalse(is_snapshot_dirty(session))
+
+        snapshot = await self.test_database.snapshot.rebuild()
+        self.assertEqual(snapshot.version, 1)
+        self.assertIs(self.test_database.snapshot.current, snapshot)
+        self.assertEqual(list(snapshot.groups), [FIRST_GROUP_ID])
+        self.assertEqual(snapshot.keywords, (('python', MatchMode.SUBSTRING, None),))
+        self.assertEqual(snapshot.minus_words, (('junior', MatchMode.SUBSTRING, None),))
+
+        async with self.test_database.session_factory.begin() as session:
+            await toggle_group_activeness(telegram_id=FIRST_GROUP_ID, session=session)
+        self.assertTrue(is_snapshot_dirty(session))
+
+        snapshot = await self.test_database.snapshot.rebuild()
+        self.assertEqual(snapshot.version, 2)
+        self.assertEqual(snapshot.groups, {})
+
+    async def test_overlapping_snapshot_rebuilds(self):
+        store = self.test_database.snapshot
+        session_factory = store.session_factory
+        read = asyncio.Event()
+        release = asyncio.Event()
+
+        @asynccontextmanager
+        async def first_read_held():
+            async with session_factory() as session:
+                yield session
+            if not read.is_set():
+                read.set()
+                await release.wait()
+
+        store.session_factory = first_read_held
+        stale = asyncio.create_task(store.rebuild())
+        await read.wait()
+        async with session_factory.begin() as session:
+            await add_keyword('python', EntityType.WORD, session)
+        fresh = asyncio.create_task(store.rebuild())
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(stale, fresh)
+
+        self.assertEqual(store.current.version, 2)
+        self.assertEqual(store.current.keywords, (('python', MatchMode.SUBSTRING, None),))
+
+    async def test_snapshot_scoped_keywords(self):
+        async with self.test_database.session_factory.begin() as session:
+            first = Group(telegram_id=FIRST_GROUP_ID, link='a', title='First')
+            second = Group(telegram_id=SECOND_GROUP_ID, link='b', title='Second')
+            session.add_all([first, second])
+            await add_keyword('python', EntityType.WORD, session)
+            rust = await add_keyword('rust', EntityType.WORD, session)
+            await toggle_word_scope(rust.id, second.id, session)
+
+        snapshot = await self.test_database.snapshot.rebuild()
+        self.assertEqual(snapshot.keywords, (('python', MatchMode.SUBSTRING, None),))
+        self.assertEqual(snapshot.scoped_keywords, {SECOND_GROUP_ID: (('rust', MatchMode.SUBSTRING, None),)})
+        self.assertIsNone(snapshot.matchers.for_chat(FIRST_GROUP_ID)[0].find('rust developer'))
+        self.assertEqual(snapshot.matchers.for_chat(SECOND_GROUP_ID)[0].find('rust developer'), 'rust')
+
+        async with self.test_database.session_factory.begin() as session:
+            await toggle_word_scope(rust.id, second.id, session)
+            self.assertTrue(is_snapshot_dirty(session))
+
+        snapshot = await self.test_database.snapshot.rebuild()
+        self.assertEqual({keyword for keyword, *_ in snapshot.keywords}, {'python', 'rust'})
+        self.assertEqual(snapshot.scoped_keywords, {})
+
+    async def test_get_keywords_page(self):
+        async with self.test_database.session_factory.begin() as session:
+            session.add_all([Word(keyword=f"w{i}") for i in range(7)])
+            session.add(Word(keyword="minus", minus_word=True))
+
+        async with self.test_database.session_factory() as session:
+            first = await get_keywords_page(session, EntityType.WORD, size=3)
+            self.assertEqual([w.keyword for w in first.items], ["w0", "w1", "w2"])
+            self.assertEqual((first.has_prev, first.has_next), (False, True))
+
+            second = await get_keywords_page(session, EntityType.WORD, after=first.last_id, size=3)
+            last = await get_keywords_page(session, EntityType.WORD, after=second.last_id, size=3)
+            self.assertEqual([w.keyword for w in last.items], ["w6"])
+            self.assertEqual((last.has_prev, last.has_next), (True, False))
+
+            back = await get_keywords_page(session, EntityType.WORD, before=last.first_id, size=3)
+            self.assertEqual([w.id for w in back.items], [w.id for w in second.items])
+            self.assertEqual((back.has_prev, back.has_next), (True, True))
+
+            again = await get_keywords_page(session, EntityType.WORD, after=second.cursor, size=3)
+            self.assertEqual([w.id for w in again.items], [w.id for w in second.items])
+
+        async with self.test_database.session_factory.begin() as session:
+            await delete_keyword(last.first_id, session)
+
+        async with self.test_database.session_factory() as session:
+            emptied = await get_keywords_page(session, EntityType.WORD, after=last.cursor, size=3)
+            self.assertEqual([w.id for w in emptied.items], [w.id for w in second.items])
+
+    async def test_import_keywords(self):
+        async with self.test_database.session_factory.begin() as session:
+            await add_keyword("python", EntityType.WORD, session)
+            is_snapshot_dirty(session)
+
+        parser = KeywordFileParser()
+        lines = ["java\n", "\n", "python\n", "two words\n", "=java\n", "|rust"]
+        async with self.test_database.session_factory.begin() as session:
+            inserted = await add_keywords(parser.parse(lines), EntityType.WORD, session)
+            self.assertTrue(is_snapshot_dirty(session))
+        self.assertEqual(inserted, 2)
+        self.assertEqual((parser.parsed, parser.repeated, parser.invalid), (3, 1, 1))
+
+        async with self.test_database.session_factory.begin() as session:
+            rows = KeywordFileParser().parse(['spam,comment\n', '"scam"\n'], is_csv=True)
+            self.assertEqual(await add_keywords(rows, EntityType.MINUS_WORD, session), 2)
+
+        async with self.test_database.session_factory() as session:
+            words = [keyword async for keyword in iter_keywords(session, EntityType.WORD)]
+            minus_words = [keyword async for keyword in iter_keywords(session, EntityType.MINUS_WORD)]
+        self.assertEqual(words, [
+            ("python", MatchMode.SUBSTRING), ("java", MatchMode.SUBSTRING), ("rust", MatchMode.PREFIX)
+        ])
+        self.assertEqual([keyword for keyword, _ in minus_words], ["spam", "scam"])
+
+    async def test_import_spans_several_batches(self):
+        keywords = [(f"keyword{i}", MatchMode.SUBSTRING) for i in range(1000)]
+        async with self.test_database.session_factory.begin() as session:
+            self.assertEqual(await add_keywords(keywords, EntityType.WORD, session), 1000)
+        async with self.test_database.session_factory() as session:
+            self.assertEqual(len([keyword async for keyword in iter_keywords(session, EntityType.WORD)]), 1000)
+
+    async def test_stem_keyword_is_stemmed_on_save(self):
+        async with self.test_database.session_factory.begin() as session:
+            word = await add_keyword('Разработчик', EntityType.WORD, session, MatchMode.STEM)
+            await add_keywords([('вакансия', MatchMode.STEM), ('java', MatchMode.WORD)], EntityType.WORD, session)
+        self.assertEqual(word.stem, 'разработчик')
+
+        snapshot = await self.test_database.snapshot.rebuild()
+        self.assertEqual(snapshot.keywords, (
+            ('Разработчик', MatchMode.STEM, 'разработчик'),
+            ('вакансия', MatchMode.STEM, 'ваканс'),
+            ('java', MatchMode.WORD, None),
+        ))
+        self.assertEqual(snapshot.keyword_matcher.find('Открыты вакансии для разработчиков'), 'Разработчик')
+
+    async def test_save_dialogs(self):
+        async with self.test_database.session_factory.begin() as session:
+            self.assertIsNone(await get_dialogs_watermark("a", session))
+            await save_dialogs(
+                "a", {FIRST_GROUP_ID: datetime(2024, 1, 1), SECOND_GROUP_ID: datetime(2024, 1, 2)}, session
+            )
+            await save_dialogs("b", {FIRST_GROUP_ID: datetime(2024, 2, 1)}, session)
+
+        async with self.test_database.session_factory.begin() as session:
+            await save_dialogs("a", {FIRST_GROUP_ID: datetime(2024, 1, 3), THIRD_GROUP_ID: None}, session)
+
+        async with self.test_database.session_factory() as session:
+            self.assertEqual(await get_dialog_ids("a", session), {FIRST_GROUP_ID, SECOND_GROUP_ID, THIRD_GROUP_ID})
+            self.assertEqual(await get_dialogs_watermark("a", session), datetime(2024, 1, 3))
+            self.assertEqual(await get_dialog_ids("b", session), {FIRST_GROUP_ID})
+            self.assertEqual(await get_dialogs_watermark("b", session), datetime(2024, 2, 1))
+
+    async def test_match_log_writer(self):
+        writer = MatchLogWriter(self.test_database.session_factory, batch_size=2, flush_interval=60)
+        writer.start()
+        event = SimpleNamespace(chat_id=FIRST_GROUP_ID, id=7, sender_id=SENDER_ID)
+        writer.record(event, Ok("python"))
+        self.assertEqual(writer.stats()["buffered"], 1)
+
+        writer.record(event, Err(IgnoreReason.MINUS_WORD_MATCH))
+        await writer._pending_flush
+        self.assertEqual(writer.stats(), {"buffered": 0, "written": 2, "failed": 0})
+
+        writer.record(event, Err(IgnoreReason.NO_MATCH))
+        await writer.stop()
+
+        async with self.test_database.session_factory() as session:
+            rows = (await session.execute(select(MatchLog).order_by(MatchLog.id))).scalars().all()
+        self.assertEqual(
+            [(row.chat_id, row.sender_id, row.keyword, row.ignore_reason) for row in rows],
+            [
+                (FIRST_GROUP_ID, SENDER_ID, "python", None),
+                (FIRST_GROUP_ID, SENDER_ID, None, "MINUS_WORD_MATCH"),
+                (FIRST_GROUP_ID, SENDER_ID, None, "NO_MATCH"),
+            ],
+        )
+
+    async def test_create_db_upgrades_existing_tables(self):
+        async with self.test_database.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.execute(text(
+                "CREATE TABLE words ("
+                "id INTEGER PRIMARY KEY, "
+                "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL, "
+                "keyword VARCHAR NOT NULL UNIQUE)"
+            ))
+            await conn.execute(text("INSERT INTO words (id, keyword) VALUES (1, 'python')"))
+
+        await create_db(self.test_database)
+
+        async with self.test_database.engine.connect() as conn:
+            columns = await conn.run_sync(lambda c: [col["name"] for col in inspect(c).get_columns("words")])
+            indexes = await conn.run_sync(lambda c: [index["name"] for index in inspect(c).get_indexes("words")])
+            groups_indexes = await conn.run_sync(lambda c: [index["name"] for index in inspect(c).get_indexes("groups")])
+        self.assertIn("minus_word", columns)
+        self.assertIn("match_mode", columns)
+        self.assertIn("stem", columns)
+        self.assertIn("ix_words_minus_word", indexes)
+        self.assertIn("ix_groups_is_active", groups_indexes)
+
+        async with self.test_database.session_factory() as session:
+            words_dict = await get_keywords_dict(session, EntityType.WORD)
+        self.assertEqual([word.keyword for word in words_dict.values()], ["python"])
+        self.assertEqual([word.match_mode for word in words_dict.values()], [MatchMode.SUBSTRING])
+
+    async def test_create_db_migrates_legacy_prefix_keywords(self):
+        async with self.test_database.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.execute(text(
+                "CREATE TABLE words ("
+                "id INTEGER PRIMARY KEY, "
+                "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL, "
+                "keyword VARCHAR NOT NULL UNIQUE)"
+            ))
+            await conn.execute(text(
+                "INSERT INTO words (id, keyword) VALUES (1, '|rust'), (2, '=java'), (3, '|go'), (4, 'go')"
+            ))
+
+        await create_db(self.test_database)
+
+        snapshot = await self.test_database.snapshot.rebuild()
+        self.assertEqual(snapshot.keywords, (
+            ('rust', MatchMode.PREFIX, None),
+            ('=java', MatchMode.SUBSTRING, None),
+            ('|go', MatchMode.SUBSTRING, None),
+            ('go', MatchMode.SUBSTRING, None),
+        ))
+        async with self.test_database.session_factory() as session:
+            labels = [keyword_label(*row) async for row in iter_keywords(session, EntityType.WORD)]
+        self.assertEqual(labels, ["|rust", "\\=java", "\\|go", "go"])
+
+    async def test_create_db_widens_telegram_ids(self):
+        async with self.test_database.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.execute(text(
+                "CREATE TABLE groups ("
+                "id INTEGER PRIMARY KEY, "
+                "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL, "
+                "telegram_id INTEGER NOT NULL UNIQUE, "
+                "link VARCHAR NOT NULL, "
+                "title VARCHAR NOT NULL, "
+                "is_active BOOLEAN NOT NULL)"
+            ))
+
+        await create_db(self.test_database)
+
+        async with self.test_database.session_factory.begin() as session:
+            session.add(Group(telegram_id=FIRST_GROUP_ID, link='a', title='First'))
+            await save_last_seen("a", {FIRST_GROUP_ID: 10}, session)
+        async with self.test_database.session_factory() as session:
+            self.assertEqual((await get_group(FIRST_GROUP_ID, session)).title, 'First')
+            self.assertEqual(await get_last_seen("a", session), {FIRST_GROUP_ID: 10})
+
+    async def test_create_db_recreates_dialog_cache(self):
+        async with self.test_database.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.execute(text(
+                "CREATE TABLE dialogs ("
+                "id INTEGER PRIMARY KEY, "
+                "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL, "
+                "telegram_id INTEGER NOT NULL UNIQUE, "
+                "last_message_at TIMESTAMP)"
+            ))
+            await conn.execute(text(f"INSERT INTO dialogs (id, telegram_id) VALUES (1, {FIRST_GROUP_ID})"))
+
+        await create_db(self.test_database)
+
+        async with self.test_database.session_factory.begin() as session:
+            self.assertEqual(await get_dialog_ids("", session), set())
+            await save_dialogs("a", {FIRST_GROUP_ID: None}, session)
+            await save_dialogs("b", {FIRST_GROUP_ID: None}, session)
+
     async def asyncTearDown(self):
+        async with self.test_database.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
         await self.test_database.engine.dispose()
+
+
+@skipUnless(POSTGRES_URL, "set TEST_POSTGRES_URL=postgresql+asyncpg://... to run against Postgres")
+class PostgresTest(Test):
+    url = POSTGRES_URL
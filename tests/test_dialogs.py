@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase
+
+from core.database.database_connector import DatabaseConnector
+from core.database.models import Base
+from core.resources.dialogs import fetch_dialog_ids
+
+NOW = datetime(2024, 5, 10, 12, 0)
+
+
+class FakeClient:
+    def __init__(self, dialogs: dict[int, datetime]):
+        self.dialogs = dialogs
+
+    async def iter_dialogs(self):
+        for chat_id, date in sorted(self.dialogs.items(), key=lambda item: item[1], reverse=True):
+            yield SimpleNamespace(id=chat_id, date=date, pinned=False)
+
+
+class TestDialogs(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db = DatabaseConnector(url='sqlite+aiosqlite://')
+        async with self.db.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def test_full_scan_forgets_groups_the_session_left(self):
+        client = FakeClient({-1001: NOW - timedelta(days=2), -1002: NOW - timedelta(days=1)})
+        self.assertEqual(await fetch_dialog_ids(self.db, "a", client), {-1001, -1002})
+
+        # Removed from -1001: nothing newer than the watermark shows it.
+        del client.dialogs[-1001]
+        client.dialogs[-1003] = NOW
+        self.assertEqual(await fetch_dialog_ids(self.db, "a", client), {-1001, -1002, -1003})
+
+        self.assertEqual(await fetch_dialog_ids(self.db, "a", client, full=True), {-1002, -1003})
+        self.assertEqual(await fetch_dialog_ids(self.db, "b", client), {-1002, -1003})
+        self.assertEqual(await fetch_dialog_ids(self.db, "a", client), {-1002, -1003})
@@ -0,0 +1,140 @@
+import asyncio
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase
+
+from core.database.crud import get_last_seen, save_last_seen
+from core.database.database_connector import DatabaseConnector
+from core.database.models import Base
+from core.resources.gap_recovery import GapRecovery
+
+
+def make_message(id: int, text: str = "python", out: bool = False):
+    return SimpleNamespace(id=id, message=text, out=out, sender_id=7, sender=SimpleNamespace(id=7))
+
+
+class FakeClient:
+    def __init__(self, history: dict[int, list]):
+        self.history = history
+        self.fetched = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+        self.reconnects = 0
+        self._sender = SimpleNamespace(_auto_reconnect_callback=self._handle_auto_reconnect)
+
+    async def _handle_auto_reconnect(self):
+        self.reconnects += 1
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def reconnect(self):
+        """
+        What Telethon's sender does once it reconnected on its own.
+        """
+        await self._sender._auto_reconnect_callback()
+
+    async def iter_messages(self, chat_id, min_id=0, limit=None):
+        self.fetched.set()
+        await self.release.wait()
+        newest_first = sorted(self.history.get(chat_id, []), key=lambda message: -message.id)
+        for message in [message for message in newest_first if message.id > min_id][:limit]:
+            yield message
+
+
+class TestGapRecovery(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db = DatabaseConnector(url='sqlite+aiosqlite://')
+        async with self.db.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.processed = []
+
+    def make_recovery(self, **options) -> GapRecovery:
+        async def on_message(event):
+            self.processed.append((event.chat_id, event.id))
+
+        return GapRecovery(self.db, on_message, **options)
+
+    async def test_replays_missed_messages_before_live_ones(self):
+        async with self.db.session_factory.begin() as session:
+            await save_last_seen("a", {-1001: 10, -1002: 5}, session)
+        client = FakeClient({
+            -1001: [make_message(i) for i in range(8, 14)] + [make_message(14, out=True)],
+            -1002: [make_message(6, text="")],
+            -1003: [make_message(1)],
+        })
+        client.release.clear()
+        recovery = self.make_recovery()
+        await recovery.load("a")
+
+        task = asyncio.create_task(recovery.recover("a", client, {-1001, -1002, -1003}))
+        await client.fetched.wait()
+        # Arrives while the gap is fetched: held, then dropped as already replayed.
+        live = asyncio.create_task(recovery.handle("a", SimpleNamespace(chat_id=-1001, id=13)))
+        await asyncio.sleep(0)
+        self.assertEqual(self.processed, [])
+        client.release.set()
+        await task
+        await live
+        await recovery.handle("a", SimpleNamespace(chat_id=-1001, id=15))
+
+        self.assertEqual(self.processed, [(-1001, 11), (-1001, 12), (-1001, 13), (-1001, 15)])
+        self.assertEqual(recovery.last_seen["a"], {-1001: 15, -1002: 6})
+        self.assertEqual(recovery.stats()["replayed"], 3)
+        self.assertEqual(recovery.stats()["duplicates"], 1)
+
+    async def test_last_seen_writes_are_batched(self):
+        recovery = self.make_recovery()
+        recovery._ready["a"].set()
+        for message_id in range(1, 101):
+            await recovery.handle("a", SimpleNamespace(chat_id=-1001 - message_id % 2, id=message_id))
+        self.assertEqual(len(self.processed), 100)
+        self.assertEqual(recovery.stats()["pending_writes"], 2)
+
+        await recovery.flush()
+        self.assertEqual(recovery.stats()["written"], 2)
+        async with self.db.session_factory.begin() as session:
+            self.assertEqual(await get_last_seen("a", session), {-1001: 100, -1002: 99})
+            # A stored id is never moved back.
+            await save_last_seen("a", {-1001: 50}, session)
+        async with self.db.session_factory() as session:
+            self.assertEqual(await get_last_seen("a", session), {-1001: 100, -1002: 99})
+            self.assertEqual(await get_last_seen("b", session), {})
+
+    async def test_long_gaps_replay_only_the_newest_messages(self):
+        client = FakeClient({-1001: [make_message(i) for i in range(1, 51)]})
+        recovery = self.make_recovery(max_messages=10)
+        recovery.last_seen["a"][-1001] = 1
+
+        await recovery.recover("a", client, {-1001})
+
+        self.assertEqual([message_id for _, message_id in self.processed], list(range(41, 51)))
+        self.assertEqual(recovery.stats()["truncated"], 1)
+
+    async def test_short_disconnect_is_recovered(self):
+        client = FakeClient({-1001: [make_message(1)]})
+        recovery = self.make_recovery(check_interval=3600)
+        recovery.last_seen["a"][-1001] = 1
+        task = asyncio.create_task(recovery.watch("a", client, lambda: {-1001}))
+        self.addAsyncCleanup(self.cancel, task)
+        await self.wait_for_recoveries(recovery, 1)
+
+        # Reconnected well within check_interval: is_connected() never saw the disconnect.
+        client.history[-1001] += [make_message(2), make_message(3)]
+        await client.reconnect()
+        await self.wait_for_recoveries(recovery, 2)
+
+        self.assertEqual(self.processed, [(-1001, 2), (-1001, 3)])
+        self.assertEqual(client.reconnects, 1)
+
+    @staticmethod
+    async def wait_for_recoveries(recovery: GapRecovery, count: int) -> None:
+        async def recovered():
+            while recovery.recoveries < count:
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(recovered(), timeout=5)
+
+    @staticmethod
+    async def cancel(task: asyncio.Task) -> None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
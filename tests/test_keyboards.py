@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+from unittest import TestCase
+
+from core.database.crud import Page
+from core.resources.callback_data import ActionDataFactory
+from core.resources.enums import Action, EntityType, ListView, MatchMode
+from core.resources.keyboards import get_scope_groups_buttons, get_scope_keywords_buttons
+
+
+def callbacks(keyboard) -> list[ActionDataFactory]:
+    return [
+        ActionDataFactory.unpack(button.callback_data)
+        for row in keyboard.inline_keyboard
+        for button in row
+    ]
+
+
+class TestScopeKeyboards(TestCase):
+    def test_group_list_returns_to_the_keyword_page(self):
+        keywords = Page(
+            [SimpleNamespace(id=41, keyword="python", match_mode=MatchMode.SUBSTRING)], has_prev=True, has_next=False
+        )
+        scope = callbacks(get_scope_keywords_buttons(EntityType.WORD, keywords, page=2))[0]
+        self.assertEqual((scope.action, scope.cursor, scope.page), (Action.SCOPE, 40, 2))
+
+        word = SimpleNamespace(id=41, minus_word=False)
+        groups = Page([SimpleNamespace(id=7, title="First")], has_prev=False, has_next=True)
+        toggle, next_page, back = callbacks(
+            get_scope_groups_buttons(word, groups, {7}, back_cursor=scope.cursor, back_page=scope.page)
+        )
+        self.assertEqual((toggle.id, toggle.target, toggle.view), (41, 7, None))
+        self.assertEqual((next_page.action, next_page.id, next_page.view), (Action.NEXT, 41, ListView.SCOPE))
+        self.assertEqual((back.action, back.cursor, back.page), (Action.SCOPE_PRE, 40, 2))
+
+    def test_scope_callback_data_fits_telegram_limit(self):
+        # A million keywords and a hundred thousand groups, 20 to a page, on the last pages
+        # of both lists.
+        keywords = Page(
+            [SimpleNamespace(id=1_000_000, keyword="python", match_mode=MatchMode.SUBSTRING)],
+            has_prev=True,
+            has_next=True,
+        )
+        word = SimpleNamespace(id=1_000_000, minus_word=True)
+        groups = Page([SimpleNamespace(id=100_000, title="Last")], has_prev=True, has_next=True)
+        keyboards = [
+            get_scope_keywords_buttons(EntityType.MINUS_WORD, keywords, page=49_999),
+            get_scope_groups_buttons(word, groups, set(), page=4_999, back_cursor=999_999, back_page=49_999),
+        ]
+        for keyboard in keyboards:
+            for row in keyboard.inline_keyboard:
+                for button in row:
+                    self.assertLessEqual(len(button.callback_data.encode()), 64)
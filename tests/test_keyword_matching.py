@@ -1,7 +1,14 @@
+import random
+import re
+import unicodedata
 from unittest import TestCase
 
 from core.resources.controllers import contains_keyword, text_matches, detect_spam_evading
-from core.resources.enums import IgnoreReason
+from core.resources.enums import HomoglyphPolicy, IgnoreReason, MatchMode
+from core.resources.matcher import KeywordMatcher, MatcherIndex, keyword_label, parse_keyword
+from core.utils.aho_corasick import AhoCorasick
+from core.utils.normalized_text import NormalizedText, fold
+from core.utils.unicode_scripts import script_of
 from core.utils.result import Ok, Err
 
 from typing_extensions import assert_never  # python < 3.11
@@ -33,6 +40,36 @@ class TestKeywordMatching(TestCase):
 
         # Mixed characters from Latin and Cyrillic
         self.assertEqual(text_matches("АБВabc", ["abc"], []), Err(IgnoreReason.SPAM_EVADING_MATCH))
+        self.assertEqual(text_matches("АБВabc", ["абв"], []), Err(IgnoreReason.SPAM_EVADING_MATCH))
+        self.assertEqual(text_matches("АБВabc", ["абв"], [], HomoglyphPolicy.MATCH), Ok("абв"))
+        self.assertEqual(text_matches("АБВabc", ["abc"], [], HomoglyphPolicy.FLAG), Ok("abc"))
+        self.assertEqual(text_matches("АБВabc", ["абв"], ["abc"], HomoglyphPolicy.MATCH), Err(IgnoreReason.MINUS_WORD_MATCH))
+
+    def test_homoglyphs_are_canonicalized(self):
+        # Latin "o" in a Cyrillic word, Cyrillic "а" and "у" in Latin ones
+        self.assertEqual(contains_keyword("Ищем на рабoту", ["работу"]), "работу")
+        self.assertEqual(contains_keyword("Senior jаva dev", [("java", MatchMode.WORD)]), "java")
+        self.assertEqual(contains_keyword("рython", ["|python"]), "python")
+        self.assertEqual(contains_keyword("ВАКАНСИЯ", ["вакансия"]), "вакансия")
+        self.assertEqual(contains_keyword("ВAKAHCИЯ", ["вакансия"]), "вакансия")
+        self.assertEqual(NormalizedText("рython и рабoта").folded, "python и работа")
+        self.assertEqual(NormalizedText("python и работа").folded, "python и работа")
+        self.assertEqual(text_matches("рабoта", ["работа"], [], HomoglyphPolicy.FLAG), Ok("работа"))
+        self.assertEqual(text_matches("рабoта", ["работа"], ["рабoта"], HomoglyphPolicy.MATCH), Err(IgnoreReason.MINUS_WORD_MATCH))
+        self.assertEqual(text_matches("рабoта", ["работа"], []), Err(IgnoreReason.SPAM_EVADING_MATCH))
+
+    def test_unicode_case_folding(self):
+        self.assertEqual(contains_keyword("Büro in der STRASSE", ["straße"]), "straße")
+        self.assertEqual(contains_keyword("ＰＹＴＨＯＮ developer", ["python"]), "python")
+        self.assertEqual(contains_keyword("ΣΟΦΟΣ", ["|σοφος"]), "σοφος")
+
+    def test_normalized_text(self):
+        message = NormalizedText("Ｗork_1 at ﬁrm")
+        self.assertEqual(message.folded, "work_1 at firm")
+        self.assertEqual(message.boundaries, {0, 6, 7, 9, 10, 14})
+        self.assertEqual(len(message.scripts), len(message.text))
+        self.assertIs(NormalizedText.of(message), message)
+        self.assertEqual(text_matches(message, ["firm"], []), Ok("firm"))
 
     def test_match_case(self):
         match res := text_matches(self.text, ["bac"], ["qwertyu"]):
@@ -47,3 +84,186 @@ class TestKeywordMatching(TestCase):
         self.assertFalse(detect_spam_evading("АБВ"))
         self.assertFalse(detect_spam_evading("АБВ abc"))
         self.assertFalse(detect_spam_evading(""))
+        self.assertTrue(detect_spam_evading("Ωmega"))
+        self.assertFalse(detect_spam_evading("x²y a1б ab_бв"))
+
+    def test_detect_spam_evading_same_as_unicode_names(self):
+        def by_unicode_names(text):
+            alphabet = None
+            for c in text:
+                if not c.isalpha():
+                    alphabet = None
+                elif alphabet is None:
+                    alphabet = unicodedata.name(c).split()[0]
+                elif alphabet != unicodedata.name(c).split()[0]:
+                    return True
+            return False
+
+        rnd = random.Random(7)
+        alphabet = "abzABZабяАБЯёЁαβΩ 1_-²"
+        for _ in range(500):
+            text = "".join(rnd.choices(alphabet, k=rnd.randint(0, 12)))
+            self.assertEqual(detect_spam_evading(text), by_unicode_names(text), text)
+
+    def test_script_of(self):
+        self.assertEqual(script_of("a"), "LATIN")
+        self.assertEqual(script_of("ё"), "CYRILLIC")
+        self.assertEqual(script_of("Ω"), "GREEK")
+        self.assertIsNone(script_of("1"))
+        self.assertIsNone(script_of(" "))
+
+
+class TestAhoCorasick(TestCase):
+    def test_first(self):
+        automaton = AhoCorasick(["she", "he", "hers", "his"])
+        self.assertEqual(automaton.first("ushers"), 0)
+        self.assertEqual(automaton.first("ahis"), 3)
+        self.assertEqual(automaton.first("uhe"), 1)
+        self.assertIsNone(automaton.first("abc"))
+        self.assertIsNone(AhoCorasick([]).first("abc"))
+
+    def test_lowest_index_wins(self):
+        automaton = AhoCorasick(["three", "one", "on"])
+        self.assertEqual(automaton.first("one two three"), 0)
+        self.assertEqual(automaton.first("one two"), 1)
+        self.assertEqual(automaton.first("onion"), 2)
+
+    def test_suffix_inherits_output(self):
+        automaton = AhoCorasick(["abcd", "bc"])
+        self.assertEqual(automaton.first("xabcx"), 1)
+
+    def test_equal_patterns_are_all_reported(self):
+        automaton = AhoCorasick(["ab", "b", "ab"])
+        self.assertEqual(list(automaton.iter_matches("xab")), [(2, 0), (2, 2), (2, 1)])
+        self.assertEqual(automaton.first("xab"), 0)
+
+
+class TestKeywordMatcher(TestCase):
+    def test_first_keyword_wins(self):
+        matcher = KeywordMatcher(["three", "|tw", "AbaC"], linear_scan_limit=0)
+        self.assertEqual(matcher.find("AbacABA one two three"), "three")
+        self.assertEqual(matcher.find("AbacABA one two"), "tw")
+        self.assertEqual(matcher.find("AbacABA"), "AbaC")
+        self.assertIsNone(matcher.find("qwerty"))
+        self.assertEqual(len(matcher), 3)
+
+    def test_prefix_keywords(self):
+        matcher = KeywordMatcher(["|two", "|on", "|Thr"])
+        self.assertEqual(matcher.find("one two three"), "two")
+        self.assertEqual(matcher.find("one three"), "on")
+        self.assertEqual(matcher.find("THREE"), "Thr")
+        self.assertIsNone(matcher.find("atwo bone"))
+
+    def test_prefix_keywords_are_escaped(self):
+        matcher = KeywordMatcher(["|c++", "|(a+)+$", "|["])
+        self.assertEqual(matcher.find("senior c++ developer"), "c++")
+        self.assertIsNone(matcher.find("a" * 50 + "!"))
+        self.assertEqual(matcher.find("list[1]"), "[")
+
+    def test_prefix_keywords_same_as_regex(self):
+        def regex_scan(text, words):
+            lower_text = fold(text)
+            for word in words:
+                if re.search(r"\b" + re.escape(fold(word[1:])), lower_text):
+                    return word[1:]
+            return None
+
+        rnd = random.Random(3)
+        alphabet = "abАБ_1 -"
+        for _ in range(300):
+            words = list({"|" + "".join(rnd.choices(alphabet, k=rnd.randint(1, 3))) for _ in range(10)})
+            text = "".join(rnd.choices(alphabet, k=rnd.randint(0, 30)))
+            self.assertEqual(KeywordMatcher(words).find(text), regex_scan(text, words), (text, words))
+
+    def test_match_modes(self):
+        matcher = KeywordMatcher([("java", MatchMode.WORD), ("py", MatchMode.PREFIX), ("c++", MatchMode.WORD)])
+        self.assertIsNone(matcher.find("javascript developer"))
+        self.assertEqual(matcher.find("Java, Kotlin"), "java")
+        self.assertEqual(matcher.find("pytest"), "py")
+        self.assertIsNone(matcher.find("numpy"))
+        self.assertEqual(matcher.find("senior c++ developer"), "c++")
+        self.assertIsNone(matcher.find("c++x"))
+        self.assertEqual(matcher.find("c++ and java"), "java")
+
+    def test_same_bounded_keyword_in_two_modes(self):
+        matcher = KeywordMatcher([("Кот пёс", MatchMode.WORD), ("кот пёс", MatchMode.PREFIX)])
+        self.assertEqual(matcher.find("кот пёс, привет"), "Кот пёс")
+        self.assertEqual(matcher.find("кот пёсик"), "кот пёс")
+
+    def test_stored_keywords_are_not_parsed(self):
+        matcher = KeywordMatcher([("=java", MatchMode.SUBSTRING), ("|py", MatchMode.SUBSTRING)])
+        self.assertIsNone(matcher.find("java, python"))
+        self.assertEqual(matcher.find("x=java"), "=java")
+        self.assertEqual(matcher.find("a|py"), "|py")
+
+    def test_stem_keywords(self):
+        matcher = KeywordMatcher(["~разработчик", ("вакансия", MatchMode.STEM, "ваканс"), "~ёлка"])
+        self.assertEqual(matcher.find("Ищем разработчиков в команду"), "разработчик")
+        self.assertEqual(matcher.find("Новые ВАКАНСИИ недели"), "вакансия")
+        self.assertEqual(matcher.find("под елкой"), "ёлка")
+        self.assertIsNone(matcher.find("разработка сайтов"))
+        self.assertEqual(matcher.find("разработчик, вакансии"), "разработчик")
+
+    def test_multiword_stem_keyword_matches_whole_words(self):
+        matcher = KeywordMatcher(["~data science"])
+        self.assertEqual(matcher.find("Data Science course"), "data science")
+        self.assertIsNone(matcher.find("bigdata sciences"))
+
+    def test_whole_word_keywords_same_as_regex(self):
+        def regex_scan(text, words):
+            lower_text = fold(text)
+            for word in words:
+                if re.search(r"(?<!\w)" + re.escape(fold(word)) + r"(?!\w)", lower_text):
+                    return word
+            return None
+
+        rnd = random.Random(7)
+        alphabet = "abАБ_1 -"
+        for _ in range(300):
+            words = list({"".join(rnd.choices(alphabet, k=rnd.randint(1, 3))).strip() or "a" for _ in range(10)})
+            text = "".join(rnd.choices(alphabet, k=rnd.randint(0, 30)))
+            entries = [(word, MatchMode.WORD) for word in words]
+            self.assertEqual(KeywordMatcher(entries).find(text), regex_scan(text, words), (text, words))
+
+    def test_parse_keyword(self):
+        self.assertEqual(parse_keyword("=java"), ("java", MatchMode.WORD))
+        self.assertEqual(parse_keyword("|java"), ("java", MatchMode.PREFIX))
+        self.assertEqual(parse_keyword("java"), ("java", MatchMode.SUBSTRING))
+        self.assertEqual(parse_keyword("="), ("=", MatchMode.SUBSTRING))
+        self.assertEqual(parse_keyword("\\=java"), ("=java", MatchMode.SUBSTRING))
+        self.assertEqual(keyword_label("java", MatchMode.WORD), "=java")
+        for keyword in ("=java", "|java", "\\java", "\\", "java"):
+            self.assertEqual(parse_keyword(keyword_label(keyword, MatchMode.SUBSTRING)), (keyword, MatchMode.SUBSTRING))
+
+    def test_same_as_linear_scan(self):
+        def linear_scan(text, words):
+            lower_text = fold(text)
+            for word in words:
+                if fold(word) in lower_text:
+                    return word
+            return None
+
+        rnd = random.Random(42)
+        alphabet = "abcАБВ "
+        for _ in range(200):
+            words = list({"".join(rnd.choices(alphabet[:-1], k=rnd.randint(1, 4))) for _ in range(20)})
+            text = "".join(rnd.choices(alphabet, k=rnd.randint(0, 40)))
+            self.assertEqual(KeywordMatcher(words, linear_scan_limit=0).find(text), linear_scan(text, words))
+            self.assertEqual(KeywordMatcher(words).find(text), linear_scan(text, words))
+
+
+class TestMatcherIndex(TestCase):
+    def test_scoped_words_apply_only_to_their_chats(self):
+        index = MatcherIndex(
+            ["python"],
+            ["junior"],
+            scoped_keywords={-1: ["rust"], -2: ["rust"]},
+            scoped_minus_words={-3: ["remote"]},
+        )
+        self.assertEqual(text_matches("rust dev", *index.for_chat(-1)), Ok("rust"))
+        self.assertEqual(text_matches("python dev", *index.for_chat(-2)), Ok("python"))
+        self.assertEqual(text_matches("rust dev", *index.for_chat(-4)), Err(IgnoreReason.NO_MATCH))
+        self.assertEqual(text_matches("remote python", *index.for_chat(-3)), Err(IgnoreReason.MINUS_WORD_MATCH))
+        self.assertEqual(text_matches("remote python", *index.for_chat(-1)), Ok("python"))
+        self.assertIs(index.for_chat(-1)[0].matchers[1], index.for_chat(-2)[0].matchers[1])
+        self.assertIs(index.for_chat(-4)[0], index.keyword_matcher)
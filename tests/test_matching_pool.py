@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase
+
+from core.database.snapshot import Snapshot
+from core.resources.enums import IgnoreReason, OverflowPolicy
+from core.resources.matching_pool import MatchingPool
+from core.utils.result import Err, Ok
+
+
+class FakeStore:
+    def __init__(self, keywords, minus_words, version=1):
+        self.current = Snapshot(version=version, groups={}, keywords=keywords, minus_words=minus_words)
+
+
+class TestMatchingPool(IsolatedAsyncioTestCase):
+    async def test_overflow_policies(self):
+        async def on_result(*_):
+            pass
+
+        store = FakeStore([], [])
+        events = [SimpleNamespace(text=str(i)) for i in range(3)]
+
+        shed = MatchingPool(store, on_result, workers=1, max_queue=2, overflow=OverflowPolicy.SHED)
+        results = [await shed.submit(event) for event in events]
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual([shed.queue.get_nowait().text for _ in range(2)], ["0", "1"])
+
+        drop_oldest = MatchingPool(store, on_result, workers=1, max_queue=2, overflow=OverflowPolicy.DROP_OLDEST)
+        for event in events:
+            await drop_oldest.submit(event)
+        self.assertEqual(drop_oldest.dropped, 1)
+        self.assertEqual([drop_oldest.queue.get_nowait().text for _ in range(2)], ["1", "2"])
+
+        block = MatchingPool(store, on_result, workers=1, max_queue=2, overflow=OverflowPolicy.BLOCK)
+        for event in events[:2]:
+            await block.submit(event)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(block.submit(events[2]), timeout=0.01)
+
+    async def test_sequential_dispatch_bounds_memory_under_load(self):
+        async def on_result(*_):
+            pass
+
+        pool = MatchingPool(FakeStore([], []), on_result, workers=1, max_queue=10, overflow=OverflowPolicy.BLOCK)
+        events = [SimpleNamespace(chat_id=-1001, text=str(i)) for i in range(200)]
+        peak_depth = peak_blocked = 0
+
+        async def slow_consumer():
+            while True:
+                await pool.queue.get()
+                pool.queue.task_done()
+                await asyncio.sleep(0.001)
+
+        consumer = asyncio.create_task(slow_consumer())
+        try:
+            # A client with sequential_updates=True reads the next update only after the
+            # handler of the previous one returned.
+            for event in events:
+                submitted = asyncio.create_task(pool.submit(event))
+                await asyncio.sleep(0)
+                peak_depth = max(peak_depth, pool.queue.qsize())
+                peak_blocked = max(peak_blocked, pool.stats()["blocked"])
+                await submitted
+            await pool.queue.join()
+        finally:
+            consumer.cancel()
+        self.assertLessEqual(peak_depth, 10)
+        self.assertLessEqual(peak_blocked, 1)
+
+        # Concurrent dispatch starts a task per update, each waiting in submit.
+        burst = [asyncio.create_task(pool.submit(event)) for event in events]
+        await asyncio.sleep(0)
+        self.assertEqual(pool.stats()["blocked"], len(events) - 10)
+        for task in burst:
+            task.cancel()
+        await asyncio.gather(*burst, return_exceptions=True)
+        self.assertEqual(pool.stats()["blocked"], 0)
+
+    async def test_matches_in_worker_process(self):
+        results = []
+
+        async def on_result(event, snapshot, result):
+            results.append((event.text, snapshot.version, result))
+
+        store = FakeStore(["python"], ["junior"])
+        pool = MatchingPool(store, on_result, workers=1)
+        pool.start()
+        try:
+            await pool.submit(SimpleNamespace(chat_id=-1001, text="Senior Python developer"))
+            await pool.submit(SimpleNamespace(chat_id=-1001, text="Junior Python developer"))
+            await asyncio.wait_for(pool.queue.join(), timeout=30)
+
+            store.current = Snapshot(
+                version=2, groups={}, keywords=["go"], minus_words=[], scoped_keywords={-1002: ["rust"]}
+            )
+            await pool.submit(SimpleNamespace(chat_id=-1001, text="go developer"))
+            await pool.submit(SimpleNamespace(chat_id=-1001, text="rust developer"))
+            await pool.submit(SimpleNamespace(chat_id=-1002, text="rust developer"))
+            await asyncio.wait_for(pool.queue.join(), timeout=30)
+        finally:
+            await pool.stop()
+
+        self.assertEqual(results, [
+            ("Senior Python developer", 1, Ok("python")),
+            ("Junior Python developer", 1, Err(IgnoreReason.MINUS_WORD_MATCH)),
+            ("go developer", 2, Ok("go")),
+            ("rust developer", 2, Err(IgnoreReason.NO_MATCH)),
+            ("rust developer", 2, Ok("rust")),
+        ])
+        self.assertEqual(pool.keyword_shipments, 2)
@@ -0,0 +1,52 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from core.utils import metrics
+from core.utils.metrics import Counter, Histogram, Registry
+
+
+class TestHistogram(TestCase):
+    def test_quantile_and_render(self):
+        histogram = Histogram("stage_seconds", "Stage latency.", label="stage", buckets=(0.1, 1.0))
+        for value in (0.05, 0.05, 0.5, 2.0):
+            histogram.observe("match", value)
+
+        self.assertEqual(histogram.count("match"), 4)
+        self.assertAlmostEqual(histogram.quantile("match", 0.5), 0.1)
+        self.assertEqual(histogram.quantile("match", 0.99), 1.0)
+        self.assertIsNone(histogram.quantile("send", 0.5))
+        self.assertEqual(list(histogram.render())[2:], [
+            'stage_seconds_bucket{stage="match",le="0.1"} 2',
+            'stage_seconds_bucket{stage="match",le="1.0"} 3',
+            'stage_seconds_bucket{stage="match",le="+Inf"} 4',
+            'stage_seconds_sum{stage="match"} 2.6',
+            'stage_seconds_count{stage="match"} 4',
+        ])
+
+    def test_registry_render(self):
+        registry = Registry()
+        counter = registry.register(Counter("messages_total", "Messages.", label="result"))
+        counter.inc("match")
+        counter.inc("match")
+        registry.register_collector("notifier", lambda: {"queue_depth": 3})
+
+        text = registry.render()
+        self.assertIn('messages_total{result="match"} 2', text)
+        self.assertIn("notifier_queue_depth 3", text)
+
+
+class TestMetricsServer(IsolatedAsyncioTestCase):
+    async def test_serves_registry(self):
+        server = await metrics.start_metrics_server("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+        self.assertTrue(response.startswith(b"HTTP/1.1 200 OK"))
+        self.assertIn(b"# TYPE keyword_seek_stage_seconds histogram", response)
@@ -0,0 +1,106 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from core.resources.dedup import DuplicateFilter, normalize_for_dedup, notify_once
+
+from core.resources.notifier import DIGEST_SEPARATOR, MESSAGE_LIMIT, Notification, NotificationDispatcher
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(text)
+
+
+class TestNotificationDispatcher(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bot = FakeBot()
+        self.notifier = NotificationDispatcher(self.bot, chat_id=1, rate_per_minute=600, burst=1, max_queue=5)
+
+    async def asyncTearDown(self):
+        await self.notifier.stop()
+
+    async def test_backlog_is_merged_into_digest(self):
+        for i in range(3):
+            self.notifier.submit(Notification(f"match {i}"))
+        self.notifier.start()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(self.bot.sent, [DIGEST_SEPARATOR.join(["match 0", "match 1", "match 2"])])
+        self.assertEqual(self.notifier.stats()["merged"], 2)
+        self.assertEqual(self.notifier.stats()["queue_depth"], 0)
+
+    async def test_digest_respects_message_limit(self):
+        long_text = "x" * (MESSAGE_LIMIT // 3)
+        for _ in range(3):
+            self.notifier.submit(Notification(long_text))
+        self.notifier.start()
+        await asyncio.sleep(0.3)
+
+        self.assertEqual(len(self.bot.sent), 2)
+        self.assertEqual(self.notifier.stats()["merged"], 1)
+        self.assertTrue(all(len(text) <= MESSAGE_LIMIT for text in self.bot.sent))
+
+    async def test_full_queue_drops(self):
+        results = [self.notifier.submit(Notification(str(i))) for i in range(7)]
+        self.assertEqual(results.count(False), 2)
+        self.assertEqual(self.notifier.stats()["dropped"], 2)
+
+    async def test_dropped_notification_is_not_remembered(self):
+        dedup = DuplicateFilter()
+
+        async def render():
+            return "match"
+
+        for i in range(5):
+            self.notifier.submit(Notification(str(i)))
+        self.assertFalse(await notify_once(dedup, self.notifier, "Ищем Python разработчика", "group A", render))
+        self.assertEqual(dedup.stats()["size"], 0)
+
+        async def broken_render():
+            raise ConnectionError()
+
+        with self.assertRaises(ConnectionError):
+            await notify_once(dedup, self.notifier, "Ищем Python разработчика", "group A", broken_render)
+        self.assertEqual(dedup.stats()["size"], 0)
+
+        # Once there is room, the repost is notified instead of being treated as a duplicate.
+        self.notifier.queue.popleft()
+        self.assertTrue(await notify_once(dedup, self.notifier, "ищем python-разработчика!", "group B", render))
+        self.assertFalse(await notify_once(dedup, self.notifier, "Ищем Python разработчика", "group C", render))
+        self.assertEqual(self.notifier.queue[-1].extra_groups, ["group C"])
+
+
+class TestDuplicateFilter(TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize_for_dedup("  Ищем PYTHON-разработчика!!! 🔥\n"), "ищем python разработчика")
+
+    def test_reposts_collapse_into_first_notification(self):
+        dedup = DuplicateFilter()
+        notification = dedup.check("Ищем Python разработчика", "group A")
+        notification.text = "match"
+
+        self.assertIsNone(dedup.check("ищем python-разработчика!", "group B"))
+        self.assertIsNone(dedup.check("Ищем Python разработчика", "group A"))
+        self.assertIsNone(dedup.check("Ищем Python разработчика", "group B"))
+        self.assertEqual(notification.extra_groups, ["group B"])
+        self.assertTrue(notification.render().startswith("match"))
+        self.assertIn("group B", notification.render())
+
+        notification.sent = True
+        self.assertIsNone(dedup.check("Ищем Python разработчика", "group C"))
+        self.assertEqual(dedup.stats(), {"size": 1, "collapsed": 2, "suppressed": 2})
+
+    def test_window_and_memory_cap(self):
+        self.assertIsNotNone(DuplicateFilter(window=0).check("text", "a"))
+        expired = DuplicateFilter(window=0)
+        expired.check("text", "a")
+        self.assertIsNotNone(expired.check("text", "b"))
+
+        capped = DuplicateFilter(max_entries=2)
+        for text in ("one", "two", "three"):
+            capped.check(text, "a")
+        self.assertEqual(len(capped.entries), 2)
+        self.assertIsNotNone(capped.check("one", "b"))
@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase
+
+from core.resources.sender_cache import SenderCache
+
+
+class FakeEvent:
+    def __init__(self, sender_id, sender, delay=0.0, error=None):
+        self.sender_id = sender_id
+        self.sender = sender
+        self.delay = delay
+        self.error = error
+        self.resolved = 0
+
+    async def get_sender(self):
+        self.resolved += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.sender
+
+
+class TestSenderCache(IsolatedAsyncioTestCase):
+    async def test_hit_after_miss(self):
+        cache = SenderCache()
+        event = FakeEvent(1, SimpleNamespace(first_name="Ivan", last_name="Petrov", username="ivan"))
+
+        first = await cache.get(event)
+        second = await cache.get(event)
+
+        self.assertIs(first, second)
+        self.assertEqual(first.fullname, "Ivan Petrov")
+        self.assertEqual(event.resolved, 1)
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+    async def test_lru_eviction_and_ttl(self):
+        cache = SenderCache(max_size=2)
+        events = [FakeEvent(i, SimpleNamespace(first_name=str(i))) for i in range(3)]
+        for event in events:
+            await cache.get(event)
+        self.assertEqual(list(cache.entries), [1, 2])
+
+        expired = SenderCache(ttl=-1)
+        await expired.get(events[0])
+        await expired.get(events[0])
+        self.assertEqual(expired.hits, 0)
+
+    async def test_channel_sender(self):
+        cache = SenderCache()
+        info = await cache.get(FakeEvent(-100, SimpleNamespace(title="Channel", username=None)))
+        self.assertEqual(info.fullname, "Channel")
+        self.assertIsNone(info.username)
+
+    async def test_slow_resolution_falls_back(self):
+        cache = SenderCache(resolve_timeout=0.01)
+        event = FakeEvent(1, SimpleNamespace(first_name="Ivan"), delay=1)
+        self.assertIsNone(await cache.get(event))
+        self.assertEqual(cache.timeouts, 1)
+
+    async def test_failed_resolution_falls_back(self):
+        cache = SenderCache()
+        event = FakeEvent(1, None, error=ValueError("Could not find the input entity"))
+        self.assertIsNone(await cache.get(event))
+        self.assertEqual(cache.stats()["failures"], 1)
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from core.resources.controllers import invite_hash
+from core.resources.shards import ShardManager, rendezvous_owner
+
+
+class TestRendezvousOwner(unittest.TestCase):
+    def test_single_shard_owns_everything(self):
+        self.assertEqual({rendezvous_owner(gid, ["main"]) for gid in range(-1000, 0)}, {"main"})
+
+    def test_adding_shard_only_moves_groups_to_it(self):
+        groups = range(-1001000, -1000000)
+        before = {gid: rendezvous_owner(gid, ["a", "b"]) for gid in groups}
+        after = {gid: rendezvous_owner(gid, ["a", "b", "c"]) for gid in groups}
+        moved = {gid for gid in groups if before[gid] != after[gid]}
+        self.assertTrue(moved)
+        self.assertTrue(all(after[gid] == "c" for gid in moved))
+        self.assertLess(len(moved), len(groups) / 2)
+
+    def test_order_of_names_does_not_matter(self):
+        for gid in range(-100, 0):
+            self.assertEqual(rendezvous_owner(gid, ["a", "b", "c"]), rendezvous_owner(gid, ["c", "a", "b"]))
+
+
+class TestShardManager(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.sessions = [os.path.join(directory.name, name) for name in ("a", "b", "c")]
+
+    async def test_local_clients_only(self):
+        ingest = ShardManager(self.sessions, 1, "hash", local=self.sessions[:1])
+        admin = ShardManager(self.sessions, 1, "hash", local=[])
+        self.assertEqual(list(ingest.clients), self.sessions[:1])
+        self.assertEqual(admin.clients, {})
+        for gid in range(-100, 0):
+            # Every process agrees on the owner, whichever clients it runs.
+            self.assertEqual(ingest.owner(gid), admin.owner(gid))
+            self.assertIsNone(admin.local_client_for(gid))
+            self.assertIs(ingest.local_client_for(gid), ingest.clients.get(ingest.owner(gid)))
+
+
+class TestInviteHash(unittest.TestCase):
+    def test_invite_hash(self):
+        self.assertEqual(invite_hash("https://t.me/+AbC_1"), "AbC_1")
+        self.assertEqual(invite_hash("t.me/+AbC_1"), "AbC_1")
+        self.assertIsNone(invite_hash("https://t.me/python"))
+        self.assertIsNone(invite_hash("https://t.me/c/1234"))